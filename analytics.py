@@ -0,0 +1,161 @@
+from datetime import datetime
+
+import deadlines
+import task_history
+
+
+SECONDS_PER_DAY = 86400
+# Сколько дней показывает график задач: неделя до сегодняшнего дня и неделя после
+CHART_DAYS_BEFORE = 7
+CHART_DAYS_AFTER = 6
+
+# День дедлайна: номер суток от 1970-01-01 с округлением вниз и для дат до 1970 года
+_DAY = "({0} / 86400 - ({0} % 86400 < 0))"
+
+
+def _adjust_due(row, delta):
+    """SQL изменения счётчика due у дня дедлайна строки row (NEW или OLD).
+
+    Строки удаляемого профиля не пересоздаются: сводка профиля удаляется
+    каскадно, возможно, раньше его задач.
+    """
+    day = _DAY.format(f"{row}.deadline_at")
+    return f'''
+        INSERT INTO task_stats_daily (profile_id, day, due)
+        SELECT {row}.profile_id, {day}, {delta}
+        WHERE {row}.deadline_at IS NOT NULL AND EXISTS (SELECT 1 FROM profiles WHERE id = {row}.profile_id)
+        ON CONFLICT (profile_id, day) DO UPDATE SET due = due + {delta};
+        DELETE FROM task_stats_daily
+        WHERE {row}.deadline_at IS NOT NULL AND profile_id = {row}.profile_id AND day = {day}
+          AND due = 0 AND completed = 0 AND failed = 0;
+    '''
+
+
+def _adjust_counters(row, delta):
+    """То же, что _adjust_due(), вместе со счётчиком статуса строки row"""
+    day = _DAY.format(f"{row}.deadline_at")
+    completed = f"{delta} * ({row}.status = {task_history.STATUS_COMPLETED})"
+    failed = f"{delta} * ({row}.status = {task_history.STATUS_FAILED})"
+    return f'''
+        INSERT INTO task_stats_daily (profile_id, day, due, completed, failed)
+        SELECT {row}.profile_id, {day}, {delta}, {completed}, {failed}
+        WHERE {row}.deadline_at IS NOT NULL AND EXISTS (SELECT 1 FROM profiles WHERE id = {row}.profile_id)
+        ON CONFLICT (profile_id, day) DO UPDATE SET
+            due = due + {delta}, completed = completed + {completed}, failed = failed + {failed};
+        DELETE FROM task_stats_daily
+        WHERE {row}.deadline_at IS NOT NULL AND profile_id = {row}.profile_id AND day = {day}
+          AND due = 0 AND completed = 0 AND failed = 0;
+    '''
+
+
+def create_summary_tables(connection):
+    """Шаг миграции: сводная таблица по дням и триггеры, поддерживающие её.
+
+    task_stats_daily хранит для каждого профиля и дня число задач с
+    дедлайном в этот день, а также выполненных и проваленных. Триггеры на
+    tasks меняют только строки затронутых дней, поэтому графики читают
+    готовые суммы по первичному ключу и не перебирают задачи. Пустые дни
+    удаляются. Существующие задачи учитываются один раз при создании.
+    """
+    connection.execute('''
+        CREATE TABLE task_stats_daily (
+            profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+            day INTEGER NOT NULL,
+            due INTEGER NOT NULL DEFAULT 0,
+            completed INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (profile_id, day)
+        ) WITHOUT ROWID
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER task_stats_insert AFTER INSERT ON tasks BEGIN
+            {_adjust_due("NEW", 1)}
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER task_stats_delete AFTER DELETE ON tasks BEGIN
+            {_adjust_due("OLD", -1)}
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER task_stats_update AFTER UPDATE OF profile_id, deadline_at ON tasks
+        WHEN OLD.profile_id IS NOT NEW.profile_id OR OLD.deadline_at IS NOT NEW.deadline_at
+        BEGIN
+            {_adjust_due("OLD", -1)}
+            {_adjust_due("NEW", 1)}
+        END
+    ''')
+    connection.execute(f'''
+        INSERT INTO task_stats_daily (profile_id, day, due)
+        SELECT profile_id, {_DAY.format("deadline_at")}, count(*)
+        FROM tasks
+        WHERE deadline_at IS NOT NULL
+        GROUP BY 1, 2
+    ''')
+
+
+def add_status_counters(connection):
+    """Шаг миграции: триггеры task_stats_* учитывают и статус задачи.
+
+    Выполненная или проваленная задача остаётся в due своего дня и
+    дополнительно попадает в completed или failed.
+    """
+    for trigger in ("task_stats_insert", "task_stats_delete", "task_stats_update"):
+        connection.execute(f"DROP TRIGGER {trigger}")
+
+    connection.execute(f'''
+        CREATE TRIGGER task_stats_insert AFTER INSERT ON tasks BEGIN
+            {_adjust_counters("NEW", 1)}
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER task_stats_delete AFTER DELETE ON tasks BEGIN
+            {_adjust_counters("OLD", -1)}
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER task_stats_update AFTER UPDATE OF profile_id, deadline_at, status ON tasks
+        WHEN OLD.profile_id IS NOT NEW.profile_id OR OLD.deadline_at IS NOT NEW.deadline_at
+          OR OLD.status IS NOT NEW.status
+        BEGIN
+            {_adjust_counters("OLD", -1)}
+            {_adjust_counters("NEW", 1)}
+        END
+    ''')
+
+
+def day_of(moment):
+    """Номер суток для даты или момента времени"""
+    return deadlines.to_timestamp(moment) // SECONDS_PER_DAY
+
+
+def date_of(day):
+    return deadlines.from_timestamp(day * SECONDS_PER_DAY)
+
+
+def daily_stats(connection, profile_id, first_day, last_day):
+    """Счётчики по дням [first_day, last_day]: список (day, due, completed, failed).
+
+    Дни без задач заполняются нулями. Запрос читает диапазон первичного
+    ключа task_stats_daily — не больше одной строки на день.
+    """
+    rows = connection.execute('''
+        SELECT day, due, completed, failed FROM task_stats_daily
+        WHERE profile_id = ? AND day BETWEEN ? AND ?
+    ''', (profile_id, first_day, last_day)).fetchall()
+    by_day = {row[0]: row for row in rows}
+    return [by_day.get(day, (day, 0, 0, 0)) for day in range(first_day, last_day + 1)]
+
+
+def chart_days(now=None):
+    """Дни графика задач вокруг сегодняшнего: (первый, последний)"""
+    today = day_of(now or datetime.now())
+    return today - CHART_DAYS_BEFORE, today + CHART_DAYS_AFTER
+
+
+def totals(connection, profile_id):
+    """Сумма счётчиков профиля за всё время: (due, completed, failed)"""
+    return connection.execute('''
+        SELECT coalesce(sum(due), 0), coalesce(sum(completed), 0), coalesce(sum(failed), 0)
+        FROM task_stats_daily WHERE profile_id = ?
+    ''', (profile_id,)).fetchone()
@@ -0,0 +1,480 @@
+"""Локальный HTTP/JSON API к базе задач поверх services.py, без графического интерфейса.
+
+    python api_server.py --port 8765
+    curl http://127.0.0.1:8765/profiles
+    curl -d '{"name": "Купить хлеб", "deadline": "18:00, 20/10/2026"}' http://127.0.0.1:8765/profiles/1/tasks
+
+Запросы:
+    GET    /profiles                          профили
+    POST   /profiles                          {"name"} — новый профиль
+    DELETE /profiles/<id>                     удаление профиля с задачами
+    GET    /profiles/<id>/tasks               ?status=open|completed|failed|all&after=<id>&limit=<n>
+    GET    /profiles/<id>/tasks/<task_id>     одна задача
+    GET    /profiles/<id>/search              ?q=<текст>&limit=<n> — открытые задачи по запросу
+    POST   /profiles/<id>/tasks               {"name", "deadline", "description", "project_id", "folder_id"}
+    POST   /profiles/<id>/batch               {"operations": [{"op": "get|add|update|complete|delete", ...}]}
+
+Операции update, complete и delete меняют открытые задачи с названием
+"name" или, если указан "id", только эту задачу профиля (тогда "name" не
+нужно). update меняет только переданные поля "deadline", "description" и
+"picture", остальные остаются прежними.
+
+Соединения HTTP остаются открытыми между запросами (keep-alive), а у
+каждого потока сервера одно долгоживущее соединение с базой (Storage).
+Записи всех клиентов, пришедшие одновременно, фиксируются одной
+транзакцией (Storage.write_batch), операции /batch — тоже одной, каждая в
+своей точке сохранения. Сервер слушает только 127.0.0.1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+import migrations
+import services
+import shards
+import task_history
+from storage import Storage, TODO_DB, WRITE_BATCH_SIZE
+
+
+HOST = "127.0.0.1"
+PORT = 8765
+READ_THREADS = 4
+# Сколько секунд ждать следующего запроса в открытом соединении
+KEEP_ALIVE_TIMEOUT = 30
+MAX_BODY_SIZE = 1024 * 1024
+MAX_BATCH_OPERATIONS = 1000
+
+_STATUSES = {
+    "open": task_history.STATUS_OPEN,
+    "completed": task_history.STATUS_COMPLETED,
+    "failed": task_history.STATUS_FAILED,
+    "all": None,
+}
+
+
+class ApiError(Exception):
+    """Ответ с кодом ошибки HTTP и текстом для клиента"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _task_json(row):
+    return dict(zip(services.TASK_FIELDS, row))
+
+
+def _search_json(row):
+    task_id, name, deadline, description, snippet = row
+    return {"id": task_id, "name": name, "deadline": deadline, "description": description, "snippet": snippet}
+
+
+def _int(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name}: ожидается целое число") from None
+
+
+def _optional_int(value, name):
+    return None if value is None else _int(value, name)
+
+
+def _picture(value):
+    """Ключ картинки: имя файла в pictures.PICTURES_DIR без пути"""
+    if value is None:
+        return None
+    if not isinstance(value, str) or not value or ".." in value or "/" in value or os.sep in value or (
+        os.altsep and os.altsep in value
+    ):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "picture: ожидается имя файла картинки")
+    return value
+
+
+class TaskApi:
+    """Обработчики запросов: чтения в пуле потоков, записи — в одном потоке пачками"""
+
+    def __init__(self, database=TODO_DB):
+        self.database = database
+        self.storage = Storage()
+        self._read_pool = ThreadPoolExecutor(READ_THREADS, thread_name_prefix="api-read")
+        self._write_pool = ThreadPoolExecutor(1, thread_name_prefix="api-write")
+        # Записи, ждущие следующей пачки: (database, function, future)
+        self._pending_writes = []
+        self._writer = None
+        self._migrated = {database}
+        migrations.migrate(self.storage.connection(database))
+        self._routes = [
+            ("GET", re.compile(r"/profiles"), self.get_profiles),
+            ("POST", re.compile(r"/profiles"), self.post_profile),
+            ("DELETE", re.compile(r"/profiles/(\d+)"), self.delete_profile),
+            ("GET", re.compile(r"/profiles/(\d+)/tasks"), self.get_tasks),
+            ("GET", re.compile(r"/profiles/(\d+)/tasks/(\d+)"), self.get_task),
+            ("GET", re.compile(r"/profiles/(\d+)/search"), self.search),
+            ("POST", re.compile(r"/profiles/(\d+)/tasks"), self.post_task),
+            ("POST", re.compile(r"/profiles/(\d+)/batch"), self.post_batch),
+        ]
+
+    def close(self):
+        self._read_pool.shutdown()
+        self._write_pool.shutdown()
+        self.storage.close_all()
+
+    ################################
+    ####### Доступ к базе ##########
+    ################################
+
+    async def read(self, database, function):
+        """function(connection) в потоке чтения"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._read_pool, lambda: function(self.storage.connection(database))
+        )
+
+    async def write(self, database, function):
+        """function(connection) в следующей пачке записей; результат — после фиксации"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending_writes.append((database, function, future))
+        if self._writer is None:
+            self._writer = asyncio.create_task(self._write_batches())
+        return await future
+
+    async def maintain(self, database, function):
+        """function(connection) в потоке записи вне пачки и вне транзакции, например миграция"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._write_pool, lambda: function(self.storage.connection(database))
+        )
+
+    async def _write_batches(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._pending_writes:
+                # Подряд идущие записи в одну базу, не больше WRITE_BATCH_SIZE
+                database = self._pending_writes[0][0]
+                count = 0
+                while (count < len(self._pending_writes) and count < WRITE_BATCH_SIZE
+                       and self._pending_writes[count][0] == database):
+                    count += 1
+                batch, self._pending_writes = self._pending_writes[:count], self._pending_writes[count:]
+
+                try:
+                    outcomes = await loop.run_in_executor(
+                        self._write_pool,
+                        lambda: self.storage.write_batch(database, [function for _, function, _ in batch])
+                    )
+                except sqlite3.Error as error:
+                    outcomes = [(None, error)] * len(batch)
+                for (_, _, future), (result, error) in zip(batch, outcomes):
+                    if future.done():
+                        continue
+                    if error is None:
+                        future.set_result(result)
+                    else:
+                        future.set_exception(error)
+        finally:
+            self._writer = None
+
+    async def tasks_database(self, profile_id):
+        """Файл задач профиля; файл профиля обновляется до текущей схемы при первом обращении"""
+        shard = await self.read(self.database, lambda connection: services.profile_database(connection, profile_id))
+        if shard is None:
+            return self.database
+        if shard not in self._migrated:
+            # Миграция пишет в файл: она идёт в потоке записи, между пачками, а не в пуле чтения
+            await self.maintain(shard, lambda connection: migrations.migrate(connection, None, None))
+            self._migrated.add(shard)
+        return shard
+
+    ################################
+    ########## Профили #############
+    ################################
+
+    async def get_profiles(self, query, body):
+        profiles = await self.read(self.database, services.list_profiles)
+        return HTTPStatus.OK, {
+            "profiles": [{"id": id_, "name": name, "sharded": bool(sharded)} for id_, name, sharded in profiles]
+        }
+
+    async def post_profile(self, query, body):
+        name = str(body.get("name", ""))
+        profile_id = await self.write(self.database, lambda connection: services.create_profile(connection, name))
+        if shards.SHARD_NEW_PROFILES:
+            # Файл профиля — только после фиксации строки profiles
+            await self.maintain(self.database, lambda connection: shards.move_profile(connection, profile_id))
+        return HTTPStatus.CREATED, {"id": profile_id, "name": name.strip()}
+
+    async def delete_profile(self, query, body, profile_id):
+        profile_id = int(profile_id)
+        shard = await self.write(self.database, lambda connection: services.delete_profile(connection, profile_id))
+        if shard is not None:
+            shards.remove_shard(shard, self.storage)
+            self._migrated.discard(shard)
+        return HTTPStatus.OK, {"deleted": profile_id}
+
+    ################################
+    ########### Задачи #############
+    ################################
+
+    async def get_tasks(self, query, body, profile_id):
+        profile_id = int(profile_id)
+        status_name = query.get("status", "open")
+        if status_name not in _STATUSES:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"status: одно из {', '.join(_STATUSES)}")
+        after_id = _int(query.get("after", 0), "after")
+        limit = _int(query["limit"], "limit") if "limit" in query else None
+
+        database = await self.tasks_database(profile_id)
+        rows = await self.read(
+            database,
+            lambda connection: services.list_tasks(connection, profile_id, _STATUSES[status_name], after_id, limit)
+        )
+        return HTTPStatus.OK, {"tasks": [_task_json(row) for row in rows]}
+
+    async def get_task(self, query, body, profile_id, task_id):
+        profile_id, task_id = int(profile_id), int(task_id)
+        database = await self.tasks_database(profile_id)
+        rows = await self.read(database, lambda connection: services.select_tasks(connection, [task_id], profile_id))
+        if not rows:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Задача {task_id} не найдена.")
+        return HTTPStatus.OK, _task_json(rows[0])
+
+    async def search(self, query, body, profile_id):
+        profile_id = int(profile_id)
+        text = query.get("q", "")
+        limit = _int(query["limit"], "limit") if "limit" in query else None
+        database = await self.tasks_database(profile_id)
+        rows = await self.read(database, lambda connection: services.search_tasks(connection, profile_id, text, limit))
+        return HTTPStatus.OK, {"tasks": [_search_json(row) for row in rows]}
+
+    async def post_task(self, query, body, profile_id):
+        profile_id = int(profile_id)
+        database = await self.tasks_database(profile_id)
+        row = await self.write(database, self._operation(profile_id, dict(body, op="add")))
+        return HTTPStatus.CREATED, _task_json(row)
+
+    async def post_batch(self, query, body, profile_id):
+        """Несколько операций одной транзакцией; ошибка операции откатывает только её"""
+        profile_id = int(profile_id)
+        operations = body.get("operations")
+        if not isinstance(operations, list) or len(operations) > MAX_BATCH_OPERATIONS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"operations: список не длиннее {MAX_BATCH_OPERATIONS}")
+        functions = [self._operation(profile_id, operation) for operation in operations]
+
+        database = await self.tasks_database(profile_id)
+        outcomes = await self.write(database, lambda connection: [_run_savepoint(connection, f) for f in functions])
+        return HTTPStatus.OK, {"results": outcomes}
+
+    def _operation(self, profile_id, operation):
+        """Функция над соединением для одной операции; поля проверяются сразу, до записи"""
+        if not isinstance(operation, dict):
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Операция должна быть объектом JSON.")
+        kind = operation.get("op")
+
+        if kind == "get":
+            task_ids = [_int(task_id, "ids") for task_id in operation.get("ids", [])]
+            return lambda connection: [
+                _task_json(row) for row in services.select_tasks(connection, task_ids, profile_id)
+            ]
+
+        name = str(operation.get("name", "")).strip()
+        # С "id" операция меняет эту задачу профиля, без него — открытые задачи с названием name
+        task_id = _optional_int(operation.get("id"), "id")
+        if kind == "add":
+            picture = _picture(operation.get("picture"))
+            deadline = str(operation.get("deadline") or "").strip()
+            description = str(operation.get("description") or "").strip()
+            try:
+                deadline_at = services.validate_task(name, deadline)
+            except ValueError as error:
+                raise ApiError(HTTPStatus.BAD_REQUEST, str(error)) from None
+            project_id = _optional_int(operation.get("project_id"), "project_id")
+            folder_id = _optional_int(operation.get("folder_id"), "folder_id")
+
+            def add(connection):
+                services.check_task_place(connection, profile_id, project_id, folder_id)
+                return services.add_task(
+                    connection, profile_id, name, deadline, deadline_at, description, picture, project_id, folder_id
+                )
+            return add
+
+        if not name and task_id is None:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Название задачи не может быть пустым.")
+        if kind == "update":
+            return self._update(profile_id, name, task_id, operation)
+        if kind == "complete":
+            return lambda connection: [_task_json(row) for row in services.set_task_status(
+                connection, profile_id, name, task_history.STATUS_COMPLETED, task_id
+            )]
+        if kind == "delete":
+            return lambda connection: services.delete_task(connection, profile_id, name, task_id)
+        raise ApiError(HTTPStatus.BAD_REQUEST, "op: одно из get, add, update, complete, delete")
+
+    def _update(self, profile_id, name, task_id, operation):
+        """Частичное изменение: поля, которых нет в операции, остаются как в задаче"""
+        changes = {}
+        if "picture" in operation:
+            changes["picture"] = _picture(operation["picture"])
+        if "description" in operation:
+            changes["description"] = str(operation["description"] or "").strip()
+        if "deadline" in operation:
+            changes["deadline"] = str(operation["deadline"] or "").strip()
+            try:
+                changes["deadline_at"] = services.parse_task_deadline(changes["deadline"])
+            except ValueError as error:
+                raise ApiError(HTTPStatus.BAD_REQUEST, str(error)) from None
+
+        def update(connection):
+            updated = []
+            task_ids = services.task_ids_by_name(connection, profile_id, name, task_id)
+            for current in services.select_tasks(connection, task_ids):
+                values = {**_task_json(current), **changes}
+                updated.extend(_task_json(row) for row in services.update_task(
+                    connection, profile_id, values["name"], values["deadline"] or "", values["deadline_at"],
+                    values["description"] or "", values["picture"], values["id"]
+                ))
+            return updated
+        return update
+
+    ################################
+    ############ HTTP ##############
+    ################################
+
+    async def dispatch(self, method, target, body):
+        """(код ответа, объект JSON) для запроса"""
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path.rstrip("/") or "/"
+
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(path)
+            if match is None:
+                continue
+            allowed = True
+            if route_method == method:
+                break
+        else:
+            if allowed:
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Метод не поддерживается."}
+            return HTTPStatus.NOT_FOUND, {"error": "Нет такого адреса."}
+
+        try:
+            if body:
+                body = json.loads(body)
+                if not isinstance(body, dict):
+                    raise ApiError(HTTPStatus.BAD_REQUEST, "Тело запроса должно быть объектом JSON.")
+            else:
+                body = {}
+            return await handler(query, body, *match.groups())
+        except ApiError as error:
+            return error.status, {"error": str(error)}
+        except json.JSONDecodeError as error:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Неверный JSON: {error}"}
+        except LookupError as error:
+            return HTTPStatus.NOT_FOUND, {"error": str(error)}
+        except ValueError as error:
+            return HTTPStatus.BAD_REQUEST, {"error": str(error)}
+        except sqlite3.IntegrityError as error:
+            return HTTPStatus.CONFLICT, {"error": str(error)}
+        except sqlite3.Error as error:
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(error)}
+        except Exception as error:
+            # Непредвиденная ошибка сервера: трассировка уходит клиенту, сервер слушает только 127.0.0.1
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {
+                "error": str(error), "traceback": "".join(traceback.format_exception(error))
+            }
+
+    async def handle_connection(self, reader, writer):
+        """Запросы одного соединения по очереди, пока клиент его не закроет"""
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_SIZE:
+                    await self._respond(
+                        writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Слишком большой запрос."}, False
+                    )
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                status, payload = await self.dispatch(method, target, body)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        content = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n".encode("latin-1") + content
+        )
+        await writer.drain()
+
+
+def _run_savepoint(connection, function):
+    """Операция /batch в своей точке сохранения: {"ok": true, "result": ...} или {"ok": false, "error": ...}"""
+    connection.execute("SAVEPOINT batch_operation")
+    try:
+        result = function(connection)
+    except (sqlite3.Error, ValueError, LookupError) as error:
+        connection.execute("ROLLBACK TO batch_operation")
+        connection.execute("RELEASE batch_operation")
+        return {"ok": False, "error": str(error)}
+    connection.execute("RELEASE batch_operation")
+    return {"ok": True, "result": _task_json(result) if isinstance(result, tuple) else result}
+
+
+async def serve(database, port, ready=None):
+    api = TaskApi(database)
+    server = await asyncio.start_server(api.handle_connection, HOST, port)
+    if ready is not None:
+        ready(server.sockets[0].getsockname()[1])
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        api.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database", default=TODO_DB)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.database, args.port, lambda port: print(f"http://{HOST}:{port}", flush=True)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
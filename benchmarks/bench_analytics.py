@@ -0,0 +1,69 @@
+"""Чтение данных графика задач из сводной таблицы и полным перебором задач.
+
+Задачи с дедлайнами равномерно распределены по нескольким годам; график
+показывает две недели вокруг сегодняшнего дня.
+
+    python benchmarks/bench_analytics.py --rows 200000 --years 5
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+import deadlines
+import migrations
+
+PROFILE = 1
+
+
+def measure(function, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - started) * 1000 / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--years", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    now = deadlines.to_timestamp(datetime.now())
+    span = args.years * 365 * analytics.SECONDS_PER_DAY
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = sqlite3.connect(os.path.join(directory, "todo.db"))
+        migrations.migrate(connection, legacy_profiles=None, legacy_tasks=None)
+        started = time.perf_counter()
+        with connection:
+            connection.execute("INSERT INTO profiles (id, name) VALUES (?, 'Профиль 1')", (PROFILE,))
+            connection.executemany(
+                "INSERT INTO tasks (profile_id, name, deadline_at) VALUES (?, ?, ?)",
+                ((PROFILE, f"Задача {i}", now - span + rng.randrange(span + span // args.years))
+                 for i in range(args.rows))
+            )
+        print(f"задач: {args.rows}; вставка с обновлением счётчиков: {time.perf_counter() - started:.2f} с")
+
+        first_day, last_day = analytics.chart_days()
+        summary_ms, summary = measure(lambda: analytics.daily_stats(connection, PROFILE, first_day, last_day))
+        scan_ms, scan = measure(lambda: connection.execute(f'''
+            SELECT {analytics._DAY.format("deadline_at")} AS day, count(*) FROM tasks
+            WHERE profile_id = ? AND deadline_at IS NOT NULL GROUP BY day HAVING day BETWEEN ? AND ?
+        ''', (PROFILE, first_day, last_day)).fetchall())
+
+        assert [row[:2] for row in summary if row[1]] == scan
+        print(f"сводная таблица: {summary_ms:.3f} мс; перебор задач: {scan_ms:.1f} мс")
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Микробенчмарк: задержка операций с задачами до и после пула соединений.
+
+"До" — прежняя схема MainWindow: sqlite3.connect / execute / close на каждый
+вызов. "После" — общий Storage с долгоживущими соединениями и кэшем
+подготовленных выражений. Обе стороны настраивают соединение одинаково
+(storage.configure с PRAGMAS, файл в режиме WAL), поэтому разница — только
+от пула. Запуск из корня проекта:
+
+    python benchmarks/bench_connections.py --rows 100000
+"""
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+from storage import Storage
+
+
+def create_tasks_db(path, rows):
+    """Создание таблицы tasks с заданным числом строк"""
+    connection = storage.configure(sqlite3.connect(path))
+    connection.execute('''
+        CREATE TABLE tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_name TEXT NOT NULL,
+            name TEXT NOT NULL,
+            deadline TEXT,
+            description TEXT
+        )
+    ''')
+    connection.executemany(
+        "INSERT INTO tasks (profile_name, name, deadline, description) VALUES (?, ?, ?, ?)",
+        ((f"Профиль {i % 4 + 1}", f"Задача {i}", "12:00, 01/01/2025", f"Описание задачи {i}")
+         for i in range(rows))
+    )
+    connection.commit()
+    connection.close()
+
+
+def per_call_connection(path, query, params, write):
+    """Прежний вариант: новое соединение на каждую операцию, с теми же PRAGMAS, что у Storage"""
+    connection = storage.configure(sqlite3.connect(path))
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, params)
+        if write:
+            connection.commit()
+        else:
+            cursor.fetchall()
+    finally:
+        connection.close()
+
+
+def pooled_connection(pool, path, query, params, write):
+    """Новый вариант: общее соединение из Storage"""
+    if write:
+        pool.write(path, query, params)
+    else:
+        pool.fetch_all(path, query, params)
+
+
+def measure(operation, iterations):
+    """Средняя задержка операции в микросекундах"""
+    started = time.perf_counter()
+    for i in range(iterations):
+        operation(i)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tasks.db")
+        create_tasks_db(path, args.rows)
+        pool = Storage()
+        rng = random.Random(0)
+        # Удаляемые id не повторяются между замерами "до" и "после"
+        deleted_ids = itertools.count(args.rows, -1)
+
+        operations = [
+            ("select by id", "SELECT name, deadline, description FROM tasks WHERE id = ?",
+             lambda i: (rng.randint(1, args.rows),), False),
+            ("count range", "SELECT COUNT(*) FROM tasks WHERE id < ?",
+             lambda i: (100,), False),
+            ("insert", "INSERT INTO tasks (profile_name, name, deadline, description) VALUES (?, ?, ?, ?)",
+             lambda i: ("Профиль 1", f"Новая задача {i}", "", ""), True),
+            ("update by id", "UPDATE tasks SET description = ? WHERE id = ?",
+             lambda i: (f"Правка {i}", rng.randint(1, args.rows)), True),
+            ("delete by id", "DELETE FROM tasks WHERE id = ?",
+             lambda i: (next(deleted_ids),), True),
+        ]
+
+        print(f"tasks: {args.rows} строк, {args.iterations} итераций на операцию")
+        print(f"{'операция':<16}{'до, мкс':>12}{'после, мкс':>14}{'ускорение':>12}")
+        for title, query, make_params, write in operations:
+            before = measure(
+                lambda i: per_call_connection(path, query, make_params(i), write), args.iterations
+            )
+            after = measure(
+                lambda i: pooled_connection(pool, path, query, make_params(i), write), args.iterations
+            )
+            print(f"{title:<16}{before:>12.1f}{after:>14.1f}{before / after:>11.1f}x")
+
+        pool.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Задержка "нажатие клавиши -> результаты" при поиске по мере ввода.
+
+Повторяет путь MainWindow.on_search_text_changed(): поиск в SearchCache
+(точное совпадение или уточнение закэшированного набора в памяти),
+передача id в TaskListModel и чтение первой страницы строк. Кэш заранее
+заполняется результатом пустого запроса, как при открытии главной панели.
+
+    python benchmarks/bench_live_search.py --rows 50000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrations
+import search_index
+from search_cache import SearchCache
+from task_list_model import TaskListModel
+
+PROFILE = 1
+WORDS = [
+    "купить", "молоко", "хлеб", "позвонить", "маме", "отчёт", "проект", "встреча", "подготовить",
+    "презентацию", "оплатить", "счёт", "квартира", "почта", "ёлка", "сдать", "экзамен", "книга",
+]
+
+
+def create_tasks_db(path, rows):
+    """База задач со случайными русскими названиями и описаниями"""
+    rng = random.Random(0)
+    connection = sqlite3.connect(path)
+    migrations.migrate(connection, legacy_profiles=None, legacy_tasks=None)
+    with connection:
+        connection.execute("INSERT INTO profiles (id, name) VALUES (?, 'Профиль 1')", (PROFILE,))
+        connection.executemany(
+            "INSERT INTO tasks (profile_id, name, deadline, description) VALUES (?, ?, ?, ?)",
+            ((PROFILE, " ".join(rng.choices(WORDS, k=3)), "12:00, 01/01/2025", " ".join(rng.choices(WORDS, k=12)))
+             for _ in range(rows))
+        )
+    return connection
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--query", default="подготовить презентацию")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        connection = create_tasks_db(os.path.join(directory, "tasks.db"), args.rows)
+        cache = SearchCache()
+        model = TaskListModel()
+
+        started = time.perf_counter()
+        cache.put(PROFILE, "", *search_index.search_task_documents(connection, PROFILE, ""), cache.generation)
+        print(f"задач: {args.rows}; загрузка пустого запроса: {(time.perf_counter() - started) * 1000:.1f} мс")
+
+        latencies = []
+        for length in range(1, len(args.query) + 1):
+            text = args.query[:length]
+            started = time.perf_counter()
+            cached = cache.lookup(PROFILE, text)
+            model.set_results(cached.task_ids, lambda ids: search_index.fetch_tasks_page(connection, ids, text))
+            model.fetchMore()
+            elapsed = (time.perf_counter() - started) * 1000
+            latencies.append(elapsed)
+            print(f"{text!r:<30}{cached.ranked!s:>7}{len(cached.task_ids):>8}{elapsed:>10.2f} мс")
+
+        print(f"в среднем {sum(latencies) / len(latencies):.2f} мс, максимум {max(latencies):.2f} мс")
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Время переключения экранов MainWindow.
+
+Первый переход на экран строит его (setupUi и подключение сигналов),
+следующие только делают готовую страницу QStackedWidget текущей.
+Запускается без окна на экране:
+
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_screens.py --rounds 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=100)
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as directory:
+        # База создаётся в db/ рабочего каталога
+        os.chdir(directory)
+        import main as app_main
+
+        window = app_main.MainWindow()
+        window.storage.write(window.database, "INSERT INTO profiles (name) VALUES ('Профиль 1')")
+        window.current_profile_id, window.current_profile = 1, "Профиль 1"
+
+        timings = {}
+        window.screens.switched.connect(
+            lambda name, elapsed, built: timings.setdefault((name, built), []).append(elapsed)
+        )
+        for _ in range(args.rounds):
+            window.open_main_panel()
+            window.open_editing_panel()
+            window.open_today_panel()
+            window.open_immediate_panel()
+            window.open_incoming_panel()
+            app.processEvents()
+
+        print(f"{'экран':<18}{'построение, мс':>16}{'переход, мс':>14}{'макс., мс':>12}")
+        for name in ("main_panel", "editing_panel", "today_panel", "immediate_panel", "incoming_panel"):
+            built = timings.get((name, True), [0.0])
+            switches = timings.get((name, False), [0.0])
+            print(f"{name:<18}{built[0]:>16.2f}{sum(switches) / len(switches):>14.3f}{max(switches):>12.3f}")
+
+        window.close()
+        os.chdir(os.path.dirname(directory))
+
+
+if __name__ == "__main__":
+    main()
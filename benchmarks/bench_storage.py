@@ -0,0 +1,108 @@
+"""Пропускная способность записи и задержка чтения при одновременной нагрузке.
+
+Один поток правит задачи, как edit_task, остальные в это время читают
+задачи панели дедлайнов. Сравниваются прежние настройки (журнал отката,
+synchronous=FULL, транзакция на каждую запись) и текущие настройки
+Storage (WAL, synchronous=NORMAL, mmap, пачки записей, как у QueryRunner).
+
+    python benchmarks/bench_storage.py --rows 100000 --writes 2000 --readers 2
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import deadlines
+import migrations
+from storage import Storage, PRAGMAS, WRITE_BATCH_SIZE
+
+PROFILE = 1
+# Прежнее поведение: журнал отката и fsync при каждой фиксации
+LEGACY_PRAGMAS = {"journal_mode": "DELETE", "synchronous": "FULL"}
+
+
+def create_database(path, rows):
+    connection = sqlite3.connect(path)
+    migrations.migrate(connection, legacy_profiles=None, legacy_tasks=None)
+    now = deadlines.to_timestamp(datetime.now())
+    with connection:
+        connection.execute("INSERT INTO profiles (id, name) VALUES (?, 'Профиль 1')", (PROFILE,))
+        connection.executemany(
+            "INSERT INTO tasks (profile_id, name, deadline_at, description) VALUES (?, ?, ?, ?)",
+            ((PROFILE, f"Задача {i}", now + i % 30 * 86400, f"Описание {i}") for i in range(rows))
+        )
+    connection.close()
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))] if ordered else 0.0
+
+
+def run(path, pragmas, batch_size, rows, writes, readers):
+    storage = Storage(pragmas=pragmas)
+    rng = random.Random(0)
+    latencies = []
+    done = threading.Event()
+    start, end = deadlines.week_range()
+
+    def read_loop():
+        connection = storage.connection(path)
+        local = []
+        while not done.is_set():
+            started = time.perf_counter()
+            deadlines.tasks_due_between(connection, PROFILE, start, end)
+            local.append((time.perf_counter() - started) * 1000)
+        latencies.extend(local)
+
+    threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+
+    connection = storage.connection(path)
+    started = time.perf_counter()
+    for first in range(0, writes, batch_size):
+        connection.execute("BEGIN IMMEDIATE")
+        for _ in range(min(batch_size, writes - first)):
+            connection.execute(
+                "UPDATE tasks SET description = ? WHERE profile_id = ? AND name = ?",
+                (f"Правка {rng.random()}", PROFILE, f"Задача {rng.randrange(rows)}")
+            )
+        connection.commit()
+    elapsed = time.perf_counter() - started
+
+    done.set()
+    for thread in threads:
+        thread.join()
+    storage.close_all()
+    return writes / elapsed, len(latencies), percentile(latencies, 0.5), percentile(latencies, 0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--readers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for title, pragmas, batch_size in (
+            ("журнал отката, FULL, по одной записи", LEGACY_PRAGMAS, 1),
+            ("WAL, NORMAL, по одной записи", PRAGMAS, 1),
+            (f"WAL, NORMAL, пачки по {WRITE_BATCH_SIZE}", PRAGMAS, WRITE_BATCH_SIZE),
+        ):
+            path = os.path.join(directory, f"todo_{batch_size}_{pragmas['journal_mode']}.db")
+            create_database(path, args.rows)
+            throughput, reads, p50, p99 = run(path, pragmas, batch_size, args.rows, args.writes, args.readers)
+            print(f"{title}: {throughput:.0f} записей/с; чтений: {reads}, p50 {p50:.2f} мс, p99 {p99:.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
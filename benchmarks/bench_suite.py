@@ -0,0 +1,301 @@
+"""Набор бенчмарков горячих путей MainWindow с результатами в JSON.
+
+Для каждого размера создаётся синтетическая база (synthetic.py), и на ней
+замеряются вход в профиль, поиск, добавление, изменение и удаление задачи
+так, как их выполняют потоки QueryRunner (services.py и Storage, каждая
+запись — своя транзакция), а затем в самом MainWindow на платформе Qt
+offscreen — вход в профиль до показа списка, заполнение списка задач и
+переключение экранов. Результаты прогонов разных версий сравниваются
+ключом --compare: код возврата 1, если медиана какого-либо замера выросла
+больше чем на --threshold.
+
+    python benchmarks/bench_suite.py --tasks 10000 100000 --output bench.json
+    python benchmarks/bench_suite.py --tasks 10000 100000 --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# До импорта Qt: окна не показываются на экране
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PyQt6.QtCore import PYQT_VERSION_STR
+
+import deadlines
+import migrations
+import search_index
+import services
+import synthetic
+from storage import Storage, DB_DIR
+from task_list_model import PAGE_SIZE
+
+# Запросы поиска: префиксы и целые слова из словаря synthetic.py
+QUERIES = ["о", "отч", "отчёт", "купить молоко", "презентацию", "паспорт", "ёлочные", "счёт за кварт", "бюджет"]
+# Экраны в порядке переключения, как их открывают кнопки MainWindow
+SCREENS = ("main_panel", "editing_panel", "today_panel", "immediate_panel", "incoming_panel", "projects")
+# Рост медианы меньше этого считается шумом даже при большом отношении, мс
+NOISE_MS = 0.1
+# Сколько ждать фоновый запрос MainWindow, с
+WAIT_TIMEOUT = 120
+
+
+def summarize(samples):
+    """Статистика замеров в миллисекундах"""
+    ordered = sorted(samples)
+
+    def percentile(share):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "p50_ms": round(percentile(0.5), 3),
+        "p95_ms": round(percentile(0.95), 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def timed(function):
+    started = time.perf_counter()
+    function()
+    return (time.perf_counter() - started) * 1000
+
+
+def environment():
+    """Версии, от которых зависят результаты"""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "revision": revision,
+        "schema_version": migrations.SCHEMA_VERSION,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "pyqt": PYQT_VERSION_STR,
+        "platform": platform.platform(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def write(storage, path, function):
+    """Одна запись, как её выполняет поток записи QueryRunner"""
+    [(result, error)] = storage.write_batch(path, [function])
+    if error is not None:
+        raise error
+    return result
+
+
+def bench_storage(path, profile_ids, rounds, rng):
+    """Пути потоков QueryRunner: services.py над соединением Storage"""
+    storage = Storage()
+    connection = storage.connection(path)
+    results = {}
+
+    samples = []
+    for number in range(rounds):
+        profile_id = profile_ids[number % len(profile_ids)]
+        samples.append(timed(lambda: (
+            services.list_tasks(connection, profile_id),
+            search_index.search_task_documents(connection, profile_id, ""),
+        )))
+    results["select_profile"] = summarize(samples)
+
+    samples = []
+    for number in range(rounds):
+        profile_id, text = profile_ids[number % len(profile_ids)], QUERIES[number % len(QUERIES)]
+
+        def search():
+            task_ids, _ = search_index.search_task_documents(connection, profile_id, text)
+            search_index.fetch_tasks_page(connection, task_ids[:PAGE_SIZE], text)
+
+        samples.append(timed(search))
+    results["search_tasks"] = summarize(samples)
+
+    profile_id = profile_ids[0]
+    deadline_at = deadlines.now_timestamp() + 7 * synthetic.DAY
+    deadline_at -= deadline_at % 60
+    deadline = deadlines.format_deadline(deadline_at)
+    added = []
+    samples = []
+    for number in range(rounds):
+        name, description = synthetic.task_text(rng, f"добавлено-{number}")
+        added.append(name)
+        samples.append(timed(lambda: write(storage, path, lambda connection: services.add_task(
+            connection, profile_id, name, deadline, deadline_at, description
+        ))))
+    results["add_task"] = summarize(samples)
+
+    open_names = [row[1] for row in services.list_tasks(connection, profile_id, status=0)]
+    samples = []
+    for number in range(rounds):
+        name = rng.choice(open_names)
+        description = f"Правка {number}. " + rng.choice(synthetic.PHRASES)
+        samples.append(timed(lambda: write(storage, path, lambda connection: services.update_task(
+            connection, profile_id, name, deadline, deadline_at, description, None
+        ))))
+    results["edit_task"] = summarize(samples)
+
+    # Удаляются только задачи, добавленные выше: база остаётся прежней для замеров в окне
+    samples = [
+        timed(lambda: write(storage, path, lambda connection: services.delete_task(connection, profile_id, name)))
+        for name in added
+    ]
+    results["delete_task"] = summarize(samples)
+
+    storage.close_all()
+    return results
+
+
+def wait_until(app, condition):
+    started = time.perf_counter()
+    while not condition():
+        if time.perf_counter() - started > WAIT_TIMEOUT:
+            raise TimeoutError("MainWindow не дождался фонового запроса")
+        app.processEvents()
+
+
+def bench_window(app, profile_ids, rounds):
+    """Пути MainWindow в окне offscreen; база — db/todo.db рабочего каталога"""
+    import main as app_main
+
+    window = app_main.MainWindow()
+    window.show()
+    wait_until(app, lambda: len(window.profile_names) >= len(profile_ids))
+    results = {}
+
+    timings = {}
+    window.screens.switched.connect(
+        lambda name, elapsed, built: timings.setdefault((name, built), []).append(elapsed)
+    )
+
+    # Главная панель строится заранее: вход в профиль замеряется без построения экрана
+    results["window.screen_build.main_panel"] = summarize([timed(lambda: window.screens.ui("main_panel"))])
+    resets = []
+    window.task_list_model.modelReset.connect(lambda: resets.append(None))
+
+    def select_profile(profile_id):
+        before = len(resets)
+        window.set_current_profile(profile_id)
+        window.open_main_panel()
+        wait_until(app, lambda: window.tasks.is_loaded and len(resets) > before)
+
+    samples = [timed(lambda: select_profile(profile_ids[number % len(profile_ids)])) for number in range(rounds)]
+    results["window.select_profile"] = summarize(samples)
+
+    listing = window.main_panel_ui.listWidget
+    connection = window.storage.connection(window.tasks_database)
+    task_ids = search_index.search_task_ids(connection, window.current_profile_id, "")
+
+    def populate():
+        window.show_search_results(task_ids, "", notify_empty=False)
+        # Представление запрашивает первую страницу строк и рисует видимые
+        app.processEvents()
+        listing.viewport().repaint()
+
+    results["window.list_population"] = summarize([timed(populate) for _ in range(rounds)])
+
+    for _ in range(rounds):
+        for name in SCREENS:
+            window.screens.show_screen(name)
+            app.processEvents()
+    for (name, built), samples in sorted(timings.items()):
+        results[f"window.screen_{'build' if built else 'switch'}.{name}"] = summarize(samples)
+
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+    return results
+
+
+def compare(baseline, current, threshold):
+    """Сравнение медиан с прошлым прогоном; возвращает число замедлений"""
+    regressions = 0
+    print(f"{'замер':<44}{'было, мс':>11}{'стало, мс':>11}{'':>8}", file=sys.stderr)
+    for size, run in current["runs"].items():
+        previous = baseline.get("runs", {}).get(size, {}).get("metrics", {})
+        for metric, summary in run["metrics"].items():
+            if metric not in previous:
+                continue
+            before, after = previous[metric]["p50_ms"], summary["p50_ms"]
+            ratio = after / before if before else 1.0
+            slower = ratio > 1 + threshold and after - before > NOISE_MS
+            regressions += slower
+            print(
+                f"{size + ' ' + metric:<44}{before:>11.3f}{after:>11.3f}{ratio:>7.2f}x{' медленнее' if slower else ''}",
+                file=sys.stderr
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10_000], help="размеры баз, например 10000 1000000")
+    parser.add_argument("--profiles", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=30, help="повторов каждого замера")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-window", action="store_true", help="без замеров в MainWindow")
+    parser.add_argument("--output", help="файл JSON; по умолчанию результаты выводятся в stdout")
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимый рост медианы, доля")
+    args = parser.parse_args()
+
+    app = None
+    if not args.no_window:
+        from PyQt6.QtWidgets import QApplication
+        app = QApplication(sys.argv)
+
+    report = {
+        "environment": environment(),
+        "parameters": {"profiles": args.profiles, "rounds": args.rounds, "seed": args.seed},
+        "runs": {},
+    }
+    initial_directory = os.getcwd()
+    for tasks in args.tasks:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, DB_DIR, "todo.db")
+            os.makedirs(os.path.dirname(path))
+            started = time.perf_counter()
+            profile_ids = synthetic.generate(path, tasks, args.profiles, args.seed)
+            generate_seconds = round(time.perf_counter() - started, 2)
+            print(f"задач: {tasks}; база создана за {generate_seconds} с", file=sys.stderr)
+
+            results = bench_storage(path, profile_ids, args.rounds, random.Random(args.seed))
+            if app is not None:
+                # MainWindow открывает db/todo.db относительно рабочего каталога
+                os.chdir(directory)
+                try:
+                    results.update(bench_window(app, profile_ids, args.rounds))
+                finally:
+                    os.chdir(initial_directory)
+            report["runs"][str(tasks)] = {"generate_seconds": generate_seconds, "metrics": results}
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Синтетическая база задач для бенчмарков: профили, проекты и задачи с русским текстом.
+
+Данные зависят только от параметров и seed (дедлайны — ещё от текущего
+момента), поэтому прогоны разных версий приложения сравнимы. Открытые
+задачи получают дедлайны в будущем или не получают их вовсе: иначе
+служба дедлайнов при входе в профиль сначала провалила бы просроченные.
+
+    python benchmarks/synthetic.py /tmp/todo.db --tasks 100000 --profiles 4
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import deadlines
+import migrations
+import tags
+import task_history
+
+PROFILE_NAMES = ["Работа", "Дом", "Учёба", "Спорт", "Дача", "Семья", "Финансы", "Хобби"]
+VERBS = [
+    "Подготовить", "Купить", "Позвонить", "Написать", "Проверить", "Оплатить", "Отправить", "Починить",
+    "Забронировать", "Согласовать", "Обновить", "Разобрать", "Записаться", "Встретиться", "Прочитать",
+]
+OBJECTS = [
+    "отчёт для отдела продаж", "молоко и хлеб", "маме", "письмо заказчику", "домашнее задание",
+    "счёт за квартиру", "презентацию к совещанию", "кран на кухне", "билеты в Санкт-Петербург",
+    "договор с поставщиком", "резюме", "документы в шкафу", "к стоматологу", "с Еленой Петровной",
+    "главу учебника по физике", "налоговую декларацию", "подарок на день рождения", "отзыв о книге",
+]
+PHRASES = [
+    "не забыть взять паспорт", "уточнить сроки у Ивана", "обсудить бюджет на следующий квартал",
+    "список покупок лежит на холодильнике", "после обеда, если будет время", "согласно плану на неделю",
+    "ёлочные игрушки на антресоли", "сначала сверить цифры с бухгалтерией", "заехать по дороге домой",
+    "нужны ещё две подписи", "проверить почту и ответить на вопросы", "взять зонт — обещают дождь",
+]
+TAGS = ["#работа", "#дом", "#срочно", "#покупки", "#учёба", "#здоровье", "#семья", "#финансы", "#идеи"]
+PROJECTS = ["Ремонт", "Отпуск", "Диплом", "Квартальный отчёт", "Переезд", "Сад"]
+FOLDERS = ["Важное", "Потом", "Ждёт ответа"]
+
+# Доли задач по состояниям: открытые, выполненные, проваленные
+STATUS_WEIGHTS = (0.7, 0.2, 0.1)
+DAY = 86400
+
+
+def task_text(rng, number):
+    """Название и описание задачи; номер делает название уникальным, как у задач, созданных вручную"""
+    name = f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} №{number}"
+    sentences = [rng.choice(PHRASES) for _ in range(rng.randint(1, 4))]
+    description = ". ".join(sentence.capitalize() for sentence in sentences) + "."
+    if rng.random() < 0.4:
+        description += " " + " ".join(rng.sample(TAGS, rng.randint(1, 2)))
+    return name, description
+
+
+def generate(path, tasks, profiles=4, seed=0):
+    """База path с profiles профилями и tasks задачами; возвращает id профилей"""
+    rng = random.Random(seed)
+    now = deadlines.now_timestamp()
+    connection = sqlite3.connect(path)
+    migrations.migrate(connection, legacy_profiles=None, legacy_tasks=None)
+
+    with connection:
+        profile_ids = [
+            connection.execute(
+                "INSERT INTO profiles (name) VALUES (?)", (f"{PROFILE_NAMES[number % len(PROFILE_NAMES)]} {number + 1}",)
+            ).lastrowid
+            for number in range(profiles)
+        ]
+        folders = {}
+        for profile_id in profile_ids:
+            for project in PROJECTS:
+                project_id = connection.execute(
+                    "INSERT INTO projects (profile_id, name) VALUES (?, ?)", (profile_id, project)
+                ).lastrowid
+                folders[profile_id, project_id] = [
+                    connection.execute(
+                        "INSERT INTO folders (project_id, name) VALUES (?, ?)", (project_id, folder)
+                    ).lastrowid
+                    for folder in FOLDERS
+                ]
+
+        rows = []
+        for number in range(1, tasks + 1):
+            profile_id = rng.choice(profile_ids)
+            name, description = task_text(rng, number)
+            status = rng.choices(
+                (task_history.STATUS_OPEN, task_history.STATUS_COMPLETED, task_history.STATUS_FAILED), STATUS_WEIGHTS
+            )[0]
+            if status == task_history.STATUS_OPEN:
+                deadline_at = now + rng.randrange(DAY, 60 * DAY) if rng.random() < 0.8 else None
+            else:
+                deadline_at = now - rng.randrange(DAY, 365 * DAY)
+            # Дедлайн с точностью до минуты, как после parse_deadline()
+            if deadline_at is not None:
+                deadline_at -= deadline_at % 60
+            project_id = folder_id = None
+            if rng.random() < 0.3:
+                (_, project_id), project_folders = rng.choice(
+                    [(key, value) for key, value in folders.items() if key[0] == profile_id]
+                )
+                folder_id = rng.choice(project_folders + [None])
+            rows.append((
+                profile_id, name, deadlines.format_deadline(deadline_at), deadline_at, description,
+                status, project_id, folder_id
+            ))
+
+        first_id = connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tasks").fetchone()[0]
+        connection.executemany(
+            "INSERT INTO tasks (profile_id, name, deadline, deadline_at, description, status, project_id, folder_id) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+        # Тэги одним проходом вместо sync_task_tags() на каждую задачу
+        task_tags = []
+        for task_id, (profile_id, name, _, _, description, _, _, _) in enumerate(rows, start=first_id):
+            for tag in tags.extract_tags(name, description):
+                task_tags.append((profile_id, tag, task_id))
+        connection.executemany(
+            "INSERT OR IGNORE INTO tags (profile_id, name) VALUES (?, ?)",
+            sorted({(profile_id, tag) for profile_id, tag, _ in task_tags})
+        )
+        tag_ids = {(profile_id, name): tag_id for tag_id, profile_id, name in connection.execute(
+            "SELECT id, profile_id, name FROM tags"
+        )}
+        connection.executemany(
+            "INSERT INTO task_tags (tag_id, task_id) VALUES (?, ?)",
+            [(tag_ids[profile_id, tag], task_id) for profile_id, tag, task_id in task_tags]
+        )
+
+    connection.execute("PRAGMA optimize")
+    connection.close()
+    return profile_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--profiles", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        parser.error(f"файл {args.path} уже существует")
+    started = time.perf_counter()
+    generate(args.path, args.tasks, args.profiles, args.seed)
+    print(f"задач: {args.tasks}, профилей: {args.profiles}; {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main()
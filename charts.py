@@ -0,0 +1,58 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QBrush, QColor, QFont, QPen
+from PyQt6.QtWidgets import QGraphicsScene
+
+
+MARGIN = 6
+LABEL_HEIGHT = 14
+LEGEND_HEIGHT = 14
+LABEL_FONT_SIZE = 6
+
+
+def draw_bar_chart(view, labels, series):
+    """Столбчатая диаграмма с накоплением в QGraphicsView.
+
+    labels — подписи столбцов, series — список (название, цвет, значения)
+    одинаковой длины; значения разных серий складываются в один столбец.
+    Сцена создаётся заново под размер области просмотра.
+    """
+    size = view.viewport().size()
+    width, height = max(size.width(), 100), max(size.height(), 80)
+    scene = QGraphicsScene(0, 0, width, height, view)
+    font = QFont()
+    font.setPointSize(LABEL_FONT_SIZE)
+
+    # Легенда сверху
+    x = MARGIN
+    for title, color, _ in series:
+        scene.addRect(x, MARGIN, 8, 8, QPen(Qt.PenStyle.NoPen), QBrush(QColor(color)))
+        text = scene.addSimpleText(title, font)
+        text.setPos(x + 11, MARGIN - 2)
+        x += 11 + text.boundingRect().width() + MARGIN
+
+    top = MARGIN + LEGEND_HEIGHT + LABEL_HEIGHT
+    bottom = height - MARGIN - LABEL_HEIGHT
+    columns = max(len(labels), 1)
+    step = (width - 2 * MARGIN) / columns
+    totals = [sum(values[i] for _, _, values in series) for i in range(len(labels))]
+    scale = (bottom - top) / max(max(totals, default=0), 1)
+
+    scene.addLine(MARGIN, bottom, width - MARGIN, bottom, QPen(QColor("gray")))
+    for i, label in enumerate(labels):
+        left = MARGIN + i * step + 1
+        y = bottom
+        for _, color, values in series:
+            bar = values[i] * scale
+            if bar:
+                scene.addRect(left, y - bar, step - 2, bar, QPen(Qt.PenStyle.NoPen), QBrush(QColor(color)))
+                y -= bar
+        if totals[i]:
+            value = scene.addSimpleText(str(totals[i]), font)
+            value.setPos(left + (step - 2 - value.boundingRect().width()) / 2, y - LABEL_HEIGHT + 2)
+
+        text = scene.addSimpleText(label, font)
+        text.setPos(left + (step - 2 - text.boundingRect().width()) / 2, bottom + 1)
+
+    view.setScene(scene)
+    view.setSceneRect(scene.sceneRect())
+    return scene
@@ -0,0 +1,157 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+
+import deadlines
+import services
+from scheduler import COALESCE_SECONDS
+
+
+# Сколько ближайших дедлайнов читается за раз
+WINDOW_SIZE = 50
+# За сколько минут до дедлайна приходит напоминание
+REMINDER_LEAD_MINUTES = 15
+
+
+class DeadlineReminders(QObject):
+    """Напоминания о дедлайнах и провал просроченных задач текущего профиля.
+
+    Служба не перебирает задачи: она читает из индекса tasks_open_deadline
+    только окно из WINDOW_SIZE ближайших дедлайнов и ставит в общий
+    планировщик вызовы на время напоминаний и на ближайший дедлайн. В
+    этот момент просроченные задачи окна одной записью отмечаются
+    проваленными, и окно читается заново. Между событиями служба спит, а
+    каждое событие стоит одного чтения из индекса, так что работа растёт
+    с числом дедлайнов, а не задач. Изменения задач приходят сигналами
+    TaskRepository; окно перечитывается, только если они его касаются.
+    """
+
+    # Скоро дедлайн: список (id задачи, название, дедлайн)
+    deadlines_near = pyqtSignal(list)
+    # Просроченные задачи отмечены проваленными: список их названий
+    tasks_failed = pyqtSignal(list)
+
+    def __init__(self, queries, scheduler, repository, parent=None):
+        super().__init__(parent)
+        self.queries = queries
+        self.scheduler = scheduler
+        self.repository = repository
+        self.database = None
+        self.profile_id = None
+        # Окно: id задачи -> дедлайн и самый поздний дедлайн в нём (None, если окно не заполнено)
+        self._window = {}
+        self._window_end = None
+        # Задачи, о которых уже напомнили
+        self._reminded = set()
+        # Названия проваленных задач, пока просроченные отмечаются окно за окном
+        self._failed_names = []
+        self._calls = []
+        self._refresh_call = None
+
+        repository.task_added.connect(self._on_task_changed)
+        repository.task_changed.connect(self._on_task_changed)
+        repository.task_removed.connect(self._on_task_removed)
+
+    def load(self, database, profile_id):
+        """Дедлайны профиля; None — служба останавливается"""
+        self.database, self.profile_id = database, profile_id
+        self._reminded = set()
+        self._failed_names = []
+        self._cancel_calls()
+        self._window, self._window_end = {}, None
+        self.queries.cancel("deadline_reminders")
+        if profile_id is not None:
+            self._request_refresh()
+
+    def _cancel_calls(self):
+        for call in self._calls:
+            self.scheduler.cancel(call)
+        self._calls = []
+        self.scheduler.cancel(self._refresh_call)
+        self._refresh_call = None
+
+    def _request_refresh(self):
+        """Перечитать окно; несколько изменений подряд дают одно чтение"""
+        if self._refresh_call is None or not self._refresh_call.active:
+            self._refresh_call = self.scheduler.call_later(0, self._refresh)
+
+    def _refresh(self):
+        self._refresh_call = None
+        profile_id = self.profile_id
+        if profile_id is None:
+            return
+        self.queries.read(
+            self.database,
+            lambda connection: deadlines.next_deadlines(connection, profile_id, WINDOW_SIZE),
+            self._on_window,
+            channel="deadline_reminders"
+        )
+
+    def _on_window(self, rows):
+        now = deadlines.now_timestamp()
+        for call in self._calls:
+            self.scheduler.cancel(call)
+        self._calls = []
+        self._window = {task_id: deadline_at for task_id, _, deadline_at in rows}
+        self._window_end = rows[-1][2] if len(rows) == WINDOW_SIZE else None
+
+        overdue = [task_id for task_id, _, deadline_at in rows if deadline_at <= now]
+        if overdue:
+            self._fail(overdue, now)
+            return
+        if self._failed_names:
+            # Одно сообщение на все окна просроченных задач
+            names, self._failed_names = self._failed_names, []
+            self.tasks_failed.emit(names)
+
+        # Напоминания с одним временем приходят одним сигналом; опоздавшие — сразу
+        lead = REMINDER_LEAD_MINUTES * 60
+        reminders = {}
+        for task_id, name, deadline_at in rows:
+            if task_id not in self._reminded:
+                reminders.setdefault(max(deadline_at - lead, now), []).append((task_id, name, deadline_at))
+        for remind_at, tasks in reminders.items():
+            self._calls.append(self.scheduler.call_at(remind_at, lambda tasks=tasks: self._remind(tasks)))
+
+        if rows:
+            # Планировщик может выполнить вызов на секунду раньше срока, а задача
+            # просрочена, только когда дедлайн уже прошёл
+            self._calls.append(self.scheduler.call_at(rows[0][2] + COALESCE_SECONDS, self._request_refresh))
+        if self._window_end is not None:
+            # Напоминания задач за окном могут прийти раньше дедлайнов в нём
+            self._calls.append(self.scheduler.call_at(self._window_end - lead, self._request_refresh))
+
+    def _remind(self, tasks):
+        self._reminded.update(task_id for task_id, _, _ in tasks)
+        self.deadlines_near.emit(tasks)
+
+    def _fail(self, task_ids, now):
+        database, profile_id = self.database, self.profile_id
+
+        def on_failed(rows):
+            if (self.database, self.profile_id) != (database, profile_id):
+                return
+            if self.repository.is_current(database, profile_id):
+                self.repository.apply_rows(rows)
+            self._reminded.difference_update(task_ids)
+            self._failed_names.extend(row[1] for row in rows)
+            self._request_refresh()
+
+        self.queries.write(
+            database,
+            lambda connection: services.fail_overdue_tasks(connection, profile_id, task_ids, now),
+            on_failed
+        )
+
+    def _on_task_changed(self, record):
+        if not self.repository.is_current(self.database, self.profile_id):
+            return
+        if record.id in self._window or (
+            record.deadline_at is not None and (self._window_end is None or record.deadline_at <= self._window_end)
+        ):
+            # О перенесённом дедлайне напоминают заново
+            if self._window.get(record.id) != record.deadline_at:
+                self._reminded.discard(record.id)
+            self._request_refresh()
+
+    def _on_task_removed(self, task_id):
+        if task_id in self._window:
+            self._request_refresh()
@@ -0,0 +1,166 @@
+import re
+from datetime import datetime, timedelta
+
+
+# Текст, который поле дедлайна содержит по умолчанию
+DEADLINE_PLACEHOLDER = "Время, Дата ДД/ММММ/ГГГГ"
+DEADLINE_FORMAT = "%H:%M, %d/%m/%Y"
+# Дедлайн без времени действует до конца дня
+END_OF_DAY = (23, 59)
+# Сколько задач показывают панели "Сегодня", "Ближайшие" и "Входящие"
+PANEL_TASKS = 3
+
+_EPOCH = datetime(1970, 1, 1)
+
+_MONTHS = {
+    "января": 1, "февраля": 2, "марта": 3, "апреля": 4, "мая": 5, "июня": 6,
+    "июля": 7, "августа": 8, "сентября": 9, "октября": 10, "ноября": 11, "декабря": 12,
+}
+
+_TIME_RE = re.compile(r"(\d{1,2}):(\d{2})")
+_DATE_RES = (
+    # 31/12/2024, 31.12.2024, 31-12-2024
+    (re.compile(r"(\d{1,2})[./-](\d{1,2})[./-](\d{4})"), lambda m: (m[3], m[2], m[1])),
+    # 2024-12-31
+    (re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})"), lambda m: (m[1], m[2], m[3])),
+    # 31 декабря 2024
+    (re.compile(r"(\d{1,2})\s+(" + "|".join(_MONTHS) + r")\s+(\d{4})", re.IGNORECASE),
+     lambda m: (m[3], _MONTHS[m[2].lower()], m[1])),
+)
+
+
+def parse_deadline(text):
+    """Текст дедлайна -> секунды местного времени от 1970-01-01 или None, если дедлайна нет.
+
+    Понимает "12:00, 31/12/2024", "31.12.2024", "2024-12-31" и "31 декабря 2024";
+    время можно указать до или после даты. Для нераспознанного текста
+    выбрасывает ValueError.
+    """
+    text = (text or "").strip()
+    if not text or text == DEADLINE_PLACEHOLDER:
+        return None
+
+    for pattern, parts in _DATE_RES:
+        match = pattern.search(text)
+        if match:
+            year, month, day = map(int, parts(match))
+            rest = text[:match.start()] + " " + text[match.end():]
+            break
+    else:
+        raise ValueError(f"Не удалось распознать дату в дедлайне '{text}'")
+
+    time_match = _TIME_RE.search(rest)
+    hour, minute = map(int, time_match.groups()) if time_match else END_OF_DAY
+    # Неверные день, месяц или время тоже дают ValueError
+    return to_timestamp(datetime(year, month, day, hour, minute))
+
+
+def to_timestamp(moment):
+    """Местное время без часового пояса -> целые секунды от 1970-01-01.
+
+    Отсчёт ведётся в местном времени, а не в UTC, поэтому границы дня не
+    зависят от часового пояса и перехода на летнее время.
+    """
+    return int((moment - _EPOCH).total_seconds())
+
+
+def now_timestamp():
+    return to_timestamp(datetime.now())
+
+
+def from_timestamp(seconds):
+    return _EPOCH + timedelta(seconds=seconds)
+
+
+def format_deadline(seconds):
+    """Дедлайн в формате поля редактирования: "ЧЧ:ММ, ДД/ММ/ГГГГ" """
+    if seconds is None:
+        return ""
+    return from_timestamp(seconds).strftime(DEADLINE_FORMAT)
+
+
+def format_date(moment):
+    return moment.strftime("%d/%m/%Y")
+
+
+def _start_of_day(moment):
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def today_range(now=None):
+    """Полуинтервал [начало сегодняшнего дня, начало завтрашнего)"""
+    start = _start_of_day(now or datetime.now())
+    return to_timestamp(start), to_timestamp(start + timedelta(days=1))
+
+
+def week_range(now=None):
+    """Ближайшая неделя: сегодня и шесть следующих дней"""
+    start = _start_of_day(now or datetime.now())
+    return to_timestamp(start), to_timestamp(start + timedelta(days=7))
+
+
+def weekday_range(weekday, now=None):
+    """Ближайший день недели weekday (0 — понедельник) в пределах недели, считая сегодня"""
+    start = _start_of_day(now or datetime.now())
+    day = start + timedelta(days=(weekday - start.weekday()) % 7)
+    return to_timestamp(day), to_timestamp(day + timedelta(days=1))
+
+
+def days_ago(days, now=None):
+    """Начало дня, который был days дней назад"""
+    start = _start_of_day(now or datetime.now())
+    return to_timestamp(start - timedelta(days=days))
+
+
+def tasks_due_between(connection, profile_id, start, end, limit=PANEL_TASKS):
+    """Открытые задачи профиля с дедлайном в [start, end), ближайшие первыми.
+
+    Диапазон читается из частичного индекса tasks_open_deadline (profile_id,
+    deadline_at) WHERE status = 0, поэтому запрос не перебирает остальные
+    задачи профиля, в том числе выполненные.
+    """
+    return connection.execute('''
+        SELECT id, name, deadline_at FROM tasks
+        WHERE profile_id = ? AND status = 0 AND deadline_at >= ? AND deadline_at < ?
+        ORDER BY deadline_at
+        LIMIT ?
+    ''', (profile_id, start, end, limit)).fetchall()
+
+
+def next_deadlines(connection, profile_id, limit):
+    """Окно ближайших дедлайнов: открытые задачи профиля с дедлайном, включая просроченные, по возрастанию.
+
+    Читается начало того же индекса tasks_open_deadline, поэтому цена
+    запроса зависит от limit, а не от числа задач профиля.
+    """
+    return connection.execute('''
+        SELECT id, name, deadline_at FROM tasks
+        WHERE profile_id = ? AND status = 0 AND deadline_at IS NOT NULL
+        ORDER BY deadline_at
+        LIMIT ?
+    ''', (profile_id, limit)).fetchall()
+
+
+def tasks_without_deadline(connection, profile_id, limit=PANEL_TASKS):
+    """Входящие: открытые задачи профиля без дедлайна и проекта, новые первыми"""
+    return connection.execute('''
+        SELECT id, name, deadline_at FROM tasks
+        WHERE profile_id = ? AND status = 0 AND deadline_at IS NULL AND project_id IS NULL
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (profile_id, limit)).fetchall()
+
+
+def fill_deadline_column(connection):
+    """Однократный разбор текстовых дедлайнов в deadline_at при миграции"""
+    rows = connection.execute("SELECT id, deadline FROM tasks").fetchall()
+    parsed = []
+    for task_id, deadline in rows:
+        try:
+            seconds = parse_deadline(deadline)
+        except ValueError:
+            # Нераспознанный текст остаётся в deadline, задача попадает во входящие
+            continue
+        if seconds is not None:
+            parsed.append((seconds, task_id))
+    connection.executemany("UPDATE tasks SET deadline_at = ? WHERE id = ?", parsed)
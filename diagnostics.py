@@ -0,0 +1,315 @@
+"""Счётчики, гистограммы времени и журнал медленных запросов.
+
+Включается переменной окружения: TODO_DIAGNOSTICS=1 python main.py.
+Выключенная диагностика почти ничего не стоит: соединения Storage
+открываются обычным sqlite3.Connection, а каждая точка замера проверяет
+один флаг ENABLED. Включённая — измеряет каждый запрос SQL (TimedConnection),
+каждый запрос QueryRunner и переход между экранами; запросы дольше
+SLOW_QUERY_MS пишутся в SLOW_LOG вместе с параметрами и EXPLAIN QUERY PLAN.
+Всё собранное сохраняет dump(), показывает скрытая панель (Ctrl+Shift+D).
+"""
+import bisect
+import collections
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+
+ENABLED = os.environ.get("TODO_DIAGNOSTICS") == "1"
+# Запрос не короче этого, мс, попадает в журнал медленных запросов
+SLOW_QUERY_MS = float(os.environ.get("TODO_SLOW_QUERY_MS", 50))
+SLOW_LOG = "slow_queries.log"
+# Куда dump() пишет счётчики и гистограммы при выходе
+REPORT_FILE = "diagnostics.json"
+# Сколько последних медленных запросов хранится для панели
+SLOW_QUERIES_KEPT = 100
+# Верхние границы корзин гистограммы, мс; последняя корзина — всё, что дольше
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Сколько символов SQL и параметров попадает в журнал
+SQL_TEXT_LIMIT = 2000
+
+_lock = threading.Lock()
+_counters = collections.Counter()
+_histograms = {}
+_slow_queries = collections.deque(maxlen=SLOW_QUERIES_KEPT)
+
+
+class Histogram:
+    """Время операций по логарифмическим корзинам BUCKETS_MS"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed_ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total += elapsed_ms
+        self.max = max(self.max, elapsed_ms)
+
+    def percentile(self, share):
+        """Верхняя граница корзины, в которую попадает доля share замеров, но не больше максимума"""
+        rank = share * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, round(self.max, 3))
+        return round(self.max, 3)
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max, 3),
+            "buckets": dict(zip([str(bound) for bound in BUCKETS_MS] + ["inf"], self.counts)),
+        }
+
+
+def count(name, amount=1):
+    if ENABLED:
+        with _lock:
+            _counters[name] += amount
+
+
+def record(name, elapsed_ms):
+    """Замер времени операции name"""
+    if ENABLED:
+        with _lock:
+            histogram = _histograms.get(name)
+            if histogram is None:
+                histogram = _histograms[name] = Histogram()
+            histogram.add(elapsed_ms)
+
+
+@contextmanager
+def timed(name):
+    """with timed("имя"): ... — время блока в гистограмму name"""
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - started) * 1000)
+
+
+def timed_function(name=None):
+    """Декоратор: время каждого вызова функции в гистограмму name (по умолчанию — имя функции)"""
+    def decorator(function):
+        if not ENABLED:
+            return function
+        label = name or function.__qualname__
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(label, (time.perf_counter() - started) * 1000)
+        return wrapper
+    return decorator
+
+
+def operation_name(function):
+    """Имя функции запроса для гистограммы: "TaskRepository.add.<lambda>" без "<locals>." """
+    return getattr(function, "__qualname__", type(function).__name__).replace("<locals>.", "")
+
+
+class _TimedCursor:
+    """Курсор выборки TimedConnection: время чтения строк добавляется ко времени execute().
+
+    Строки читаются по частям, как из обычного курсора sqlite3; замер
+    записывается один раз — когда строки закончились, чтение прервано
+    ошибкой или курсор закрыт либо удалён.
+    """
+
+    def __init__(self, connection, cursor, sql, parameters, elapsed):
+        self._connection = connection
+        self._cursor = cursor
+        self._sql = sql
+        self._parameters = parameters
+        self._elapsed = elapsed
+        self._done = False
+
+    def __getattr__(self, name):
+        # description, rowcount, lastrowid, arraysize и прочее — от курсора sqlite3
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = self._fetch(self._cursor.fetchone)
+        if row is None:
+            raise StopIteration
+        return row
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, size=None):
+        size = self._cursor.arraysize if size is None else size
+        rows = self._fetch(self._cursor.fetchmany, size)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(self._cursor.fetchall)
+        self._finish()
+        return rows
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+    def __del__(self):
+        self._finish()
+
+    def _fetch(self, fetch, *args):
+        started = time.perf_counter()
+        try:
+            result = fetch(*args)
+        except BaseException:
+            self._elapsed += (time.perf_counter() - started) * 1000
+            self._finish()
+            raise
+        self._elapsed += (time.perf_counter() - started) * 1000
+        if result is None:
+            self._finish()
+        return result
+
+    def _finish(self):
+        if not self._done:
+            self._done = True
+            self._connection._finished(self._sql, self._parameters, self._elapsed)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Соединение, которое замеряет каждый execute/executemany.
+
+    Для выборки execute() возвращает _TimedCursor, и в замер входит и
+    чтение строк, сколько бы его ни было; строки по-прежнему можно читать
+    по частям и прерывать. Гистограмма запроса называется по его первому
+    слову ("sql.SELECT", "sql.UPDATE", ...).
+    """
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        cursor = super().execute(sql, parameters)
+        elapsed = (time.perf_counter() - started) * 1000
+        if cursor.description is not None:
+            return _TimedCursor(self, cursor, sql, parameters, elapsed)
+        self._finished(sql, parameters, elapsed)
+        return cursor
+
+    def executemany(self, sql, parameters):
+        started = time.perf_counter()
+        # Генератор параметров читается один раз: первый набор нужен для EXPLAIN QUERY PLAN
+        parameters = list(parameters)
+        cursor = super().executemany(sql, parameters)
+        self._finished(sql, parameters[0] if parameters else (), (time.perf_counter() - started) * 1000)
+        return cursor
+
+    def _finished(self, sql, parameters, elapsed):
+        record("sql." + (sql.split(None, 1)[0].upper() if sql.strip() else "?"), elapsed)
+        if elapsed >= SLOW_QUERY_MS:
+            _log_slow_query(self, sql, parameters, elapsed)
+
+
+def _log_slow_query(connection, sql, parameters, elapsed):
+    """Медленный запрос: в SLOW_LOG и в память для панели"""
+    try:
+        # EXPLAIN выполняется базовым execute(), чтобы не замерять сам себя
+        plan = [
+            row[-1] for row in sqlite3.Connection.execute(connection, "EXPLAIN QUERY PLAN " + sql, parameters)
+        ]
+    except (sqlite3.Error, ValueError):
+        # Для PRAGMA, BEGIN и подобных плана нет
+        plan = []
+    entry = {
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "elapsed_ms": round(elapsed, 3),
+        "sql": " ".join(sql.split())[:SQL_TEXT_LIMIT],
+        "parameters": repr(parameters)[:SQL_TEXT_LIMIT],
+        "plan": plan,
+        "thread": threading.current_thread().name,
+    }
+    with _lock:
+        _counters["sql.slow"] += 1
+        _slow_queries.append(entry)
+        try:
+            with open(SLOW_LOG, "a", encoding="utf-8") as log:
+                log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError:
+            pass
+
+
+def connection_factory():
+    """Класс соединения для sqlite3.connect(factory=...)"""
+    return TimedConnection if ENABLED else sqlite3.Connection
+
+
+def snapshot():
+    """Копия собранного: счётчики, сводки гистограмм и последние медленные запросы"""
+    with _lock:
+        return {
+            "enabled": ENABLED,
+            "counters": dict(sorted(_counters.items())),
+            "histograms": {name: histogram.summary() for name, histogram in sorted(_histograms.items())},
+            "slow_queries": list(_slow_queries),
+        }
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _slow_queries.clear()
+
+
+def dump(path=REPORT_FILE):
+    """Сохранение snapshot() в JSON"""
+    with open(path, "w", encoding="utf-8") as report:
+        json.dump(snapshot(), report, ensure_ascii=False, indent=2)
+    return path
+
+
+def format_report(data=None):
+    """Текст для панели диагностики"""
+    data = data or snapshot()
+    if not data["enabled"]:
+        return "Диагностика выключена. Запустите приложение с переменной окружения TODO_DIAGNOSTICS=1."
+
+    lines = [f"{'операция':<48}{'число':>8}{'сред.':>9}{'p50':>8}{'p95':>8}{'макс.':>9}  мс"]
+    for name, summary in data["histograms"].items():
+        lines.append(
+            f"{name[:47]:<48}{summary['count']:>8}{summary['mean_ms']:>9.2f}"
+            f"{summary['p50_ms']:>8g}{summary['p95_ms']:>8g}{summary['max_ms']:>9.2f}"
+        )
+    if data["counters"]:
+        lines.append("")
+        lines.extend(f"{name:<48}{value:>8}" for name, value in data["counters"].items())
+    if data["slow_queries"]:
+        lines.append("")
+        lines.append(f"Медленные запросы (от {SLOW_QUERY_MS:g} мс), последние сверху:")
+        for entry in reversed(data["slow_queries"]):
+            lines.append(f"{entry['at']}  {entry['elapsed_ms']} мс  [{entry['thread']}]")
+            lines.append(f"  {entry['sql']}")
+            lines.append(f"  параметры: {entry['parameters']}")
+            lines.extend(f"  план: {step}" for step in entry["plan"])
+    return "\n".join(lines)
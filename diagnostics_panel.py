@@ -0,0 +1,59 @@
+from PyQt6.QtGui import QFontDatabase
+from PyQt6.QtWidgets import (
+    QDialog, QDialogButtonBox, QFileDialog, QMessageBox, QPlainTextEdit, QPushButton, QVBoxLayout
+)
+
+import diagnostics
+
+
+class DiagnosticsDialog(QDialog):
+    """Скрытая панель диагностики (Ctrl+Shift+D): гистограммы, счётчики и медленные запросы"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Диагностика")
+        self.resize(820, 520)
+
+        self.report = QPlainTextEdit(self)
+        self.report.setReadOnly(True)
+        self.report.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.report.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close, self)
+        refresh = QPushButton("Обновить", self)
+        save = QPushButton("Сохранить в файл", self)
+        reset = QPushButton("Сбросить", self)
+        for button in (refresh, save, reset):
+            buttons.addButton(button, QDialogButtonBox.ButtonRole.ActionRole)
+            button.setEnabled(diagnostics.ENABLED)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.report)
+        layout.addWidget(buttons)
+
+        refresh.clicked.connect(self.refresh)
+        save.clicked.connect(self.save)
+        reset.clicked.connect(self.reset)
+        buttons.rejected.connect(self.reject)
+        self.refresh()
+
+    def refresh(self):
+        self.report.setPlainText(diagnostics.format_report())
+
+    def save(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Сохранить диагностику", diagnostics.REPORT_FILE, "JSON (*.json)"
+        )
+        if not path:
+            return
+        try:
+            diagnostics.dump(path)
+        except OSError as error:
+            QMessageBox.warning(self, "Диагностика", f"Не удалось сохранить файл: {error}")
+
+    def reset(self):
+        diagnostics.reset()
+        self.refresh()
+
+
+def show_diagnostics(parent=None):
+    DiagnosticsDialog(parent).exec()
@@ -0,0 +1,94 @@
+import hashlib
+import importlib.util
+import io
+import marshal
+import os
+
+from PyQt6.QtCore import PYQT_VERSION_STR
+
+
+# Формы экранов из Qt Designer; путь от модуля, чтобы он был верен и в сборке PyInstaller
+FORMS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "ui")
+# Скомпилированные формы: <имя>.<хэш>.bin с объектом кода модуля pyuic
+CACHE_DIR = os.path.join(FORMS_DIR, "__pycache__")
+
+_classes = {}
+
+
+def _cache_key(source):
+    """Хэш содержимого .ui; версия PyQt и Python входят в ключ, так как от них зависит код"""
+    digest = hashlib.sha1(source)
+    digest.update(PYQT_VERSION_STR.encode())
+    digest.update(importlib.util.MAGIC_NUMBER)
+    return digest.hexdigest()[:16]
+
+
+def _compile(name, source):
+    """Код модуля формы, как у pyuic6; uic импортируется только здесь"""
+    from PyQt6 import uic
+
+    output = io.StringIO()
+    uic.compileUi(io.StringIO(source.decode("utf-8")), output)
+    return compile(output.getvalue(), os.path.join(FORMS_DIR, name + ".ui"), "exec")
+
+
+def _store(name, key, code):
+    """Запись кода в кэш через временный файл; старые версии формы удаляются"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"{name}.{key}.bin")
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as cache_file:
+        marshal.dump(code, cache_file)
+    os.replace(temporary, path)
+
+    for stale in os.listdir(CACHE_DIR):
+        if stale.startswith(name + ".") and stale != os.path.basename(path) and stale.count(".") == 2:
+            os.remove(os.path.join(CACHE_DIR, stale))
+
+
+def _load_code(name):
+    with open(os.path.join(FORMS_DIR, name + ".ui"), "rb") as ui_file:
+        source = ui_file.read()
+    key = _cache_key(source)
+
+    try:
+        with open(os.path.join(CACHE_DIR, f"{name}.{key}.bin"), "rb") as cache_file:
+            return marshal.load(cache_file)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    code = _compile(name, source)
+    try:
+        _store(name, key, code)
+    except OSError:
+        # Папка только для чтения: форма компилируется при каждом запуске
+        pass
+    return code
+
+
+def form_class(name):
+    """Класс Ui_... формы static/ui/<name>.ui.
+
+    Форма компилируется uic один раз на версию файла: объект кода
+    сохраняется в CACHE_DIR под хэшем содержимого .ui, и следующие
+    запуски выполняют его сразу, как заранее сгенерированный модуль.
+    Изменённый .ui получает новый хэш и компилируется заново.
+    """
+    if name not in _classes:
+        namespace = {"__name__": f"forms.{name}"}
+        exec(_load_code(name), namespace)
+        _classes[name] = next(
+            value for key, value in namespace.items() if key.startswith("Ui_") and isinstance(value, type)
+        )
+    return _classes[name]
+
+
+def compile_all():
+    """Заполнение кэша для всех форм, например перед сборкой main.spec"""
+    for file_name in sorted(os.listdir(FORMS_DIR)):
+        if file_name.endswith(".ui"):
+            _load_code(file_name[:-len(".ui")])
+
+
+if __name__ == "__main__":
+    compile_all()
@@ -1,12 +1,43 @@
+import startup
+
 import sys
 import sqlite3
-
-from PyQt6.QtWidgets import QApplication, QMainWindow, QMessageBox, QInputDialog, QListWidgetItem, QPushButton, QFileDialog
-from PyQt6.QtGui import  QPixmap
-
-from choise_profile import Ui_MainWindow as ChoiseProfileUI
-from main_panel import Ui_MainWindow as MainPanelUI
-from editing_tasks_panel import Ui_MainWindow as EditingPanelUI
+from datetime import datetime
+from itertools import islice
+
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QKeySequence, QShortcut
+from PyQt6.QtWidgets import QApplication, QMainWindow, QMessageBox, QInputDialog, QFileDialog
+
+from storage import Storage, TODO_DB, MAINTENANCE_INTERVAL_MS
+import storage
+import diagnostics
+import migrations
+import search_index
+import deadlines
+import analytics
+import task_history
+import shards
+import services
+import projects
+import tags
+from task_repository import TaskRepository
+from scheduler import Scheduler
+from pomodoro import PomodoroTimer, TimeTracker, BlockReminders, REMINDER_LEAD_MINUTES
+from time_tracking import KIND_FOCUS
+from deadline_reminders import DeadlineReminders
+from workers import QueryRunner, error_text
+from search_cache import SearchCache
+from screens import ScreenStack
+from pictures import PictureLoader
+
+
+# Пауза после последнего нажатия клавиши перед запросом к базе
+SEARCH_DEBOUNCE_MS = 200
+# Сколько профилей показывают кнопки profile_1..profile_4, остальные — в окне поиска
+PROFILE_BUTTONS = 4
+# Сколько названий просроченных задач показывает одно сообщение
+FAILED_NAMES_SHOWN = 10
 
 
 ###
@@ -15,49 +46,119 @@ class MainWindow(QMainWindow):
         super().__init__()
         # Инициализация текущего профиля
         self.current_profile = None
-        self.prof_database = "db\\profiles.db"
-        self.task_database = "db\\tasks.db"
+        self.current_profile_id = None
+        # Все профили: id -> имя в порядке создания; меняется вместе с таблицей profiles
+        self.profile_names = {}
+        # id профилей на кнопках profile_1..profile_4
+        self.profile_button_ids = []
+        # id профилей, задачи которых хранятся в отдельных файлах
+        self.sharded_profiles = set()
+        # id задач на кнопках task_n1..task_n3 открытой панели дедлайнов
+        self.panel_task_ids = []
+        # Ключ картинки задачи на панели редактирования
+        self.task_picture_key = None
+        # Задача, открытая на панели редактирования из списка: id и название
+        self.editing_task_id = self.editing_task_name = None
+        # Проект и папка, в которые панель редактирования добавит новую задачу
+        self.task_project_id = None
+        self.task_folder_id = None
+        # Открытый проект и id на кнопках экранов проектов, папок и тэгов
+        self.current_project_id = None
+        self.project_ids = []
+        self.folder_ids = []
+        self.cloud_tags = []
+        self.database = TODO_DB
+        # Файл с задачами текущего профиля: основная база или его собственный файл (shards)
+        self.tasks_database = self.database
+        # Файлы, схема которых уже обновлена до текущей версии
+        self.migrated_databases = {self.database}
+        # Общие долгоживущие соединения с базами данных
+        self.storage = Storage()
+        # Фоновое выполнение запросов, чтобы окно не блокировалось на SQLite
+        self.queries = QueryRunner(self.storage, self)
+        self.queries.query_failed.connect(self.show_query_error)
+        # Помидоры, учёт времени и напоминания о блоках времени — на одном таймере планировщика
+        self.scheduler = Scheduler(self)
+        # Задачи текущего профиля в памяти; изменения записываются в базу и приходят сигналами
+        self.tasks = TaskRepository(self.queries, self.scheduler, self)
+        self.time_tracker = TimeTracker(self.queries, self.scheduler, self)
+        self.pomodoro = PomodoroTimer(self.scheduler, self.time_tracker, self)
+        self.pomodoro.phase_started.connect(lambda kind, ends_at: self.update_pomodoro_button())
+        self.pomodoro.phase_finished.connect(self.show_pomodoro_phase)
+        self.time_blocks = BlockReminders(self.queries, self.scheduler, self)
+        self.time_blocks.block_starting.connect(self.show_block_reminder)
+        # Напоминания о дедлайнах и провал просроченных задач
+        self.deadline_reminders = DeadlineReminders(self.queries, self.scheduler, self.tasks, self)
+        self.deadline_reminders.deadlines_near.connect(self.show_deadline_reminder)
+        self.deadline_reminders.tasks_failed.connect(self.show_failed_tasks)
+
+        # Поиск по мере ввода: кэш недавних запросов и отложенный запрос к базе
+        self.search_cache = SearchCache()
+        self.queries.written.connect(self.on_database_written)
+        self.tasks.external_change.connect(self.on_database_written)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.run_live_search)
+
+        # Картинки задач декодируются и уменьшаются в фоне
+        self.pictures = PictureLoader(self)
+        self.pictures.load_failed.connect(lambda message: self.show_query_error("pictures", message))
+        startup.mark("соединения и потоки")
         self.init_database()
-        self.init_tasks_table()
+        startup.mark("проверка схемы")
+
+        # Контрольная точка WAL и PRAGMA optimize по расписанию, в потоке записи
+        self.maintenance_timer = QTimer(self)
+        self.maintenance_timer.setInterval(MAINTENANCE_INTERVAL_MS)
+        self.maintenance_timer.timeout.connect(self.run_maintenance)
+        self.maintenance_timer.start()
+
+        # Экраны строятся один раз, при первом переходе на них, и затем переиспользуются
+        self.screens = ScreenStack(self)
+        self.setCentralWidget(self.screens)
+        # Формы экранов из static/ui загружаются тоже при первом переходе (см. forms.py)
+        self.screens.register("choise_profile", "choise_profile", self.setup_choise_profile_signals)
+        self.screens.register("main_panel", "main_panel", self.setup_main_panel)
+        self.screens.register("editing_panel", "editing_tasks_panel", self.setup_editing_panel)
+        self.screens.register("today_panel", "today_tasks_panel", lambda ui: self.setup_deadline_panel(ui, history_days=1))
+        self.screens.register("immediate_panel", "immediate_tasks_panel", self.setup_immediate_panel)
+        self.screens.register("incoming_panel", "incoming_tasks_panel", self.setup_deadline_panel)
+        self.screens.register("graphics_tasks", "graphics_tasks", self.setup_graphics_tasks)
+        self.screens.register("projects", "projects", self.setup_projects)
+        self.screens.register("custom_folders", "custom_folders", self.setup_custom_folders)
+        self.screens.register("search_tags", "search_tags", self.setup_search_tags)
+        self.screens.register("tags_of_the_projects", "tags_of_the_projects", self.setup_tags_of_the_projects)
+        self.screens.register("graphics_projects", "graphics_projects", self.setup_graphics_projects)
+        if diagnostics.ENABLED:
+            self.screens.switched.connect(
+                lambda name, elapsed, built: diagnostics.record(f"screen.{'build' if built else 'switch'}.{name}", elapsed)
+            )
+
+        # Отмена и повтор изменений задач текущего профиля (см. task_journal.py)
+        QShortcut(QKeySequence.StandardKey.Undo, self, self.undo_task_change)
+        QShortcut(QKeySequence.StandardKey.Redo, self, self.redo_task_change)
+        # Скрытая панель диагностики (см. diagnostics.py)
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self.show_diagnostics)
+
         # Инициализация UI выбора профиля
-        self.choise_profile_ui = ChoiseProfileUI()
-        self.choise_profile_ui.setupUi(self)
+        self.screens.show_screen("choise_profile")
+        startup.mark("экран выбора профиля")
 
         # Обновление интерфейса профилей
         self.update_profile_buttons()
 
-        # Подключение кнопок
-        self.setup_choise_profile_signals()
-
     def init_database(self):
-        """Создание базы данных и таблиц, если их нет"""
-        connection = sqlite3.connect(self.prof_database)
-        cursor = connection.cursor()
-
-        # Таблица профилей
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS profiles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL
-            )
-        ''')
-
-        # Пример таблицы задач (динамически создаются для каждого профиля)
-        # cursor.execute('''
-        #     CREATE TABLE IF NOT EXISTS tasks_profile_<profile_id> (
-        #         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        #         name TEXT NOT NULL,
-        #         deadline TEXT,
-        #         description TEXT,
-        #         tag TEXT
-        #     )
-        # ''')
-
-        connection.commit()
-        connection.close()
-
-    def setup_choise_profile_signals(self):
+        """Создание или обновление схемы базы данных до текущей версии"""
+        # Таблицы профилей и задач, индексы и перенос данных из прежних баз
+        migrations.migrate(self.storage.connection(self.database))
+
+        # Задачи профиля с флагом sharded лежат в отдельном файле db/shards/profile_<id>.db
+        # с той же схемой (см. shards.py); такие файлы обновляются при входе в профиль
+
+    def setup_choise_profile_signals(self, choise_profile_ui):
         """Подключение сигналов для экрана выбора профиля"""
+        self.choise_profile_ui = choise_profile_ui
         self.choise_profile_ui.log_in_another_profile.clicked.connect(self.log_in_another_profile)
         self.choise_profile_ui.create_profile.clicked.connect(self.create_profile)
         self.choise_profile_ui.delete_all_profiles.clicked.connect(self.delete_all_profiles)
@@ -71,12 +172,22 @@ class MainWindow(QMainWindow):
         self.choise_profile_ui.profile_4.clicked.connect(lambda: self.select_profile(4))
 
     def update_profile_buttons(self):
-        """Обновление имен профилей на кнопках"""
-        connection = sqlite3.connect(self.prof_database)
-        cursor = connection.cursor()
+        """Перечитывание профилей (их могли изменить из todo_cli) и обновление кнопок"""
+        self.queries.read(
+            self.database,
+            services.list_profiles,
+            self.load_profile_names,
+            channel="profiles"
+        )
 
-        cursor.execute("SELECT name FROM profiles ORDER BY id")
-        profiles = cursor.fetchall()
+    def load_profile_names(self, profiles):
+        self.profile_names = {profile_id: name for profile_id, name, _ in profiles}
+        self.sharded_profiles = {profile_id for profile_id, _, sharded in profiles if sharded}
+        self.show_profile_buttons()
+
+    def show_profile_buttons(self):
+        """Первые профили на кнопках profile_1..profile_4 по словарю profile_names"""
+        self.profile_button_ids = list(islice(self.profile_names, PROFILE_BUTTONS))
 
         buttons = [
             self.choise_profile_ui.profile_1,
@@ -86,41 +197,50 @@ class MainWindow(QMainWindow):
         ]
 
         for i, button in enumerate(buttons):
-            if i < len(profiles):
-                button.setText(profiles[i][0])
+            if i < len(self.profile_button_ids):
+                button.setText(self.profile_names[self.profile_button_ids[i]])
                 button.setEnabled(True)
             else:
                 button.setText(f"Profile {i + 1}")
                 button.setEnabled(False)
 
-        connection.close()
-
     def create_profile(self):
         """Создание нового профиля"""
-        connection = sqlite3.connect(self.prof_database)
-        cursor = connection.cursor()
-
-        cursor.execute("SELECT COUNT(*) FROM profiles")
-        profile_count = cursor.fetchone()[0]
-
-        if profile_count >= 4:
-            QMessageBox.warning(self, "Ошибка", "Невозможно создать больше 4 профилей.")
-            connection.close()
-            return
-
         profile_name, ok = QInputDialog.getText(self, "Создать профиль", "Введите имя профиля:")
-        if not ok or not profile_name.strip():
+        profile_name = profile_name.strip()
+        if not ok or not profile_name:
             return
 
-        try:
-            cursor.execute("INSERT INTO profiles (name) VALUES (?)", (profile_name.strip(),))
-            connection.commit()
+        def on_ready(profile_id, sharded=False):
+            self.profile_names[profile_id] = profile_name
+            if sharded:
+                self.sharded_profiles.add(profile_id)
             QMessageBox.information(self, "Успех", f"Профиль {profile_name} создан.")
-            self.update_profile_buttons()
-        except sqlite3.IntegrityError:
-            QMessageBox.warning(self, "Ошибка", f"Профиль c именем {profile_name} уже существует.")
-        finally:
-            connection.close()
+            self.show_profile_buttons()
+
+        def on_created(profile_id):
+            if not shards.SHARD_NEW_PROFILES:
+                on_ready(profile_id)
+                return
+            # Файл профиля создаётся после фиксации строки profiles, в потоке записи вне транзакции
+            self.queries.maintain(
+                self.database,
+                lambda connection: shards.move_profile(connection, profile_id),
+                lambda _: on_ready(profile_id, sharded=True)
+            )
+
+        def on_error(error):
+            if isinstance(error, sqlite3.IntegrityError):
+                QMessageBox.warning(self, "Ошибка", f"Профиль c именем {profile_name} уже существует.")
+            else:
+                self.show_query_error("profiles", error_text(error))
+
+        self.queries.write(
+            self.database,
+            lambda connection: services.create_profile(connection, profile_name),
+            on_created,
+            on_error
+        )
 
     def delete_profile(self):
         """Удаление выбранного профиля"""
@@ -136,31 +256,46 @@ class MainWindow(QMainWindow):
         )
 
         if result == QMessageBox.StandardButton.Yes:
-            connection = sqlite3.connect(self.prof_database)
-            cursor = connection.cursor()
-
-            try:
-                cursor.execute("DELETE FROM profiles WHERE name = ?", (self.current_profile,))
-                connection.commit()
-                QMessageBox.information(self, "Успех", f"Профиль {self.current_profile} удалён.")
-                self.current_profile = None
-                self.update_profile_buttons()
-            finally:
-                connection.close()
+            profile_id, profile_name = self.current_profile_id, self.current_profile
+            self.set_current_profile(None)
+
+            def on_deleted(shard):
+                self.profile_names.pop(profile_id, None)
+                if shard is not None:
+                    # Задачи профиля — целый файл, он удаляется без перебора строк
+                    self.sharded_profiles.discard(profile_id)
+                    shards.remove_shard(shard, self.storage)
+                QMessageBox.information(self, "Успех", f"Профиль {profile_name} удалён.")
+                self.show_profile_buttons()
+
+            self.queries.write(
+                self.database,
+                lambda connection: services.delete_profile(connection, profile_id),
+                on_deleted
+            )
 
     def select_profile(self, profile_index):
-        """Выбор профиля по индексу"""
-        connection = sqlite3.connect(self.prof_database)
-        cursor = connection.cursor()
-
-        cursor.execute("SELECT name FROM profiles ORDER BY id")
-        profiles = cursor.fetchall()
-
-        if 0 <= profile_index - 1 < len(profiles):
-            self.current_profile = profiles[profile_index - 1][0]
+        """Выбор профиля по номеру кнопки"""
+        # Имя берётся из словаря профилей, без обращения к базе
+        if 0 <= profile_index - 1 < len(self.profile_button_ids):
+            self.set_current_profile(self.profile_button_ids[profile_index - 1])
             QMessageBox.information(self, "Профиль выбран", f"Выбран {self.current_profile}.")
 
-        connection.close()
+    def set_current_profile(self, profile_id):
+        """Текущий профиль (None — профиль не выбран) и файл с его задачами"""
+        self.current_profile_id = profile_id
+        self.current_profile = self.profile_names[profile_id] if profile_id is not None else None
+        if profile_id in self.sharded_profiles:
+            self.tasks_database = shards.shard_path(self.database, profile_id)
+        else:
+            self.tasks_database = self.database
+        # Помидоры идут только по задачам выбранного профиля
+        if self.pomodoro.is_running and self.pomodoro.profile_id != profile_id:
+            self.pomodoro.stop()
+        if profile_id is None:
+            self.tasks.load(None, None)
+            self.time_blocks.load(None, None)
+            self.deadline_reminders.load(None, None)
 
 
     def open_main_panel(self):
@@ -169,38 +304,517 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Сначала выберите профиль.")
             return
 
+        # Результаты для прежнего экрана больше не нужны
+        self.queries.cancel("profiles")
+        self.queries.cancel("panel")
+        self.pictures.cancel()
+
+        # Файл профиля обновляется до текущей схемы при первом входе в профиль
+        if self.tasks_database not in self.migrated_databases:
+            migrations.migrate(self.storage.connection(self.tasks_database), None, None)
+            self.migrated_databases.add(self.tasks_database)
+        # Задачи профиля читаются в память один раз, при входе в него
+        if not self.tasks.is_current(self.tasks_database, self.current_profile_id):
+            self.tasks.load(self.tasks_database, self.current_profile_id)
+            self.time_blocks.load(self.tasks_database, self.current_profile_id)
+            self.deadline_reminders.load(self.tasks_database, self.current_profile_id)
+
         # Переключение на главное окно
-        self.main_panel_ui = MainPanelUI()
-        self.main_panel_ui.setupUi(self)
+        self.screens.show_screen("main_panel")
+        self.main_panel_ui.today_date.setText(deadlines.format_date(datetime.now()))
+
+        # Задачи профиля по текущему тексту поиска; при пустом — все сразу,
+        # и дальнейший ввод уточняет их в памяти
+        self.run_search_query(self.main_panel_ui.Title.text(), notify_empty=False)
 
-        # Подключение кнопок на главной панели
+    def setup_main_panel(self, main_panel_ui):
+        """Подключение кнопок главной панели при её построении"""
+        self.main_panel_ui = main_panel_ui
         self.main_panel_ui.button_change_profile.clicked.connect(self.return_to_choise_profile)
         self.main_panel_ui.button_create_new_folder.clicked.connect(self.open_editing_panel)
         self.main_panel_ui.searchButton.clicked.connect(self.search_tasks)
+        self.main_panel_ui.Title.textChanged.connect(self.on_search_text_changed)
+        self.main_panel_ui.today_tasks.clicked.connect(self.open_today_panel)
+        self.main_panel_ui.immediate_tasks.clicked.connect(self.open_immediate_panel)
+        self.main_panel_ui.incoming_tasks.clicked.connect(self.open_incoming_panel)
+        self.main_panel_ui.failed_task.clicked.connect(self.open_graphics_tasks)
+        self.main_panel_ui.button_change_project.clicked.connect(self.open_projects)
+
+        # Список задач: модель с постраничной подгрузкой и отрисовка делегатом.
+        # Модуль тяжёлый для импорта и нужен только с главной панели
+        from task_list_model import TaskListModel, TaskItemDelegate, TaskIdRole
+        self.task_list_model = TaskListModel(self)
+        self.main_panel_ui.listWidget.setModel(self.task_list_model)
+        self.main_panel_ui.listWidget.setItemDelegate(TaskItemDelegate(self.main_panel_ui.listWidget))
+        self.main_panel_ui.listWidget.setUniformItemSizes(True)
+        self.main_panel_ui.listWidget.clicked.connect(
+            lambda index: self.open_editing_panel_with_task(index.data(TaskIdRole))
+        )
+        # Изменённые задачи обновляются в списке по одной, без повторного поиска
+        self.tasks.task_changed.connect(self.on_task_changed)
+        self.tasks.task_removed.connect(self.task_list_model.remove_task)
+
+    ################################
+    ######## Панели дедлайнов ######
+    ################################
+
+    def open_today_panel(self):
+        """Переход на панель задач с дедлайном сегодня"""
+        self.stop_search()
+        self.today_panel_ui = self.screens.show_screen("today_panel")
+        self.show_deadline_panel(self.today_panel_ui)
+
+        start, end = deadlines.today_range()
+        self.load_panel_tasks(self.today_panel_ui, start, end)
+
+    def open_immediate_panel(self):
+        """Переход на панель задач на ближайшую неделю"""
+        self.stop_search()
+        self.immediate_panel_ui = self.screens.show_screen("immediate_panel")
+        self.show_deadline_panel(self.immediate_panel_ui)
+        self.select_immediate_day(None)
+
+    def setup_immediate_panel(self, panel_ui):
+        """Кнопки панели ближайших задач, включая выбор дня недели"""
+        self.setup_deadline_panel(panel_ui, history_days=7)
+
+        # "Нет" — вся неделя, остальные кнопки — один день недели
+        panel_ui.pushButton_0_No.clicked.connect(lambda: self.select_immediate_day(None))
+        weekday_buttons = [
+            panel_ui.pushButton_1_Pn,
+            panel_ui.pushButton_2_Vt,
+            panel_ui.pushButton_3_Sr,
+            panel_ui.pushButton_4_Cht,
+            panel_ui.pushButton_5_Pt,
+            panel_ui.pushButton_6_Sb,
+            panel_ui.pushButton_7_Vs
+        ]
+        for weekday, button in enumerate(weekday_buttons):
+            button.clicked.connect(lambda _, weekday=weekday: self.select_immediate_day(weekday))
+
+    def select_immediate_day(self, weekday):
+        """Отбор ближайших задач по дню недели (None — вся неделя)"""
+        if weekday is None:
+            start, end = deadlines.week_range()
+        else:
+            start, end = deadlines.weekday_range(weekday)
+        self.load_panel_tasks(self.immediate_panel_ui, start, end)
+
+    def open_incoming_panel(self):
+        """Переход на панель входящих задач без дедлайна"""
+        self.stop_search()
+        self.incoming_panel_ui = self.screens.show_screen("incoming_panel")
+        self.show_deadline_panel(self.incoming_panel_ui)
+
+        profile_id = self.current_profile_id
+        self.queries.read(
+            self.tasks_database,
+            lambda connection: deadlines.tasks_without_deadline(connection, profile_id),
+            lambda tasks: self.show_panel_tasks(self.incoming_panel_ui, tasks),
+            channel="panel"
+        )
+
+    def setup_deadline_panel(self, panel_ui, history_days=None):
+        """Подключение кнопок панели дедлайнов при её построении.
+
+        history_days — за сколько последних дней кнопки completed_task и
+        failed_task ищут выполненную или проваленную задачу.
+        """
+        panel_ui.back_to_main_panel.clicked.connect(self.return_to_main_panel)
+        panel_ui.button_add_task.clicked.connect(self.open_editing_panel)
+        panel_ui.task_n1.clicked.connect(lambda: self.open_panel_task(0))
+        panel_ui.task_n2.clicked.connect(lambda: self.open_panel_task(1))
+        panel_ui.task_n3.clicked.connect(lambda: self.open_panel_task(2))
+
+        if history_days is not None:
+            panel_ui.completed_task.clicked.connect(lambda: self.open_last_task("completed", history_days))
+            panel_ui.failed_task.clicked.connect(lambda: self.open_last_task("failed", history_days))
+
+    def show_deadline_panel(self, panel_ui):
+        """Общие подписи панелей дедлайнов; задачи прежнего показа убираются"""
+        panel_ui.today_date.setText(deadlines.format_date(datetime.now()))
+        panel_ui.name_profile.setText(self.current_profile)
+        self.show_panel_tasks(panel_ui, [])
+
+    def load_panel_tasks(self, panel_ui, start, end):
+        """Фоновая выборка ближайших задач с дедлайном в [start, end)"""
+        profile_id = self.current_profile_id
+        self.queries.read(
+            self.tasks_database,
+            lambda connection: deadlines.tasks_due_between(connection, profile_id, start, end),
+            lambda tasks: self.show_panel_tasks(panel_ui, tasks),
+            channel="panel"
+        )
+
+    def show_panel_tasks(self, panel_ui, tasks):
+        """Вывод задач на кнопки task_n1..task_n3"""
+        self.panel_task_ids = [task[0] for task in tasks]
+
+        buttons = [panel_ui.task_n1, panel_ui.task_n2, panel_ui.task_n3]
+        for i, button in enumerate(buttons):
+            if i < len(tasks):
+                _, name, deadline_at = tasks[i]
+                if deadline_at is None:
+                    button.setText(name)
+                else:
+                    button.setText(f"{name} — {deadlines.format_deadline(deadline_at)}")
+                button.setEnabled(True)
+            else:
+                button.setText("Нет задач")
+                button.setEnabled(False)
+
+    def open_panel_task(self, index):
+        if index < len(self.panel_task_ids):
+            self.open_editing_panel_with_task(self.panel_task_ids[index])
+
+    def open_last_task(self, kind, days):
+        """Открытие последней выполненной или проваленной задачи за days дней по журналу событий"""
+        profile_id = self.current_profile_id
+        since = deadlines.days_ago(days - 1)
+
+        def on_found(task_id):
+            if task_id is None:
+                QMessageBox.information(self, "Задачи", "За этот период таких задач нет.")
+            else:
+                self.open_editing_panel_with_task(task_id)
+
+        self.queries.read(
+            self.tasks_database,
+            lambda connection: task_history.last_task_with_event(connection, profile_id, kind, since),
+            on_found,
+            channel="panel"
+        )
+
+    ################################
+    ########### Графики ############
+    ################################
+
+    def open_graphics_tasks(self):
+        """Переход на экран графика задач по дням"""
+        self.stop_search()
+        self.graphics_tasks_ui = self.screens.show_screen("graphics_tasks")
+
+        profile_id = self.current_profile_id
+        first_day, last_day = analytics.chart_days()
+        # Сводные счётчики читаются по первичному ключу, без перебора задач
+        self.queries.read(
+            self.tasks_database,
+            lambda connection: analytics.daily_stats(connection, profile_id, first_day, last_day),
+            self.show_graphics_tasks,
+            channel="panel"
+        )
+
+    def setup_graphics_tasks(self, graphics_tasks_ui):
+        """Подключение кнопок экрана графиков при его построении"""
+        graphics_tasks_ui.back_to_main_panel.clicked.connect(self.return_to_main_panel)
+        graphics_tasks_ui.button_change_profile.clicked.connect(self.return_to_choise_profile)
+
+    def show_graphics_tasks(self, stats):
+        """Столбцы по дням: выполненные, проваленные и остальные задачи с дедлайном"""
+        import charts
+        labels = [analytics.date_of(day).strftime("%d") for day, *_ in stats]
+        charts.draw_bar_chart(self.graphics_tasks_ui.graphicsView, labels, [
+            ("Выполнено", "#4caf50", [completed for _, _, completed, _ in stats]),
+            ("Провалено", "#e53935", [failed for _, _, _, failed in stats]),
+            ("Ожидает", "#90a4ae", [due - completed - failed for _, due, completed, failed in stats]),
+        ])
+
+    ################################
+    ####### Проекты и тэги #########
+    ################################
+
+    def open_projects(self):
+        """Переход на экран проектов профиля"""
+        self.stop_search()
+        self.projects_ui = self.screens.show_screen("projects")
+        self.projects_ui.today_date.setText(deadlines.format_date(datetime.now()))
+        self.show_project_buttons(self.projects_ui, [], "открыто")
+
+        profile_id = self.current_profile_id
+        # Число открытых задач хранится в строке проекта и не пересчитывается
+        self.queries.read(
+            self.tasks_database,
+            lambda connection: projects.list_projects(connection, profile_id),
+            lambda rows: self.show_project_buttons(self.projects_ui, rows, "открыто"),
+            channel="panel"
+        )
+
+    def setup_projects(self, projects_ui):
+        """Подключение кнопок экрана проектов при его построении"""
+        projects_ui.project_n1.clicked.connect(lambda: self.open_project(0))
+        projects_ui.project_n2.clicked.connect(lambda: self.open_project(1))
+        projects_ui.project_n3.clicked.connect(lambda: self.open_project(2))
+        projects_ui.button_create_new_project.clicked.connect(self.create_project)
+        projects_ui.button_tags_of_projects.clicked.connect(self.open_search_tags)
+        projects_ui.button_change_profile.clicked.connect(self.return_to_choise_profile)
+        projects_ui.graphics_of_projects.clicked.connect(self.open_graphics_projects)
+
+    def show_project_buttons(self, panel_ui, rows, count_title):
+        """Вывод проектов (id, name, число задач) на кнопки project_n1..project_n3"""
+        self.project_ids = [(project_id, name) for project_id, name, _ in rows]
+
+        buttons = [panel_ui.project_n1, panel_ui.project_n2, panel_ui.project_n3]
+        for i, button in enumerate(buttons):
+            if i < len(rows):
+                _, name, count = rows[i]
+                button.setText(f"{name} — {count_title} {count}")
+                button.setEnabled(True)
+            else:
+                button.setText("Нет проектов")
+                button.setEnabled(False)
+
+    def create_project(self):
+        """Создание нового проекта текущего профиля"""
+        project_name, ok = QInputDialog.getText(self, "Создать проект", "Введите название проекта:")
+        project_name = project_name.strip()
+        if not ok or not project_name:
+            return
+
+        profile_id = self.current_profile_id
+
+        def on_error(error):
+            if isinstance(error, sqlite3.IntegrityError):
+                QMessageBox.warning(self, "Ошибка", f"Проект '{project_name}' уже существует.")
+            else:
+                self.show_query_error("projects", error_text(error))
+
+        self.queries.write(
+            self.tasks_database,
+            lambda connection: projects.create_project(connection, profile_id, project_name),
+            lambda _: self.open_projects(),
+            on_error
+        )
+
+    def open_project(self, index):
+        """Переход к папкам проекта с кнопки project_n1..project_n3"""
+        if index < len(self.project_ids):
+            self.current_project_id, project_name = self.project_ids[index]
+            self.open_custom_folders(project_name)
+
+    def open_custom_folders(self, project_name):
+        """Переход на экран папок открытого проекта"""
+        self.stop_search()
+        self.custom_folders_ui = self.screens.show_screen("custom_folders")
+        self.custom_folders_ui.today_date.setText(deadlines.format_date(datetime.now()))
+        self.custom_folders_ui.name_profile.setText(self.current_profile)
+        self.custom_folders_ui.name_of_project.setPlainText(project_name)
+        self.show_folders([])
+        self.load_folders()
+
+    def setup_custom_folders(self, custom_folders_ui):
+        """Подключение кнопок экрана папок при его построении"""
+        custom_folders_ui.custom_folder_n1.clicked.connect(lambda: self.open_folder(0))
+        custom_folders_ui.custom_folder_n2.clicked.connect(lambda: self.open_folder(1))
+        custom_folders_ui.custom_folder_n3.clicked.connect(lambda: self.open_folder(2))
+        custom_folders_ui.button_add_task.clicked.connect(self.create_folder)
+        custom_folders_ui.button_tags_of_tasks.clicked.connect(self.open_search_tags)
+        custom_folders_ui.back_to_main_panel.clicked.connect(self.return_to_main_panel)
+
+    def load_folders(self):
+        project_id = self.current_project_id
+        self.queries.read(
+            self.tasks_database,
+            lambda connection: projects.list_folders(connection, project_id),
+            self.show_folders,
+            channel="panel"
+        )
+
+    def show_folders(self, folders):
+        """Вывод папок проекта на кнопки custom_folder_n1..custom_folder_n3"""
+        self.folder_ids = [folder[0] for folder in folders]
+
+        buttons = [
+            self.custom_folders_ui.custom_folder_n1,
+            self.custom_folders_ui.custom_folder_n2,
+            self.custom_folders_ui.custom_folder_n3
+        ]
+        for i, button in enumerate(buttons):
+            if i < len(folders):
+                _, name, count = folders[i]
+                button.setText(f"{name} — открыто {count}")
+                button.setEnabled(True)
+            else:
+                button.setText("Нет папок")
+                button.setEnabled(False)
+
+    def create_folder(self):
+        """Создание папки в открытом проекте"""
+        folder_name, ok = QInputDialog.getText(self, "Создать папку", "Введите название папки:")
+        folder_name = folder_name.strip()
+        if not ok or not folder_name:
+            return
+
+        project_id = self.current_project_id
+
+        def on_error(error):
+            if isinstance(error, sqlite3.IntegrityError):
+                QMessageBox.warning(self, "Ошибка", f"Папка '{folder_name}' уже существует.")
+            else:
+                self.show_query_error("projects", error_text(error))
+
+        self.queries.write(
+            self.tasks_database,
+            lambda connection: projects.create_folder(connection, project_id, folder_name),
+            lambda _: self.load_folders(),
+            on_error
+        )
+
+    def open_folder(self, index):
+        """Новая задача в выбранной папке открытого проекта"""
+        if index < len(self.folder_ids):
+            self.open_editing_panel()
+            self.task_project_id, self.task_folder_id = self.current_project_id, self.folder_ids[index]
+
+    def open_search_tags(self):
+        """Переход на экран поиска по тэгам с облаком частых тэгов"""
+        self.stop_search()
+        self.search_tags_ui = self.screens.show_screen("search_tags")
+        self.search_tags_ui.today_date.setText(deadlines.format_date(datetime.now()))
+        self.search_tags_ui.name_profile.setText(self.current_profile)
+        self.show_tag_cloud([])
+
+        profile_id = self.current_profile_id
+        self.queries.read(
+            self.tasks_database,
+            lambda connection: tags.tag_cloud(connection, profile_id),
+            self.show_tag_cloud,
+            channel="panel"
+        )
+
+    def setup_search_tags(self, search_tags_ui):
+        """Подключение кнопок экрана поиска по тэгам при его построении"""
+        # В дизайнере поле запроса только для чтения
+        search_tags_ui.search_tags.setReadOnly(False)
+        search_tags_ui.search_tags.setPlaceholderText("#дом #срочно — все тэги, #дом | #работа — любой из них")
+        search_tags_ui.tag_n1.clicked.connect(lambda: self.search_cloud_tag(0))
+        search_tags_ui.tag_n2.clicked.connect(lambda: self.search_cloud_tag(1))
+        search_tags_ui.tag_n3.clicked.connect(lambda: self.search_cloud_tag(2))
+        search_tags_ui.come_back_2.clicked.connect(
+            lambda: self.search_tasks_by_tags(search_tags_ui.search_tags.toPlainText())
+        )
+        search_tags_ui.come_back.clicked.connect(self.return_to_main_panel)
+
+    def show_tag_cloud(self, cloud):
+        """Вывод самых частых тэгов (name, task_count) на кнопки tag_n1..tag_n3"""
+        self.cloud_tags = [name for name, _ in cloud]
+
+        buttons = [self.search_tags_ui.tag_n1, self.search_tags_ui.tag_n2, self.search_tags_ui.tag_n3]
+        for i, button in enumerate(buttons):
+            if i < len(cloud):
+                name, count = cloud[i]
+                button.setText(f"#{name} ({count})")
+                button.setEnabled(True)
+            else:
+                button.setText("Нет тэгов")
+                button.setEnabled(False)
+
+    def search_cloud_tag(self, index):
+        if index < len(self.cloud_tags):
+            self.search_tasks_by_tags(self.cloud_tags[index])
+
+    def search_tasks_by_tags(self, text):
+        """Поиск открытых задач по тэгам и переход на экран результатов"""
+        names, match_all = tags.parse_tag_query(text)
+        if not names:
+            QMessageBox.warning(self, "Ошибка", "Введите тэги для поиска, например: #дом #срочно.")
+            return
+
+        self.stop_search()
+        self.tags_of_the_projects_ui = self.screens.show_screen("tags_of_the_projects")
+        self.tags_of_the_projects_ui.today_date.setText(deadlines.format_date(datetime.now()))
+        self.tags_of_the_projects_ui.name_profile.setText(self.current_profile)
+        query = (" и " if match_all else " или ").join(f"#{name}" for name in names)
+        self.tags_of_the_projects_ui.tag_1.setText(f"Проекты: {query}")
+        self.tags_of_the_projects_ui.tag_2.setText(f"Задачи: {query}")
+        self.show_tagged_tasks(([], []))
+
+        profile_id = self.current_profile_id
+
+        def find_tasks(connection):
+            # Задачи ищутся по индексам task_tags, без просмотра текста задач
+            found = tags.search_by_tags(connection, profile_id, names, match_all)
+            return found, projects.rank_projects(connection, [task[2] for task in found])
+
+        self.queries.read(self.tasks_database, find_tasks, self.show_tagged_tasks, channel="panel")
+
+    def setup_tags_of_the_projects(self, tags_ui):
+        """Подключение кнопок экрана результатов поиска по тэгам при его построении"""
+        tags_ui.task_n1.clicked.connect(lambda: self.open_panel_task(0))
+        tags_ui.task_n2.clicked.connect(lambda: self.open_panel_task(1))
+        tags_ui.task_n3.clicked.connect(lambda: self.open_panel_task(2))
+        tags_ui.project_n1.clicked.connect(lambda: self.open_project(0))
+        tags_ui.project_n2.clicked.connect(lambda: self.open_project(1))
+        tags_ui.project_n3.clicked.connect(lambda: self.open_project(2))
+        tags_ui.come_back.clicked.connect(self.open_search_tags)
+
+    def show_tagged_tasks(self, result):
+        """Найденные задачи на кнопках task_n1..task_n3, их проекты — на project_n1..project_n3"""
+        found, ranked_projects = result
+        self.show_panel_tasks(self.tags_of_the_projects_ui, [(task_id, name, None) for task_id, name, _ in found])
+        self.show_project_buttons(self.tags_of_the_projects_ui, ranked_projects, "найдено")
+
+    def open_graphics_projects(self):
+        """Переход на график нагрузки по проектам"""
+        self.stop_search()
+        self.graphics_projects_ui = self.screens.show_screen("graphics_projects")
+
+        profile_id = self.current_profile_id
+        # Счётчики задач хранятся в строках проектов
+        self.queries.read(
+            self.tasks_database,
+            lambda connection: projects.project_load(connection, profile_id),
+            self.show_graphics_projects,
+            channel="panel"
+        )
+
+    def setup_graphics_projects(self, graphics_projects_ui):
+        graphics_projects_ui.back_to_main_panel.clicked.connect(self.open_projects)
+
+    def show_graphics_projects(self, load):
+        """Столбцы по проектам: открытые, выполненные и проваленные задачи"""
+        import charts
+        charts.draw_bar_chart(self.graphics_projects_ui.graphicsView, [name[:10] for name, *_ in load], [
+            ("Открыто", "#90a4ae", [open_count for _, open_count, _, _ in load]),
+            ("Выполнено", "#4caf50", [completed for _, _, completed, _ in load]),
+            ("Провалено", "#e53935", [failed for _, _, _, failed in load]),
+        ])
 
     def return_to_choise_profile(self):
         """Возврат на экран выбора профиля"""
-        self.choise_profile_ui.setupUi(self)
+        self.stop_search()
+        self.screens.show_screen("choise_profile")
         self.update_profile_buttons()
-        self.setup_choise_profile_signals()
 
     def open_editing_panel(self):
         """Переход на панель редактирования задачи"""
-        self.editing_panel_ui = EditingPanelUI()
-        self.editing_panel_ui.setupUi(self)
-
-        # Подключение кнопок на панели редактирования
-
-        self.editing_panel_ui.delete_task.clicked.connect(self.delete_task)
+        self.stop_search()
+        self.screens.show_screen("editing_panel")
+        self.reset_editing_panel()
 
+    def setup_editing_panel(self, editing_panel_ui):
+        """Подключение кнопок панели редактирования при её построении"""
+        self.editing_panel_ui = editing_panel_ui
         self.editing_panel_ui.add_task.clicked.connect(self.add_task)
         self.editing_panel_ui.save_task_change.clicked.connect(self.edit_task)
         ###self.editing_panel_ui.edit_task.clicked.connect(self.edit_task)
         ###self.editing_panel_ui.back_to_group_tasks.clicked.connect(self.return_to_group_tasks)
         self.editing_panel_ui.back_to_main_panel.clicked.connect(self.return_to_main_panel)
         self.editing_panel_ui.delete_task.clicked.connect(self.delete_task)
-        self.editing_panel_ui.add_complete.clicked.connect(self.delete_task)
+        self.editing_panel_ui.add_complete.clicked.connect(self.complete_task)
         self.editing_panel_ui.pushButton.clicked.connect(self.select_task_picture)
+        self.editing_panel_ui.pomodoro.clicked.connect(self.toggle_pomodoro)
+        self.editing_panel_ui.plan_time.clicked.connect(self.plan_task_time)
+
+    def reset_editing_panel(self):
+        """Возврат полей панели редактирования к виду из дизайнера"""
+        # retranslateUi заново выставляет тексты по умолчанию без пересоздания виджетов
+        self.editing_panel_ui.retranslateUi(self.screens.page("editing_panel"))
+        self.editing_panel_ui.task_picture.clear()
+        self.editing_panel_ui.pushButton.setFlat(False)
+        self.task_picture_key = None
+        self.task_project_id = self.task_folder_id = None
+        self.editing_task_id = self.editing_task_name = None
+        self.update_pomodoro_button()
 
     def return_to_group_tasks(self):
         """Возврат к экрану групп задач"""
@@ -239,6 +853,8 @@ class MainWindow(QMainWindow):
         self.editing_panel_ui.name_of_task.clear()
         self.editing_panel_ui.deadline_of_task.clear()
         self.editing_panel_ui.text_of_task.clear()
+        self.editing_panel_ui.task_picture.clear()
+        self.task_picture_key = None
         #self.editing_panel_ui.name_of_folder_with_task.clear()
 
 
@@ -247,83 +863,123 @@ class MainWindow(QMainWindow):
     ################################
 
     def search_tasks(self):
-        connection = sqlite3.connect(self.task_database)
-        cursor = connection.cursor()
-
-        try:
-            # Поиск задач, связанных с текущим профилем
-            query = """
-                SELECT id, name, deadline, description 
-                FROM tasks 
-                WHERE profile_name = ? AND (name LIKE ? OR description LIKE ?)
-            """
-            cursor.execute(query, (self.current_profile, f"%{self.main_panel_ui.Title.text()}%", f"%{self.main_panel_ui.Title.text()}%"))
-            results = cursor.fetchall()
-
-            # Очистка listWidget перед выводом новых результатов
-            self.main_panel_ui.listWidget.clear()
-
-            if results:
-                # Добавление результатов поиска в виде кнопок в listWidget
-                for task_id, task_name, deadline, description in results:
-                    task_button = QPushButton(task_name, self)
-                    task_button.clicked.connect(lambda _, t_id=task_id: self.open_editing_panel_with_task(t_id))
-
-                    # Добавление кнопки в listWidget
-                    item = QListWidgetItem()
-                    self.main_panel_ui.listWidget.addItem(item)
-                    self.main_panel_ui.listWidget.setItemWidget(item, task_button)
-            else:
-                QMessageBox.information(self, "Результаты поиска", "Задачи не найдены.")
-        finally:
-            connection.close()
+        # Поиск задач, связанных с текущим профилем, по полнотекстовому индексу
+        text = self.main_panel_ui.Title.text()
+        self.search_timer.stop()
+
+        cached = self.search_cache.lookup(self.current_profile_id, text)
+        if cached is not None and cached.ranked:
+            self.queries.cancel("search")
+            self.show_search_results(cached.task_ids, text, notify_empty=True)
+        else:
+            self.run_search_query(text, notify_empty=True)
+
+    def on_search_text_changed(self, text):
+        """Поиск по мере ввода в Title"""
+        # Результат запроса для прежнего текста уже не нужен
+        self.queries.cancel("search")
+
+        cached = self.search_cache.lookup(self.current_profile_id, text)
+        if cached is not None:
+            self.show_search_results(cached.task_ids, text, notify_empty=False)
+            if cached.ranked:
+                self.search_timer.stop()
+                return
+
+        # Запрос к базе — только после паузы во вводе
+        self.search_timer.start()
+
+    def run_live_search(self):
+        self.run_search_query(self.main_panel_ui.Title.text(), notify_empty=False)
+
+    def run_search_query(self, text, notify_empty):
+        """Поиск в фоне; новый поиск прерывает ещё не завершённый"""
+        profile_id = self.current_profile_id
+        generation = self.search_cache.generation
+
+        def on_found(documents):
+            cached = self.search_cache.put(profile_id, text, *documents, generation)
+            self.show_search_results(cached.task_ids, text, notify_empty)
+
+        self.queries.read(
+            self.tasks_database,
+            lambda connection: search_index.search_task_documents(connection, profile_id, text),
+            on_found,
+            channel="search"
+        )
 
-    def open_editing_panel_with_task(self, task_id):
-        """Открытие панели редактирования задачи с предзаполненными данными."""
-        self.editing_panel_ui = EditingPanelUI()
-        self.editing_panel_ui.setupUi(self)
+    def stop_search(self):
+        """Остановка поиска и выборок панелей при уходе с экрана"""
+        self.search_timer.stop()
+        self.queries.cancel("search")
+        self.queries.cancel("panel")
+
+    def on_database_written(self, database):
+        """Сброс закэшированных результатов поиска после изменения задач"""
+        if database == self.tasks_database:
+            self.search_cache.invalidate()
+
+    def show_search_results(self, task_ids, text, notify_empty=True):
+        """Передача найденных задач в модель списка"""
+        # Строки задач собираются моделью постранично при прокрутке listWidget:
+        # из памяти, а пока задачи профиля не прочитаны — из базы
+        if self.tasks.is_loaded:
+            fetch_page = lambda page_ids: self.tasks.page_rows(page_ids, text)
+        else:
+            connection = self.storage.connection(self.tasks_database)
+            fetch_page = lambda page_ids: search_index.fetch_tasks_page(connection, page_ids, text)
+        self.task_list_model.set_results(task_ids, fetch_page)
 
-        # Подключение кнопок на панели редактирования
-        self.editing_panel_ui.add_complete.clicked.connect(self.delete_task)
-        #self.editing_panel_ui.back_to_group_tasks.clicked.connect(self.return_to_group_tasks)
-        self.editing_panel_ui.back_to_main_panel.clicked.connect(self.return_to_main_panel)
-        self.editing_panel_ui.save_task_change.clicked.connect(self.edit_task)
-        self.editing_panel_ui.delete_task.clicked.connect(self.delete_task)
-        self.editing_panel_ui.pushButton.clicked.connect(self.select_task_picture)
+        if not task_ids and notify_empty:
+            QMessageBox.information(self, "Результаты поиска", "Задачи не найдены.")
 
+    def on_task_changed(self, record):
+        """Обновление строки задачи в списке; выполненная или проваленная задача из него уходит"""
+        if record.status == task_history.STATUS_OPEN:
+            self.task_list_model.refresh_task(record.id)
+        else:
+            self.task_list_model.remove_task(record.id)
 
-        # Загрузка данных задачи в поля редактирования
-        connection = sqlite3.connect(self.task_database)
-        cursor = connection.cursor()
+    def open_editing_panel_with_task(self, task_id):
+        """Открытие панели редактирования задачи с предзаполненными данными."""
+        self.stop_search()
+        self.screens.show_screen("editing_panel")
+        self.reset_editing_panel()
+        self.editing_task_id = task_id
+
+        record = self.tasks.get(task_id)
+        if record is not None:
+            self.show_task((record.name, record.deadline, record.description, record.picture))
+            return
 
-        try:
-            cursor.execute("SELECT name, deadline, description FROM tasks WHERE id = ?", (task_id,))
-            task = cursor.fetchone()
-            if task:
-                self.editing_panel_ui.name_of_task.setPlainText(task[0])
-                self.editing_panel_ui.deadline_of_task.setPlainText(task[1])
-                self.editing_panel_ui.text_of_task.setPlainText(task[2])
-        finally:
-            connection.close()
-
-    def init_tasks_table(self):
-        """Создание таблицы задач, если её нет"""
-        connection = sqlite3.connect(self.task_database)
-        cursor = connection.cursor()
-
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                profile_name TEXT NOT NULL,
-                name TEXT NOT NULL,
-                deadline TEXT,
-                description TEXT,
-                FOREIGN KEY(profile_name) REFERENCES profiles(name)
-            )
-        ''')
+        # Задачи профиля ещё читаются: данные задачи берутся из базы
+        self.queries.read(
+            self.tasks_database,
+            lambda connection: connection.execute(
+                "SELECT name, deadline, description, picture FROM tasks WHERE id = ?", (task_id,)
+            ).fetchone(),
+            self.show_task,
+            channel="task"
+        )
 
-        connection.commit()
-        connection.close()
+    def show_task(self, task):
+        """Заполнение полей редактирования загруженной задачей"""
+        if task:
+            self.editing_task_name = task[0]
+            self.editing_panel_ui.name_of_task.setPlainText(task[0])
+            self.editing_panel_ui.deadline_of_task.setPlainText(task[1])
+            self.editing_panel_ui.text_of_task.setPlainText(task[2])
+            if task[3]:
+                self.task_picture_key = task[3]
+                # Из QPixmapCache картинка показывается сразу, иначе — после фоновой загрузки
+                self.pictures.load(task[3], self.editing_panel_ui.task_picture.size(), self.show_task_picture)
+
+    def opened_task_id(self, task_name):
+        """id задачи, открытой на панели редактирования, если её название не меняли.
+
+        Иначе задача ищется по названию среди открытых (см. services.task_ids_by_name).
+        """
+        return self.editing_task_id if task_name == self.editing_task_name else None
 
     def add_task(self):
         """Добавление новой задачи для текущего профиля"""
@@ -337,26 +993,27 @@ class MainWindow(QMainWindow):
         description = self.editing_panel_ui.text_of_task.toPlainText().strip()
         #description = self.editing_panel_ui.text_of_task.text().strip()
 
-        if not task_name:
-            QMessageBox.warning(self, "Ошибка", "Название задачи не может быть пустым.")
+        try:
+            deadline_at = services.validate_task(task_name, deadline)
+        except ValueError as error:
+            QMessageBox.warning(self, "Ошибка", str(error))
             return
 
-        connection = sqlite3.connect(self.task_database)
-        cursor = connection.cursor()
-
-        try:
-            cursor.execute(
-                "INSERT INTO tasks (profile_name, name, deadline, description) VALUES (?, ?, ?, ?)",
-                (self.current_profile, task_name, deadline, description)
-            )
-            connection.commit()
+        def on_added(_):
             QMessageBox.information(self, "Успех", f"Задача '{task_name}' добавлена.")
             self.clear_task_data()
             self.return_to_main_panel()
-        except sqlite3.IntegrityError:
-            QMessageBox.warning(self, "Ошибка", "Произошла ошибка при добавлении задачи.")
-        finally:
-            connection.close()
+
+        def on_error(error):
+            if isinstance(error, sqlite3.IntegrityError):
+                QMessageBox.warning(self, "Ошибка", "Произошла ошибка при добавлении задачи.")
+            else:
+                self.show_query_error("tasks", error_text(error))
+
+        self.tasks.add(
+            task_name, deadline, deadline_at, description, self.task_picture_key,
+            self.task_project_id, self.task_folder_id, on_added, on_error
+        )
 
     def edit_task(self):
         """Редактирование существующей задачи"""
@@ -365,25 +1022,40 @@ class MainWindow(QMainWindow):
             return
 
         task_name = self.editing_panel_ui.name_of_task.toPlainText().strip()
-        deadline = self.editing_panel_ui.deadline_of_task.text().strip()
+        deadline = self.editing_panel_ui.deadline_of_task.toPlainText().strip()
         description = self.editing_panel_ui.text_of_task.toPlainText().strip()
 
+        try:
+            deadline_at = services.validate_task(task_name, deadline)
+        except ValueError as error:
+            QMessageBox.warning(self, "Ошибка", str(error))
+            return
+
+        self.tasks.update(
+            task_name, deadline, deadline_at, description, self.task_picture_key,
+            lambda _: QMessageBox.information(self, "Успех", f"Задача '{task_name}' обновлена."),
+            task_id=self.opened_task_id(task_name)
+        )
+
+    def complete_task(self):
+        """Отметка задачи выполненной: она уходит из списков открытых задач, но остаётся в истории"""
+        task_name = self.editing_panel_ui.name_of_task.toPlainText().strip()
+
         if not task_name:
             QMessageBox.warning(self, "Ошибка", "Название задачи не может быть пустым.")
             return
 
-        connection = sqlite3.connect(self.task_database)
-        cursor = connection.cursor()
+        def on_completed(records):
+            if not records:
+                QMessageBox.warning(self, "Ошибка", f"Открытая задача '{task_name}' не найдена.")
+                return
+            QMessageBox.information(self, "Успех", f"Задача '{task_name}' выполнена.")
+            self.clear_task_data()
+            self.return_to_main_panel()
 
-        try:
-            cursor.execute(
-                "UPDATE tasks SET deadline = ?, description = ? WHERE profile_name = ? AND name = ?",
-                (deadline, description, self.current_profile, task_name)
-            )
-            connection.commit()
-            QMessageBox.information(self, "Успех", f"Задача '{task_name}' обновлена.")
-        finally:
-            connection.close()
+        self.tasks.set_status(
+            task_name, task_history.STATUS_COMPLETED, on_completed, task_id=self.opened_task_id(task_name)
+        )
 
     def delete_task(self):
         task_name = self.editing_panel_ui.name_of_task.toPlainText().strip()
@@ -392,29 +1064,126 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Название задачи не может быть пустым.")
             return
 
-        result = QMessageBox.question(
-            self,
-            "Удаление задачи",
-            f"Вы уверены, что хотите удалить задачу '{task_name}'?",
-            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-        )
-        if result == QMessageBox.StandardButton.No:
+        # Без подтверждения: удаление отменяется через Ctrl+Z
+        def on_deleted(_):
+            QMessageBox.information(self, "Успех", f"Задача '{task_name}' удалена. Отменить — Ctrl+Z.")
+            self.clear_task_data()
+            self.return_to_main_panel()
+
+        self.tasks.delete(task_name, on_deleted, task_id=self.opened_task_id(task_name))
+
+    def undo_task_change(self):
+        """Отмена последнего изменения задач текущего профиля"""
+        if self.current_profile:
+            self.tasks.undo(lambda label: self.show_task_change(label, "Отменено", "Нечего отменять."))
+
+    def redo_task_change(self):
+        """Повтор последнего отменённого изменения задач"""
+        if self.current_profile:
+            self.tasks.redo(lambda label: self.show_task_change(label, "Повторено", "Нечего повторять."))
+
+    def show_task_change(self, label, title, empty_message):
+        if label is None:
+            QMessageBox.information(self, title, empty_message)
             return
+        QMessageBox.information(self, title, f"{title}: {label}.")
+        # Вернувшиеся задачи попадают в список только через новый поиск
+        if self.screens.current_name() == "main_panel":
+            self.run_search_query(self.main_panel_ui.Title.text(), notify_empty=False)
 
-        connection = sqlite3.connect(self.task_database)
-        cursor = connection.cursor()
+    def find_open_task(self):
+        """Открытая задача с названием из поля редактирования или None с предупреждением"""
+        task_name = self.editing_panel_ui.name_of_task.toPlainText().strip()
+        if not task_name:
+            QMessageBox.warning(self, "Ошибка", "Название задачи не может быть пустым.")
+            return None
+        for record in self.tasks.find(task_name):
+            if record.status == task_history.STATUS_OPEN:
+                return record
+        QMessageBox.warning(self, "Ошибка", f"Открытая задача '{task_name}' не найдена. Сначала добавьте её.")
+        return None
+
+    def toggle_pomodoro(self):
+        """Запуск помидоров по открытой задаче или остановка идущей серии"""
+        if self.pomodoro.is_running:
+            task_name = self.pomodoro.task_name
+            minutes = self.pomodoro.stop() // 60
+            self.update_pomodoro_button()
+            QMessageBox.information(
+                self, "Помидор", f"Помидоры по задаче '{task_name}' остановлены. Учтено работы: {minutes} мин."
+            )
+            return
+
+        record = self.find_open_task()
+        if record is not None:
+            self.pomodoro.start(self.tasks_database, self.current_profile_id, record.id, record.name)
+
+    def update_pomodoro_button(self):
+        """Надпись кнопки помидора: что идёт сейчас и до какого времени"""
+        if self.screens.current_name() != "editing_panel":
+            return
+        if not self.pomodoro.is_running:
+            self.editing_panel_ui.pomodoro.setText("Начать помидор")
+            return
+        ends_at = self.pomodoro.phase_ends_at
+        title = "Помидор" if self.pomodoro.kind == KIND_FOCUS else "Перерыв"
+        self.editing_panel_ui.pomodoro.setText(f"{title} до {deadlines.from_timestamp(ends_at):%H:%M} — стоп")
+
+    def show_pomodoro_phase(self, kind, task_name):
+        if kind == KIND_FOCUS:
+            QMessageBox.information(self, "Помидор", f"Помидор по задаче '{task_name}' закончен, время перерыва.")
+        else:
+            QMessageBox.information(self, "Помидор", f"Перерыв закончен, возвращайтесь к задаче '{task_name}'.")
+
+    def plan_task_time(self):
+        """Блок времени для открытой задачи: начало и длительность вводятся в диалогах"""
+        record = self.find_open_task()
+        if record is None:
+            return
 
+        start, ok = QInputDialog.getText(
+            self, "Время на задачу", f"Начало ({deadlines.DEADLINE_PLACEHOLDER}):",
+            text=deadlines.format_deadline(deadlines.now_timestamp() + 3600)
+        )
+        if not ok:
+            return
         try:
-            cursor.execute(
-                "DELETE FROM tasks WHERE profile_name = ? AND name = ?",
-                (self.current_profile, task_name)
-            )
-            connection.commit()
-            QMessageBox.information(self, "Успех", f"Задача '{task_name}' удалена.")
-            self.clear_task_data()
-            self.return_to_main_panel()
-        finally:
-            connection.close()
+            starts_at = deadlines.parse_deadline(start)
+        except ValueError:
+            starts_at = None
+        if starts_at is None:
+            QMessageBox.warning(self, "Ошибка", "Не удалось распознать время. Укажите его в формате ЧЧ:ММ, ДД/ММ/ГГГГ.")
+            return
+        minutes, ok = QInputDialog.getInt(self, "Время на задачу", "Длительность, мин:", 60, 5, 24 * 60, 5)
+        if not ok:
+            return
+
+        self.time_blocks.add(
+            record.id, record.name, starts_at, starts_at + minutes * 60,
+            lambda _: QMessageBox.information(
+                self, "Успех",
+                f"На задачу '{record.name}' отведено {minutes} мин с {deadlines.format_deadline(starts_at)}. "
+                f"Напоминание придёт за {REMINDER_LEAD_MINUTES} мин."
+            ),
+            lambda error: QMessageBox.warning(self, "Ошибка", str(error))
+        )
+
+    def show_block_reminder(self, task_id, task_name, starts_at):
+        QMessageBox.information(
+            self, "Блок времени",
+            f"В {deadlines.from_timestamp(starts_at):%H:%M} начинается время задачи '{task_name}'."
+        )
+
+    def show_deadline_reminder(self, tasks):
+        lines = "\n".join(f"'{name}' — до {deadlines.format_deadline(deadline_at)}" for _, name, deadline_at in tasks)
+        QMessageBox.information(self, "Скоро дедлайн", lines)
+
+    def show_failed_tasks(self, names):
+        """Сообщение о просроченных задачах; в длинном списке — первые FAILED_NAMES_SHOWN названий"""
+        lines = [f"'{name}'" for name in names[:FAILED_NAMES_SHOWN]]
+        if len(names) > FAILED_NAMES_SHOWN:
+            lines.append(f"и ещё {len(names) - FAILED_NAMES_SHOWN}")
+        QMessageBox.information(self, "Срок истёк", "Задачи просрочены и отмечены проваленными:\n" + "\n".join(lines))
 
     ##  Интерфейс для отображения задач нужно переделать ##
 
@@ -424,35 +1193,27 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Ошибка", "Сначала выберите профиль.")
             return
 
-        connection = sqlite3.connect(self.task_database)
-        cursor = connection.cursor()
-
-        try:
-            cursor.execute("SELECT name, deadline, description FROM tasks WHERE profile_name = ?",
-                           (self.current_profile,))
-            tasks = cursor.fetchall()
-
-            # Пример: отобразить задачи в UI
-            for task in tasks:
-                print(f"Название: {task[0]}, Дедлайн: {task[1]}, Описание: {task[2]}")
-        finally:
-            connection.close()
+        # Пример: отобразить задачи в UI
+        for task in self.tasks.records():
+            print(f"Название: {task.name}, Дедлайн: {task.deadline}, Описание: {task.description}")
 
     def log_in_another_profile(self):
-        QMessageBox.information(self, "Войти в другой профиль", "Функция: Вход в другой профиль.")
+        """Вход в любой профиль через окно поиска по имени"""
+        if not self.profile_names:
+            QMessageBox.warning(self, "Ошибка", "Нет профилей. Сначала зарегистрируйтесь.")
+            return
+
+        from profile_picker import choose_profile
+        profile_id = choose_profile(self.profile_names, self)
+        if profile_id is not None:
+            self.set_current_profile(profile_id)
+            self.open_main_panel()
 
 
     def delete_all_profiles(self):
         """Удаление всех профилей"""
-        connection = sqlite3.connect(self.prof_database)
-        cursor = connection.cursor()
-
-        cursor.execute("SELECT COUNT(*) FROM profiles")
-        profile_count = cursor.fetchone()[0]
-
-        if profile_count == 0:
+        if not self.profile_names:
             QMessageBox.warning(self, "Ошибка", "Нет профилей для удаления.")
-            connection.close()
             return
 
         result = QMessageBox.question(
@@ -463,13 +1224,21 @@ class MainWindow(QMainWindow):
         )
 
         if result == QMessageBox.StandardButton.Yes:
-            cursor.execute("DELETE FROM profiles")
-            connection.commit()
-            QMessageBox.information(self, "Успех", "Все профили удалены.")
-            self.current_profile = None
-            self.update_profile_buttons()
-
-        connection.close()
+            self.set_current_profile(None)
+
+            def on_deleted(shard_files):
+                self.profile_names.clear()
+                self.sharded_profiles.clear()
+                for shard in shard_files:
+                    shards.remove_shard(shard, self.storage)
+                QMessageBox.information(self, "Успех", "Все профили удалены.")
+                self.show_profile_buttons()
+
+            self.queries.write(
+                self.database,
+                services.delete_all_profiles,
+                on_deleted
+            )
 
 
     def log_in_profile(self):
@@ -491,19 +1260,54 @@ class MainWindow(QMainWindow):
 
         # Если пользователь выбрал файл
         if file_path:
-            pixmap = QPixmap(file_path)
-
-            # Проверка: изображение должно соответствовать размеру task_picture
-            if self.editing_panel_ui.task_picture.size().isValid():
-                pixmap = pixmap.scaled(
-                    self.editing_panel_ui.task_picture.size()
-                )
-
-            # Установка изображения в QLabel
-            self.editing_panel_ui.task_picture.setPixmap(pixmap)
+            # Копирование в хранилище и уменьшение до размера task_picture идут в фоне;
+            # картинка сохраняется вместе с задачей при добавлении или сохранении
+            self.pictures.import_file(file_path, self.editing_panel_ui.task_picture.size(), self.show_task_picture)
+
+    def show_task_picture(self, key, pixmap):
+        """Установка загруженной картинки в task_picture"""
+        self.task_picture_key = key
+        self.editing_panel_ui.task_picture.setPixmap(pixmap)
+        # Кнопка выбора лежит поверх картинки и не должна её закрывать
+        self.editing_panel_ui.pushButton.setFlat(True)
+        self.editing_panel_ui.pushButton.setText("")
+
+    def run_maintenance(self):
+        """Обслуживание основной базы и файла задач текущего профиля"""
+        for database in {self.database, self.tasks_database}:
+            self.queries.maintain(database, storage.maintain)
+
+    def show_diagnostics(self):
+        from diagnostics_panel import show_diagnostics
+        show_diagnostics(self)
+
+    def show_query_error(self, channel, message):
+        """Сообщение об ошибке фонового запроса"""
+        QMessageBox.warning(self, "Ошибка базы данных", message)
+
+    def closeEvent(self, event):
+        """Закрытие соединений с базами данных при выходе"""
+        self.pictures.shutdown()
+        # Незавершённый помидор и накопленные отрезки времени записываются до закрытия баз
+        self.pomodoro.stop()
+        self.time_tracker.flush()
+        self.queries.shutdown()
+        self.storage.close_all()
+        if diagnostics.ENABLED:
+            try:
+                diagnostics.dump()
+            except OSError:
+                pass
+        super().closeEvent(event)
 
 if __name__ == "__main__":
+    startup.mark("импорт модулей")
     app = QApplication(sys.argv)
+    startup.mark("QApplication")
     window = MainWindow()
     window.show()
+    startup.mark("показ окна")
+    # Отчёт — после первой отрисовки, когда цикл событий обработал show()
+    if startup.ENABLED:
+        QTimer.singleShot(0, lambda: (startup.mark("первая отрисовка"), startup.report()))
     sys.exit(app.exec())
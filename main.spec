@@ -1,16 +1,24 @@
 # -*- mode: python ; coding: utf-8 -*-
+# Сборка для быстрого запуска: onedir (без распаковки во временную папку при
+# каждом старте) и без UPX (библиотеки Qt не распаковываются в память).
+# Формы экранов загружаются из static/ui во время работы (см. forms.py);
+# их кэш заполняется здесь и входит в сборку, чтобы uic не работал при запуске.
+import sys
+sys.path.insert(0, SPECPATH)
+import forms
+forms.compile_all()
 
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('static/ui/*.ui', 'static/ui'), ('static/ui/__pycache__/*.bin', 'static/ui/__pycache__')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['tkinter'],
     noarchive=False,
     optimize=0,
 )
@@ -19,16 +27,13 @@ pyz = PYZ(a.pure)
 exe = EXE(
     pyz,
     a.scripts,
-    a.binaries,
-    a.datas,
     [],
+    exclude_binaries=True,
     name='main',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
+    upx=False,
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -36,3 +41,12 @@ exe = EXE(
     codesign_identity=None,
     entitlements_file=None,
 )
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='main',
+)
@@ -0,0 +1,185 @@
+import os
+import sqlite3
+
+import analytics
+import deadlines
+import projects
+import search_index
+import tags
+import task_history
+import task_journal
+import time_tracking
+from storage import PROFILES_DB, TASKS_DB
+
+
+def _create_schema(connection):
+    """Версия 1: профили и задачи в одной базе, задачи ссылаются на profiles.id.
+
+    Данные переносятся из прежних баз, подключённых как legacy_profiles и
+    legacy_tasks, если они есть.
+    """
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        )
+    ''')
+    connection.execute('''
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            deadline TEXT,
+            description TEXT
+        )
+    ''')
+    # Поиск задачи по имени внутри профиля и выборка профиля по дедлайну
+    connection.execute("CREATE INDEX IF NOT EXISTS tasks_profile_name ON tasks (profile_id, name)")
+    connection.execute("CREATE INDEX IF NOT EXISTS tasks_profile_deadline ON tasks (profile_id, deadline)")
+
+    if _has_table(connection, "legacy_profiles", "profiles"):
+        connection.execute('''
+            INSERT OR IGNORE INTO profiles (id, name)
+            SELECT id, name FROM legacy_profiles.profiles ORDER BY id
+        ''')
+    if _has_table(connection, "legacy_tasks", "tasks"):
+        # Задачи удалённых профилей в старой базе недостижимы и не переносятся
+        connection.execute('''
+            INSERT OR IGNORE INTO tasks (id, profile_id, name, deadline, description)
+            SELECT legacy.id, profiles.id, legacy.name, legacy.deadline, legacy.description
+            FROM legacy_tasks.tasks AS legacy
+            JOIN profiles ON profiles.name = legacy.profile_name
+            ORDER BY legacy.id
+        ''')
+
+
+def _create_search_index(connection):
+    """Версия 2: полнотекстовый индекс задач"""
+    search_index.create_search_index(connection)
+
+
+def _add_deadline_at(connection):
+    """Версия 3: дедлайн в секундах и индекс для выборок по диапазону дат.
+
+    Текстовые дедлайны прежних задач разбираются один раз здесь; индекс по
+    тексту дедлайна заменяется индексом по deadline_at.
+    """
+    connection.execute("ALTER TABLE tasks ADD COLUMN deadline_at INTEGER")
+    deadlines.fill_deadline_column(connection)
+    connection.execute("CREATE INDEX tasks_profile_deadline_at ON tasks (profile_id, deadline_at)")
+    connection.execute("DROP INDEX IF EXISTS tasks_profile_deadline")
+
+
+def _add_picture(connection):
+    """Версия 4: ключ картинки задачи в хранилище pictures"""
+    connection.execute("ALTER TABLE tasks ADD COLUMN picture TEXT")
+
+
+def _create_summary_tables(connection):
+    """Версия 5: сводные счётчики задач по дням для графиков"""
+    analytics.create_summary_tables(connection)
+
+
+def _add_task_history(connection):
+    """Версия 6: статус задачи, журнал событий и частичные индексы открытых задач"""
+    task_history.create_task_history(connection)
+    analytics.add_status_counters(connection)
+
+
+def _create_projects_and_tags(connection):
+    """Версия 7: проекты, папки, тэги и связь задач с тэгами"""
+    projects.create_projects(connection)
+    tags.create_tags(connection)
+
+
+def _add_profile_shards(connection):
+    """Версия 8: флаг профиля, задачи которого хранятся в отдельном файле (shards)"""
+    connection.execute("ALTER TABLE profiles ADD COLUMN sharded INTEGER NOT NULL DEFAULT 0")
+
+
+def _create_task_journal(connection):
+    """Версия 9: журнал операций над задачами для отмены и повтора"""
+    task_journal.create_task_journal(connection)
+
+
+def _create_time_tracking(connection):
+    """Версия 10: учёт времени по задачам и блоки времени"""
+    time_tracking.create_time_tracking(connection)
+
+
+def _add_open_tag_counts(connection):
+    """Версия 11: число открытых задач тэга для облака тэгов"""
+    tags.add_open_counts(connection)
+
+
+# Шаги миграции по порядку: номер версии схемы равен позиции шага + 1
+MIGRATIONS = [
+    _create_schema,
+    _create_search_index,
+    _add_deadline_at,
+    _add_picture,
+    _create_summary_tables,
+    _add_task_history,
+    _create_projects_and_tags,
+    _add_profile_shards,
+    _create_task_journal,
+    _create_time_tracking,
+    _add_open_tag_counts,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def _has_table(connection, schema, table):
+    try:
+        return connection.execute(
+            f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone() is not None
+    except sqlite3.OperationalError:
+        # База со старыми данными не подключена
+        return False
+
+
+def schema_version(connection):
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(connection, legacy_profiles=PROFILES_DB, legacy_tasks=TASKS_DB):
+    """Обновление схемы базы данных до SCHEMA_VERSION.
+
+    Текущая версия хранится в PRAGMA user_version; каждый недостающий шаг
+    выполняется в своей транзакции вместе с записью нового номера версии,
+    поэтому прерванная миграция продолжится с того же шага. Данные из
+    прежних файлов profiles.db и tasks.db переносятся при создании схемы,
+    сами файлы не изменяются. Возвращает итоговую версию схемы.
+    """
+    version = schema_version(connection)
+    if version >= SCHEMA_VERSION:
+        return version
+
+    # ATTACH нельзя выполнять внутри транзакции
+    attached = []
+    if version == 0:
+        for schema, path in (("legacy_profiles", legacy_profiles), ("legacy_tasks", legacy_tasks)):
+            if path and os.path.exists(path):
+                connection.execute("ATTACH DATABASE ? AS " + schema, (path,))
+                attached.append(schema)
+
+    try:
+        for step_version, step in enumerate(MIGRATIONS, start=1):
+            if step_version <= version:
+                continue
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                step(connection)
+                connection.execute(f"PRAGMA user_version = {step_version}")
+            except BaseException:
+                connection.rollback()
+                raise
+            connection.commit()
+            version = step_version
+    finally:
+        for schema in attached:
+            connection.execute("DETACH DATABASE " + schema)
+
+    return version
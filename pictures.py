@@ -0,0 +1,171 @@
+import hashlib
+import itertools
+import os
+import shutil
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, QSize, QThreadPool, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QImageReader, QPixmap, QPixmapCache
+
+from storage import DB_DIR
+
+
+# Оригиналы картинок задач, имя файла — sha256 содержимого и расширение
+PICTURES_DIR = os.path.join(DB_DIR, "pictures")
+# Уменьшенные копии: <имя оригинала>.<ширина>x<высота>.png
+THUMBNAILS_DIR = os.path.join(DB_DIR, "thumbnails")
+# Объём QPixmapCache в килобайтах
+PIXMAP_CACHE_KB = 32 * 1024
+LOADER_THREADS = 2
+_HASH_CHUNK = 1 << 20
+
+
+def import_picture(path):
+    """Копирование картинки в хранилище по хэшу содержимого; возвращает её ключ.
+
+    Одинаковые файлы хранятся один раз, сколько бы задач на них ни ссылалось.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+
+    key = digest.hexdigest() + os.path.splitext(path)[1].lower()
+    target = os.path.join(PICTURES_DIR, key)
+    if not os.path.exists(target):
+        os.makedirs(PICTURES_DIR, exist_ok=True)
+        _copy_atomic(path, target)
+    return key
+
+
+def thumbnail_path(key, size):
+    return os.path.join(THUMBNAILS_DIR, f"{key}.{size.width()}x{size.height()}.png")
+
+
+def load_thumbnail(key, size):
+    """Уменьшенная копия картинки key, вписанная в size, как QImage.
+
+    Готовая копия читается с диска; иначе оригинал декодируется сразу в
+    нужном размере (QImageReader.setScaledSize), и результат сохраняется
+    для следующих открытий. Выполняется вне потока интерфейса: QImage, в
+    отличие от QPixmap, можно создавать в любом потоке.
+    """
+    path = thumbnail_path(key, size)
+    if os.path.exists(path):
+        image = QImageReader(path).read()
+        if not image.isNull():
+            return image
+
+    reader = QImageReader(os.path.join(PICTURES_DIR, key))
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid():
+        reader.setScaledSize(original.scaled(size, Qt.AspectRatioMode.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        raise OSError(f"Не удалось прочитать картинку {key}: {reader.errorString()}")
+
+    os.makedirs(THUMBNAILS_DIR, exist_ok=True)
+    temporary = path + ".tmp"
+    if image.save(temporary, "PNG"):
+        os.replace(temporary, path)
+    return image
+
+
+def _copy_atomic(source, target):
+    temporary = target + ".tmp"
+    shutil.copyfile(source, temporary)
+    os.replace(temporary, target)
+
+
+def _cache_key(key, size):
+    return f"task_picture:{key}:{size.width()}x{size.height()}"
+
+
+class _PictureTask(QRunnable):
+    """Импорт и/или декодирование картинки в потоке из пула"""
+
+    def __init__(self, loader, ticket, key, path, size):
+        super().__init__()
+        self.loader = loader
+        self.ticket = ticket
+        self.key = key
+        self.path = path
+        self.size = size
+
+    def run(self):
+        if self.ticket != self.loader._current:
+            return
+        try:
+            key = self.key if self.path is None else import_picture(self.path)
+            image = load_thumbnail(key, self.size)
+        except OSError as error:
+            self.loader._failed.emit(self.ticket, str(error))
+        except Exception as error:
+            # Непредвиденная ошибка доходит до load_failed вместе с трассировкой стека
+            self.loader._failed.emit(self.ticket, "".join(traceback.format_exception(error)))
+        else:
+            self.loader._loaded.emit(self.ticket, key, self.size, image)
+
+
+class PictureLoader(QObject):
+    """Загрузка картинок задач вне потока интерфейса.
+
+    Три уровня: QPixmapCache в памяти (LRU, ответ сразу), уменьшенные копии
+    на диске и декодирование оригинала. Показывается только результат
+    последнего запроса: картинку ранее открытой задачи новый запрос вытесняет.
+    """
+
+    _loaded = pyqtSignal(int, str, QSize, QImage)
+    _failed = pyqtSignal(int, str)
+
+    # Ошибка чтения или импорта картинки: текст ошибки (у непредвиденной — с трассировкой)
+    load_failed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        QPixmapCache.setCacheLimit(PIXMAP_CACHE_KB)
+        self._tickets = itertools.count(1)
+        self._current = 0
+        self._on_loaded = None
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(LOADER_THREADS)
+        self._loaded.connect(self._deliver)
+        self._failed.connect(self._deliver_error)
+
+    def load(self, key, size, on_loaded):
+        """Картинка key, вписанная в size: on_loaded(key, pixmap)"""
+        pixmap = QPixmapCache.find(_cache_key(key, size))
+        if pixmap is not None:
+            self.cancel()
+            on_loaded(key, pixmap)
+            return
+        self._start(key, None, size, on_loaded)
+
+    def import_file(self, path, size, on_loaded):
+        """Сохранение выбранного файла в хранилище и его загрузка: on_loaded(key, pixmap)"""
+        self._start(None, path, size, on_loaded)
+
+    def cancel(self):
+        self._current = next(self._tickets)
+        self._on_loaded = None
+
+    def shutdown(self):
+        self.cancel()
+        self._pool.waitForDone()
+
+    def _start(self, key, path, size, on_loaded):
+        self._current = next(self._tickets)
+        self._on_loaded = on_loaded
+        self._pool.start(_PictureTask(self, self._current, key, path, QSize(size)))
+
+    def _deliver(self, ticket, key, size, image):
+        # QPixmap создаётся только в потоке интерфейса
+        pixmap = QPixmap.fromImage(image)
+        QPixmapCache.insert(_cache_key(key, size), pixmap)
+        if ticket == self._current and self._on_loaded is not None:
+            self._on_loaded(key, pixmap)
+
+    def _deliver_error(self, ticket, message):
+        if ticket == self._current:
+            self.load_failed.emit(message)
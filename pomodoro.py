@@ -0,0 +1,203 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+
+import deadlines
+import time_tracking
+from time_tracking import KIND_BREAK, KIND_FOCUS
+
+
+# Длительность помидора и перерывов, мин; после LONG_BREAK_EVERY помидоров — длинный перерыв
+FOCUS_MINUTES = 25
+SHORT_BREAK_MINUTES = 5
+LONG_BREAK_MINUTES = 15
+LONG_BREAK_EVERY = 4
+# За сколько минут до начала блока времени приходит напоминание
+REMINDER_LEAD_MINUTES = 5
+# Отрезки учёта времени копятся в памяти и записываются пачкой: не позже чем через
+# FLUSH_DELAY_SECONDS после первого из них или сразу, когда их FLUSH_SIZE
+FLUSH_DELAY_SECONDS = 60
+FLUSH_SIZE = 50
+
+
+class TimeTracker(QObject):
+    """Отрезки учёта времени с пакетной записью в time_entries.
+
+    Завершённый отрезок не пишется в базу сразу: отрезки копятся и
+    уходят одной записью QueryRunner (один executemany в одной
+    транзакции) по вызову планировщика или при выходе (flush()).
+    """
+
+    def __init__(self, queries, scheduler, parent=None):
+        super().__init__(parent)
+        self.queries = queries
+        self.scheduler = scheduler
+        # Файл базы -> отрезки (profile_id, task_id, kind, started_at, ended_at)
+        self._pending = {}
+        self._flush_call = None
+
+    def record(self, database, profile_id, task_id, kind, started_at, ended_at):
+        if ended_at <= started_at:
+            return
+        self._pending.setdefault(database, []).append((profile_id, task_id, kind, started_at, ended_at))
+        if sum(map(len, self._pending.values())) >= FLUSH_SIZE:
+            self.flush()
+        elif self._flush_call is None:
+            self._flush_call = self.scheduler.call_later(FLUSH_DELAY_SECONDS, self.flush)
+
+    def flush(self):
+        """Запись накопленных отрезков: по одной записи на файл базы"""
+        self.scheduler.cancel(self._flush_call)
+        self._flush_call = None
+        pending, self._pending = self._pending, {}
+        for database, entries in pending.items():
+            self.queries.write(database, lambda connection, entries=entries: time_tracking.add_entries(connection, entries))
+
+
+class PomodoroTimer(QObject):
+    """Помидоры по одной задаче: работа и перерывы сменяют друг друга до stop().
+
+    Конец фазы — один вызов в общем планировщике, а не свой таймер;
+    каждая фаза записывается отрезком в TimeTracker.
+    """
+
+    # Началась фаза: (вид, время окончания в секундах deadlines)
+    phase_started = pyqtSignal(str, int)
+    # Закончилась фаза: (вид, название задачи); следующая к этому времени уже идёт
+    phase_finished = pyqtSignal(str, str)
+
+    def __init__(self, scheduler, tracker, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.tracker = tracker
+        self.database = self.profile_id = self.task_id = self.task_name = None
+        self.kind = None
+        self._started_at = None
+        self._call = None
+        self._focus_count = 0
+        # Учтённое время работы с начала серии, с
+        self._focus_seconds = 0
+
+    @property
+    def is_running(self):
+        return self.task_id is not None
+
+    @property
+    def phase_ends_at(self):
+        return self._call.when if self._call is not None else None
+
+    def start(self, database, profile_id, task_id, task_name):
+        """Новая серия помидоров по задаче; прежняя серия останавливается"""
+        self.stop()
+        self.database, self.profile_id, self.task_id, self.task_name = database, profile_id, task_id, task_name
+        self._focus_count = 0
+        self._focus_seconds = 0
+        self._begin(KIND_FOCUS, deadlines.now_timestamp())
+
+    def stop(self):
+        """Остановка серии; незавершённая фаза учитывается до текущего момента. Возвращает секунды работы"""
+        if not self.is_running:
+            return 0
+        self.scheduler.cancel(self._call)
+        self._call = None
+        self._finish(deadlines.now_timestamp())
+        self.database = self.profile_id = self.task_id = self.task_name = self.kind = None
+        return self._focus_seconds
+
+    def _begin(self, kind, started_at):
+        if kind == KIND_FOCUS:
+            minutes = FOCUS_MINUTES
+        elif self._focus_count % LONG_BREAK_EVERY == 0:
+            minutes = LONG_BREAK_MINUTES
+        else:
+            minutes = SHORT_BREAK_MINUTES
+        self.kind, self._started_at = kind, started_at
+        ends_at = started_at + minutes * 60
+        self._call = self.scheduler.call_at(ends_at, self._on_phase_end)
+        self.phase_started.emit(kind, ends_at)
+
+    def _finish(self, ended_at):
+        self.tracker.record(self.database, self.profile_id, self.task_id, self.kind, self._started_at, ended_at)
+        if self.kind == KIND_FOCUS:
+            self._focus_seconds += max(0, ended_at - self._started_at)
+
+    def _on_phase_end(self):
+        kind, ended_at = self.kind, self._call.when
+        self._call = None
+        self._finish(ended_at)
+        if kind == KIND_FOCUS:
+            self._focus_count += 1
+        # После сна компьютера фаза могла закончиться давно: следующая считается от текущего момента
+        self._begin(KIND_BREAK if kind == KIND_FOCUS else KIND_FOCUS, max(ended_at, deadlines.now_timestamp()))
+        self.phase_finished.emit(kind, self.task_name)
+
+
+class BlockReminders(QObject):
+    """Напоминания о блоках времени текущего профиля.
+
+    Не закончившиеся блоки читаются при входе в профиль, и каждый
+    ставится в общий планировщик вызовом за REMINDER_LEAD_MINUTES до
+    начала; тысячи блоков по-прежнему стоят одного таймера.
+    """
+
+    # Скоро начнётся блок: (id задачи, название задачи, начало блока)
+    block_starting = pyqtSignal(int, str, int)
+
+    def __init__(self, queries, scheduler, parent=None):
+        super().__init__(parent)
+        self.queries = queries
+        self.scheduler = scheduler
+        self.database = None
+        self.profile_id = None
+        # id блока -> вызов напоминания в планировщике
+        self._calls = {}
+
+    def load(self, database, profile_id):
+        """Напоминания о блоках профиля; прежние напоминания снимаются"""
+        self.queries.cancel("time_blocks")
+        for call in self._calls.values():
+            self.scheduler.cancel(call)
+        self._calls = {}
+        self.database, self.profile_id = database, profile_id
+        if profile_id is None:
+            return
+
+        self.queries.read(
+            database,
+            lambda connection: time_tracking.upcoming_blocks(connection, profile_id, deadlines.now_timestamp()),
+            self._schedule_all,
+            channel="time_blocks"
+        )
+
+    def add(self, task_id, task_name, starts_at, ends_at, on_added=None, on_error=None):
+        """Новый блок времени задачи текущего профиля"""
+        database, profile_id = self.database, self.profile_id
+
+        def on_result(block_id):
+            if (self.database, self.profile_id) == (database, profile_id):
+                self._schedule(block_id, task_id, task_name, starts_at, ends_at)
+            if on_added is not None:
+                on_added(block_id)
+
+        self.queries.write(
+            database,
+            lambda connection: time_tracking.add_block(connection, profile_id, task_id, starts_at, ends_at),
+            on_result,
+            on_error
+        )
+
+    def pending(self):
+        return len(self._calls)
+
+    def _schedule_all(self, rows):
+        for row in rows:
+            self._schedule(*row)
+
+    def _schedule(self, block_id, task_id, task_name, starts_at, ends_at):
+        # О блоке, который уже идёт, не напоминают
+        if starts_at < deadlines.now_timestamp():
+            return
+
+        def remind():
+            self._calls.pop(block_id, None)
+            self.block_starting.emit(task_id, task_name, starts_at)
+
+        self._calls[block_id] = self.scheduler.call_at(starts_at - REMINDER_LEAD_MINUTES * 60, remind)
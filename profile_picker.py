@@ -0,0 +1,119 @@
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex
+from PyQt6.QtWidgets import QDialog, QDialogButtonBox, QLineEdit, QListView, QVBoxLayout
+
+
+# Сколько профилей добавляется в список за один fetchMore()
+PAGE_SIZE = 100
+
+ProfileIdRole = Qt.ItemDataRole.UserRole + 1
+
+
+class ProfileListModel(QAbstractListModel):
+    """Профили, подходящие под строку поиска, с постраничным показом.
+
+    Отбор идёт по словарю id -> имя в памяти, без запросов к базе;
+    представление получает строки порциями по PAGE_SIZE при прокрутке
+    (canFetchMore/fetchMore), поэтому длина списка профилей не влияет на
+    время открытия окна выбора.
+    """
+
+    def __init__(self, profile_names, parent=None):
+        super().__init__(parent)
+        self._profile_names = profile_names
+        self._matches = []
+        self._shown = 0
+
+    def set_filter(self, text):
+        """Профили, в имени которых есть text (без учёта регистра), по алфавиту"""
+        text = text.strip().casefold()
+        self.beginResetModel()
+        self._matches = sorted(
+            ((profile_id, name) for profile_id, name in self._profile_names.items() if text in name.casefold()),
+            key=lambda profile: profile[1].casefold()
+        )
+        # Первая страница показывается сразу, остальные — при прокрутке
+        self._shown = min(PAGE_SIZE, len(self._matches))
+        self.endResetModel()
+
+    def total_count(self):
+        return len(self._matches)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._shown
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._shown < len(self._matches)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(PAGE_SIZE, len(self._matches) - self._shown)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._shown, self._shown + count - 1)
+        self._shown += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        profile_id, name = self._matches[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return name
+        if role == ProfileIdRole:
+            return profile_id
+        return None
+
+
+class ProfilePickerDialog(QDialog):
+    """Окно выбора профиля с поиском по имени"""
+
+    def __init__(self, profile_names, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Выбор профиля")
+        self.resize(320, 420)
+
+        self.search = QLineEdit(self)
+        self.search.setPlaceholderText("Поиск профиля по имени")
+        self.model = ProfileListModel(profile_names, self)
+        self.view = QListView(self)
+        self.view.setModel(self.model)
+        self.view.setUniformItemSizes(True)
+        buttons = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel, self
+        )
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.search)
+        layout.addWidget(self.view)
+        layout.addWidget(buttons)
+
+        self.search.textChanged.connect(self.apply_filter)
+        # Enter в строке поиска выбирает первый найденный профиль
+        self.search.returnPressed.connect(self.accept)
+        self.view.doubleClicked.connect(self.accept)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        self.apply_filter("")
+
+    def apply_filter(self, text):
+        self.model.set_filter(text)
+        if self.model.rowCount():
+            self.view.setCurrentIndex(self.model.index(0))
+
+    def selected_profile_id(self):
+        index = self.view.currentIndex()
+        return index.data(ProfileIdRole) if index.isValid() else None
+
+
+def choose_profile(profile_names, parent=None):
+    """id профиля, выбранного в окне поиска, или None, если выбор отменён"""
+    dialog = ProfilePickerDialog(profile_names, parent)
+    if dialog.exec() != QDialog.DialogCode.Accepted:
+        return None
+    return dialog.selected_profile_id()
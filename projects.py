@@ -0,0 +1,137 @@
+from collections import Counter
+
+import task_history
+
+
+# Сколько проектов и папок показывают экраны projects и custom_folders
+SCREEN_ITEMS = 3
+# Сколько проектов показывает график graphics_projects
+CHART_PROJECTS = 8
+
+
+def _adjust_project(row, delta):
+    """SQL изменения счётчиков проекта строки row (NEW или OLD) на delta"""
+    return f'''
+        UPDATE projects SET
+            open_count = open_count + {delta} * ({row}.status = {task_history.STATUS_OPEN}),
+            completed_count = completed_count + {delta} * ({row}.status = {task_history.STATUS_COMPLETED}),
+            failed_count = failed_count + {delta} * ({row}.status = {task_history.STATUS_FAILED})
+        WHERE id = {row}.project_id;
+    '''
+
+
+def create_projects(connection):
+    """Шаг миграции: проекты и папки задач.
+
+    Задача может относиться к проекту (tasks.project_id) и к папке внутри
+    него (tasks.folder_id). Число открытых, выполненных и проваленных
+    задач проекта хранится в самой строке projects и меняется триггерами
+    на tasks, поэтому список проектов и график нагрузки не считают задачи.
+    """
+    connection.execute('''
+        CREATE TABLE projects (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            open_count INTEGER NOT NULL DEFAULT 0,
+            completed_count INTEGER NOT NULL DEFAULT 0,
+            failed_count INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (profile_id, name)
+        )
+    ''')
+    connection.execute('''
+        CREATE TABLE folders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            UNIQUE (project_id, name)
+        )
+    ''')
+    connection.execute("ALTER TABLE tasks ADD COLUMN project_id INTEGER REFERENCES projects(id) ON DELETE SET NULL")
+    connection.execute("ALTER TABLE tasks ADD COLUMN folder_id INTEGER REFERENCES folders(id) ON DELETE SET NULL")
+
+    # Задачи проекта и папки; по ним же SQLite проверяет ON DELETE SET NULL
+    connection.execute("CREATE INDEX tasks_project ON tasks (project_id, status) WHERE project_id IS NOT NULL")
+    connection.execute("CREATE INDEX tasks_folder ON tasks (folder_id, status) WHERE folder_id IS NOT NULL")
+    # Входящие: открытые задачи без дедлайна и без проекта
+    connection.execute('''
+        CREATE INDEX tasks_inbox ON tasks (profile_id, id)
+        WHERE status = 0 AND deadline_at IS NULL AND project_id IS NULL
+    ''')
+
+    connection.execute(f'''
+        CREATE TRIGGER projects_count_insert AFTER INSERT ON tasks
+        WHEN NEW.project_id IS NOT NULL
+        BEGIN
+            {_adjust_project("NEW", 1)}
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER projects_count_delete AFTER DELETE ON tasks
+        WHEN OLD.project_id IS NOT NULL
+        BEGIN
+            {_adjust_project("OLD", -1)}
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER projects_count_update AFTER UPDATE OF project_id, status ON tasks
+        WHEN OLD.project_id IS NOT NEW.project_id OR OLD.status IS NOT NEW.status
+        BEGIN
+            {_adjust_project("OLD", -1)}
+            {_adjust_project("NEW", 1)}
+        END
+    ''')
+
+
+def list_projects(connection, profile_id, limit=SCREEN_ITEMS):
+    """Проекты профиля по названию: (id, name, open_count)"""
+    return connection.execute('''
+        SELECT id, name, open_count FROM projects
+        WHERE profile_id = ?
+        ORDER BY name
+        LIMIT ?
+    ''', (profile_id, limit)).fetchall()
+
+
+def project_load(connection, profile_id, limit=CHART_PROJECTS):
+    """Самые нагруженные проекты для графика: (name, open, completed, failed)"""
+    return connection.execute('''
+        SELECT name, open_count, completed_count, failed_count FROM projects
+        WHERE profile_id = ?
+        ORDER BY open_count + completed_count + failed_count DESC, name
+        LIMIT ?
+    ''', (profile_id, limit)).fetchall()
+
+
+def rank_projects(connection, project_ids, limit=SCREEN_ITEMS):
+    """Проекты, чаще всего встречающиеся в project_ids: (id, name, число вхождений)"""
+    ranked = Counter(project_id for project_id in project_ids if project_id is not None).most_common(limit)
+    names = dict(connection.execute(
+        f"SELECT id, name FROM projects WHERE id IN ({', '.join('?' * len(ranked))})",
+        [project_id for project_id, _ in ranked]
+    ).fetchall()) if ranked else {}
+    return [(project_id, names[project_id], count) for project_id, count in ranked if project_id in names]
+
+
+def list_folders(connection, project_id, limit=SCREEN_ITEMS):
+    """Папки проекта с числом открытых задач: (id, name, open_count)"""
+    return connection.execute('''
+        SELECT folders.id, folders.name,
+               (SELECT count(*) FROM tasks WHERE tasks.folder_id = folders.id AND tasks.status = 0)
+        FROM folders
+        WHERE folders.project_id = ?
+        ORDER BY folders.name
+        LIMIT ?
+    ''', (project_id, limit)).fetchall()
+
+
+def create_project(connection, profile_id, name):
+    return connection.execute(
+        "INSERT INTO projects (profile_id, name) VALUES (?, ?)", (profile_id, name)
+    ).lastrowid
+
+
+def create_folder(connection, project_id, name):
+    return connection.execute(
+        "INSERT INTO folders (project_id, name) VALUES (?, ?)", (project_id, name)
+    ).lastrowid
@@ -0,0 +1,129 @@
+import heapq
+import itertools
+
+from PyQt6.QtCore import QObject, Qt, QTimer
+
+import deadlines
+
+
+# События, до которых осталось не больше секунды, выполняются вместе с текущими
+COALESCE_SECONDS = 1
+# Дальше этого срока таймер взводится с точностью до секунды (Qt.TimerType.VeryCoarseTimer)
+VERY_COARSE_FROM_MS = 20_000
+# Наибольший интервал QTimer (int32 мс); более дальнее событие ждёт в несколько заходов
+MAX_WAIT_MS = 2 ** 31 - 1
+
+
+class ScheduledCall:
+    """Отложенный вызов; cancel() отменяет его, пока он не выполнен"""
+
+    __slots__ = ("when", "callback", "queued")
+
+    def __init__(self, when, callback):
+        self.when = when
+        self.callback = callback
+        # Вызов ещё лежит в куче планировщика
+        self.queued = True
+
+    @property
+    def active(self):
+        return self.callback is not None
+
+
+class Scheduler(QObject):
+    """Отложенные вызовы приложения на одном QTimer.
+
+    Вызовы лежат в куче по времени срабатывания (секунды, как у
+    deadlines.to_timestamp), а единственный однократный таймер взведён
+    на ближайший из них. Поэтому тысячи блоков времени и напоминаний
+    стоят одного таймера, и процесс просыпается не чаще, чем наступает
+    следующее событие. Отменённый вызов не ищется в куче: он помечается
+    и выбрасывается, когда доходит до её вершины; если отменённых
+    становится больше половины, куча перестраивается.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._heap = []
+        # Порядок добавления разводит вызовы с одинаковым временем
+        self._sequence = itertools.count()
+        self._cancelled = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._run_due)
+        # Время вызова, на которое взведён таймер
+        self._armed_for = None
+
+    def call_at(self, when, callback):
+        """Вызов callback() в момент when; возвращает ScheduledCall"""
+        call = ScheduledCall(when, callback)
+        heapq.heappush(self._heap, (when, next(self._sequence), call))
+        if self._armed_for is None or when < self._armed_for:
+            self._arm()
+        return call
+
+    def call_later(self, seconds, callback):
+        return self.call_at(deadlines.now_timestamp() + seconds, callback)
+
+    def cancel(self, call):
+        if call is None or not call.active:
+            return
+        call.callback = None
+        if call.queued:
+            self._cancelled += 1
+            if self._cancelled > len(self._heap) // 2:
+                self._compact()
+
+    def pending(self):
+        """Сколько вызовов ещё ждёт выполнения"""
+        return len(self._heap) - self._cancelled
+
+    def _compact(self):
+        self._heap = [item for item in self._heap if item[2].active]
+        heapq.heapify(self._heap)
+        self._cancelled = 0
+        self._arm()
+
+    def _pop_cancelled(self):
+        while self._heap and not self._heap[0][2].active:
+            heapq.heappop(self._heap)[2].queued = False
+            self._cancelled -= 1
+
+    def _arm(self):
+        """Таймер на ближайший вызов; без вызовов он остановлен"""
+        self._pop_cancelled()
+        if not self._heap:
+            self._timer.stop()
+            self._armed_for = None
+            return
+
+        when = self._heap[0][0]
+        if when == self._armed_for and self._timer.isActive():
+            return
+        delay_ms = min(max(0, (when - deadlines.now_timestamp()) * 1000), MAX_WAIT_MS)
+        self._timer.setTimerType(
+            Qt.TimerType.VeryCoarseTimer if delay_ms >= VERY_COARSE_FROM_MS else Qt.TimerType.PreciseTimer
+        )
+        self._timer.start(int(delay_ms))
+        self._armed_for = when
+
+    def _run_due(self):
+        self._armed_for = None
+        horizon = deadlines.now_timestamp() + COALESCE_SECONDS
+        due = []
+        while self._heap and self._heap[0][0] <= horizon:
+            call = heapq.heappop(self._heap)[2]
+            call.queued = False
+            if call.active:
+                due.append(call)
+            else:
+                self._cancelled -= 1
+
+        # Таймер взводится до вызовов: обработчик может открыть модальное окно
+        # со своим циклом событий, и следующие события не должны его ждать
+        self._arm()
+        for call in due:
+            # Вызов мог быть отменён предыдущим обработчиком
+            if call.active:
+                callback, call.callback = call.callback, None
+                callback()
@@ -0,0 +1,77 @@
+import time
+
+from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtWidgets import QMainWindow, QStackedWidget
+
+import forms
+
+
+class ScreenStack(QStackedWidget):
+    """Экраны приложения в одном QStackedWidget.
+
+    Каждый экран — форма static/ui/<имя>.ui (см. forms.py). Она загружается,
+    а setupUi() вызывается один раз при первом показе над отдельной
+    страницей QMainWindow, затем функция setup подключает
+    сигналы; при следующих переходах страница только делается текущей.
+    Поэтому запуск приложения не зависит от числа экранов. Время каждого
+    переключения передаётся сигналом switched.
+    """
+
+    # Имя экрана, время переключения в мс и был ли экран построен заново
+    switched = pyqtSignal(str, float, bool)
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.main_window = window
+        self._screens = {}
+        self._pages = {}
+        self._uis = {}
+        self._sizes = {}
+
+    def register(self, name, form, setup=None):
+        """Регистрация экрана из формы static/ui/<form>.ui: он будет построен при первом show_screen(name)"""
+        self._screens[name] = (form, setup)
+
+    def ui(self, name):
+        """Объект Ui_... экрана (экран строится, если его ещё нет)"""
+        if name not in self._uis:
+            self._build(name)
+        return self._uis[name]
+
+    def page(self, name):
+        self.ui(name)
+        return self._pages[name]
+
+    def current_name(self):
+        for name, page in self._pages.items():
+            if page is self.currentWidget():
+                return name
+        return None
+
+    def show_screen(self, name):
+        """Переход на экран name; возвращает его объект Ui_..."""
+        started = time.perf_counter()
+        built = name not in self._uis
+        ui = self.ui(name)
+
+        page = self._pages[name]
+        self.setCurrentWidget(page)
+        # Заголовок и размер окна — как у экрана в дизайнере
+        self.main_window.setWindowTitle(page.windowTitle())
+        self.main_window.resize(self._sizes[name])
+
+        self.switched.emit(name, (time.perf_counter() - started) * 1000, built)
+        return ui
+
+    def _build(self, name):
+        form, setup = self._screens[name]
+        page = QMainWindow(self)
+        ui = forms.form_class(form)()
+        ui.setupUi(page)
+        self._sizes[name] = page.size()
+        self.addWidget(page)
+
+        self._pages[name] = page
+        self._uis[name] = ui
+        if setup is not None:
+            setup(ui)
@@ -0,0 +1,120 @@
+from collections import OrderedDict
+from itertools import compress, repeat
+from operator import contains
+
+import diagnostics
+from search_index import query_tokens
+
+
+MAX_CACHED_QUERIES = 64
+# Суммарное число строк во всех записях кэша
+MAX_CACHED_ROWS = 300_000
+
+
+class CachedSearch:
+    """Результат поиска: id задач и их нормализованный текст"""
+
+    __slots__ = ("query", "task_ids", "haystacks", "ranked")
+
+    def __init__(self, query, task_ids, haystacks, ranked):
+        self.query = query
+        self.task_ids = task_ids
+        self.haystacks = haystacks
+        # False, если порядок строк ещё нужно уточнить запросом к базе
+        self.ranked = ranked
+
+
+def normalize_query(text):
+    """Ключ кэша: слова запроса в том виде, в каком их ищет индекс"""
+    return " ".join(query_tokens(text))
+
+
+class SearchCache:
+    """LRU-кэш недавних поисковых запросов: запрос -> список id задач.
+
+    Если нового запроса нет в кэше, но он продолжает уже найденный
+    (например, "мол" -> "моло" или "молоко к"), его результат получается
+    фильтрацией закэшированного набора в памяти: каждое слово нового
+    запроса должно быть префиксом какого-нибудь слова задачи, как и в
+    индексе FTS5. Любая запись задач делает кэш недействительным через
+    invalidate(); результаты запросов, начатых до этого, не сохраняются.
+    """
+
+    def __init__(self, max_queries=MAX_CACHED_QUERIES, max_rows=MAX_CACHED_ROWS):
+        self.max_queries = max_queries
+        self.max_rows = max_rows
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._rows = 0
+
+    def invalidate(self):
+        """Сброс кэша после изменения задач"""
+        self._entries.clear()
+        self._rows = 0
+        self.generation += 1
+
+    def put(self, profile_id, text, task_ids, haystacks, generation):
+        """Сохранение результата запроса к базе, начатого в поколении generation"""
+        entry = CachedSearch(normalize_query(text), task_ids, haystacks, True)
+        if generation == self.generation:
+            self._store(profile_id, entry)
+        return entry
+
+    def lookup(self, profile_id, text):
+        """Результат из кэша или уточнением закэшированного; None, если нужен запрос к базе"""
+        query = normalize_query(text)
+        entry = self._entries.get((profile_id, query))
+        if entry is not None:
+            self._entries.move_to_end((profile_id, query))
+            diagnostics.count("search_cache.hit")
+            return entry
+
+        source = self._find_refinable(profile_id, query)
+        if source is None:
+            diagnostics.count("search_cache.miss")
+            return None
+
+        diagnostics.count("search_cache.refined")
+        entry = self._refine(source, query)
+        self._store(profile_id, entry)
+        return entry
+
+    def _find_refinable(self, profile_id, query):
+        """Самый узкий закэшированный запрос, который продолжает query"""
+        best = None
+        for (entry_profile, entry_query), entry in self._entries.items():
+            if entry_profile != profile_id or not query.startswith(entry_query):
+                continue
+            if best is None or len(entry_query) > len(best.query):
+                best = entry
+        return best
+
+    def _refine(self, source, query):
+        """Фильтрация результата source по словам, которых в нём ещё не было"""
+        tokens = query.split()
+        source_tokens = source.query.split()
+        # Все слова source, кроме последнего, уже проверены; последнее могло удлиниться
+        needles = [" " + token for token in tokens[max(len(source_tokens) - 1, 0):]]
+
+        task_ids = source.task_ids
+        haystacks = source.haystacks
+        for needle in needles:
+            # Весь проход выполняется на уровне C: map(contains) и compress
+            selectors = list(map(contains, haystacks, repeat(needle)))
+            task_ids = list(compress(task_ids, selectors))
+            haystacks = list(compress(haystacks, selectors))
+
+        # Порядок остаётся от более широкого запроса: точный порядок bm25 даст только запрос к базе
+        return CachedSearch(query, task_ids, haystacks, False)
+
+    def _store(self, profile_id, entry):
+        key = (profile_id, entry.query)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._rows -= len(previous.task_ids)
+
+        self._entries[key] = entry
+        self._rows += len(entry.task_ids)
+        while self._entries and (len(self._entries) > self.max_queries or self._rows > self.max_rows):
+            _, evicted = self._entries.popitem(last=False)
+            self._rows -= len(evicted.task_ids)
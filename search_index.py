@@ -0,0 +1,230 @@
+import html
+import itertools
+import re
+import unicodedata
+
+
+# Маркеры начала и конца совпадения во фрагменте; заменяются на HTML после экранирования
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+SNIPPET_TOKENS = 12
+
+# Буквы и цифры без "_": так же слова разбивает токенизатор unicode61
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+
+
+def fold_text(text):
+    """Нормализация текста так же, как её выполняет индекс: ё -> е"""
+    return text.replace("ё", "е").replace("Ё", "Е")
+
+
+def _search_fold_table():
+    """ё -> е, как в представлении индекса, и латинские буквы с диакритикой -> базовая буква.
+
+    Токенизатор с remove_diacritics 2 снимает диакритику только с латиницы:
+    "й" остаётся "й", поэтому NFD применяется лишь к латинским блокам.
+    """
+    table = {ord("ё"): "е", ord("Ё"): "Е"}
+    for code in itertools.chain(range(0xC0, 0x250), range(0x1E00, 0x1F00)):
+        base = unicodedata.normalize("NFD", chr(code))
+        if len(base) > 1 and base[0].isascii() and all(unicodedata.combining(mark) for mark in base[1:]):
+            table[code] = base[0]
+    return table
+
+
+_SEARCH_FOLD = _search_fold_table()
+
+
+def fold_search_text(text):
+    """Нормализация слов так же, как её выполняют представление и токенизатор индекса; длина текста не меняется"""
+    return text.translate(_SEARCH_FOLD)
+
+
+def _fold_sql(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def create_search_index(connection):
+    """Создание полнотекстового индекса задач (шаг миграции схемы).
+
+    Индекс FTS5 ссылается на представление tasks_search_source поверх tasks
+    (external content), поэтому сам текст задач не дублируется. Токенизатор
+    unicode61 приводит кириллицу к нижнему регистру, а представление
+    дополнительно сворачивает "ё" в "е". Для уже существующих задач индекс
+    строится командой 'rebuild'.
+    """
+    connection.execute(f'''
+        CREATE VIEW IF NOT EXISTS tasks_search_source AS
+        SELECT id, {_fold_sql("name")} AS name, {_fold_sql("description")} AS description
+        FROM tasks
+    ''')
+    connection.execute('''
+        CREATE VIRTUAL TABLE tasks_fts USING fts5(
+            name,
+            description,
+            content = 'tasks_search_source',
+            content_rowid = 'id',
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '1 2 3'
+        )
+    ''')
+
+    # Триггеры поддерживают индекс в согласованном состоянии с tasks
+    connection.execute(f'''
+        CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO tasks_fts (rowid, name, description)
+            VALUES (new.id, {_fold_sql("new.name")}, {_fold_sql("new.description")});
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, name, description)
+            VALUES ('delete', old.id, {_fold_sql("old.name")}, {_fold_sql("old.description")});
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER tasks_fts_update AFTER UPDATE OF name, description ON tasks BEGIN
+            INSERT INTO tasks_fts (tasks_fts, rowid, name, description)
+            VALUES ('delete', old.id, {_fold_sql("old.name")}, {_fold_sql("old.description")});
+            INSERT INTO tasks_fts (rowid, name, description)
+            VALUES (new.id, {_fold_sql("new.name")}, {_fold_sql("new.description")});
+        END
+    ''')
+
+    connection.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+
+
+def query_tokens(text):
+    """Слова поискового запроса в нормализованном виде"""
+    return [fold_search_text(token).lower() for token in _TOKEN_RE.findall(text)]
+
+
+def build_match_query(text):
+    """Запрос MATCH: каждое слово ищется как префикс, все слова обязательны"""
+    tokens = query_tokens(text)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def _search_rows(connection, profile_id, text, columns, limit):
+    match_query = build_match_query(text)
+    if match_query is None:
+        return connection.execute(f'''
+            SELECT {columns}
+            FROM tasks
+            WHERE profile_id = ? AND status = 0
+            ORDER BY name
+            LIMIT ?
+        ''', (profile_id, -1 if limit is None else limit))
+
+    # Совпадение в названии весит больше, чем в описании
+    return connection.execute(f'''
+        SELECT {columns}
+        FROM tasks_fts
+        JOIN tasks ON tasks.id = tasks_fts.rowid
+        WHERE tasks_fts MATCH ? AND tasks.profile_id = ? AND tasks.status = 0
+        ORDER BY bm25(tasks_fts, 10.0, 1.0)
+        LIMIT ?
+    ''', (match_query, profile_id, -1 if limit is None else limit))
+
+
+def search_task_ids(connection, profile_id, text, limit=None):
+    """Идентификаторы найденных открытых задач профиля в порядке релевантности.
+
+    Каждое слово запроса ищется как префикс. При пустом запросе возвращаются
+    все открытые задачи профиля по алфавиту, обходом частичного индекса
+    tasks_open_name (profile_id, name).
+    Сами строки задач читаются позже постранично через fetch_tasks_page().
+    """
+    return [row[0] for row in _search_rows(connection, profile_id, text, "tasks.id", limit)]
+
+
+def search_task_documents(connection, profile_id, text, limit=None):
+    """То же, что search_task_ids(), вместе с текстом задач для уточнения в памяти.
+
+    Возвращает пару списков (id, haystack), где haystack — нормализованные
+    слова названия и описания через пробел (см. make_haystack()).
+    """
+    task_ids = []
+    haystacks = []
+    rows = _search_rows(connection, profile_id, text, "tasks.id, tasks.name, tasks.description", limit)
+    for task_id, name, description in rows:
+        task_ids.append(task_id)
+        haystacks.append(make_haystack(name, description))
+    return task_ids, haystacks
+
+
+def make_haystack(name, description):
+    """Строка для проверки префиксов в памяти: " слово1 слово2 ... " без повторов"""
+    return " " + " ".join(dict.fromkeys(query_tokens(f"{name} {description or ''}"))) + " "
+
+
+def fetch_tasks_page(connection, task_ids, text):
+    """Строки (id, name, deadline, description, snippet) для страницы результатов.
+
+    Строки читаются по первичному ключу, а snippet строится в памяти (см.
+    make_snippet()), поэтому стоимость страницы не зависит от того, сколько
+    задач совпало с запросом. Порядок строк совпадает с порядком task_ids.
+    """
+    if not task_ids:
+        return []
+
+    placeholders = ", ".join("?" * len(task_ids))
+    rows = connection.execute(f'''
+        SELECT id, name, deadline, description
+        FROM tasks
+        WHERE id IN ({placeholders})
+    ''', task_ids).fetchall()
+
+    tokens = query_tokens(text)
+    by_id = {row[0]: row for row in rows}
+    return [
+        (*by_id[task_id], make_snippet(by_id[task_id][3], tokens))
+        for task_id in task_ids if task_id in by_id
+    ]
+
+
+def make_snippet(description, tokens, size=SNIPPET_TOKENS):
+    """Фрагмент описания вокруг первого совпадения с маркерами MATCH_START/MATCH_END.
+
+    Совпадением считается слово, которое начинается с одного из слов
+    запроса tokens (как префиксный поиск индекса).
+    """
+    if not description:
+        return ""
+
+    words = list(_TOKEN_RE.finditer(description))
+    if not words:
+        return description
+    prefixes = tuple(tokens)
+    matched = [bool(prefixes) and fold_search_text(word.group()).lower().startswith(prefixes) for word in words]
+
+    first = matched.index(True) if True in matched else 0
+    start = max(0, min(first - size // 4, len(words) - size))
+    end = min(len(words), start + size)
+
+    parts = ["…"] if start > 0 else []
+    position = words[start].start()
+    for index in range(start, end):
+        word = words[index]
+        parts.append(description[position:word.start()])
+        if matched[index]:
+            parts.append(f"{MATCH_START}{word.group()}{MATCH_END}")
+        else:
+            parts.append(word.group())
+        position = word.end()
+    parts.append(description[position:] if end == len(words) else "…")
+    return "".join(parts)
+
+
+def snippet_to_html(snippet):
+    """Фрагмент с маркерами совпадений в виде HTML с выделением"""
+    if not snippet:
+        return ""
+    return (
+        html.escape(snippet)
+        .replace(MATCH_START, "<b>")
+        .replace(MATCH_END, "</b>")
+    )
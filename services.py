@@ -0,0 +1,232 @@
+"""Профили, задачи и поиск без графического интерфейса.
+
+Функции получают соединение sqlite3 и ничего не знают о Qt: их вызывают
+MainWindow (через QueryRunner и TaskRepository), api_server и скрипты.
+Ошибки данных сообщаются исключениями: ValueError — неверные значения,
+LookupError — нет такого профиля, sqlite3.IntegrityError — нарушено
+ограничение базы. Транзакциями управляет вызывающий код.
+"""
+import deadlines
+import search_index
+import shards
+import tags
+import task_history
+import task_journal
+
+
+# Столбцы строки задачи, которую возвращают функции этого модуля
+TASK_FIELDS = ("id", "name", "deadline", "deadline_at", "description", "picture", "status", "project_id", "folder_id")
+_COLUMNS = ", ".join(TASK_FIELDS)
+
+
+################################
+########### Профили ############
+################################
+
+def list_profiles(connection):
+    """Все профили (id, name, sharded) в порядке создания"""
+    return connection.execute("SELECT id, name, sharded FROM profiles ORDER BY id").fetchall()
+
+
+def create_profile(connection, name):
+    """Новый профиль; возвращает его id. Файл профиля (shards.SHARD_NEW_PROFILES) создаётся после фиксации"""
+    name = name.strip()
+    if not name:
+        raise ValueError("Имя профиля не может быть пустым.")
+    return shards.create_profile(connection, name)
+
+
+def profile_database(connection, profile_id):
+    """Файл задач профиля (см. shards.py) или None, если они в основной базе соединения"""
+    if connection.execute("SELECT 1 FROM profiles WHERE id = ?", (profile_id,)).fetchone() is None:
+        raise LookupError(f"Профиль {profile_id} не найден.")
+    return shards.profile_shard(connection, profile_id)
+
+
+def delete_profile(connection, profile_id):
+    """Удаление профиля; возвращает его файл задач, который нужно удалить после фиксации, или None"""
+    shard = profile_database(connection, profile_id)
+    # Задачи профиля в основной базе удаляются каскадно по внешнему ключу
+    connection.execute("DELETE FROM profiles WHERE id = ?", (profile_id,))
+    return shard
+
+
+def delete_all_profiles(connection):
+    """Удаление всех профилей; возвращает файлы задач для удаления после фиксации"""
+    shard_files = [
+        shards.profile_shard(connection, row[0])
+        for row in connection.execute("SELECT id FROM profiles WHERE sharded = 1").fetchall()
+    ]
+    connection.execute("DELETE FROM profiles")
+    return shard_files
+
+
+################################
+############ Задачи ############
+################################
+
+def validate_task(name, deadline):
+    """Проверка полей задачи; возвращает дедлайн в секундах или None"""
+    if not name:
+        raise ValueError("Название задачи не может быть пустым.")
+    return parse_task_deadline(deadline)
+
+
+def parse_task_deadline(deadline):
+    """Дедлайн задачи в секундах или None; ValueError с подсказкой формата"""
+    try:
+        return deadlines.parse_deadline(deadline)
+    except ValueError:
+        raise ValueError("Не удалось распознать дедлайн. Укажите его в формате ЧЧ:ММ, ДД/ММ/ГГГГ.") from None
+
+
+def select_tasks(connection, task_ids, profile_id=None):
+    """Строки задач по id в порядке task_ids; удалённые задачи и, с profile_id, задачи других профилей пропускаются"""
+    if not task_ids:
+        return []
+    placeholders = ", ".join("?" * len(task_ids))
+    query, params = f"SELECT {_COLUMNS} FROM tasks WHERE id IN ({placeholders})", list(task_ids)
+    if profile_id is not None:
+        query += " AND profile_id = ?"
+        params.append(profile_id)
+    by_id = {row[0]: row for row in connection.execute(query, params)}
+    return [by_id[task_id] for task_id in task_ids if task_id in by_id]
+
+
+def task_ids_by_name(connection, profile_id, name, task_id=None):
+    """id открытых задач профиля с названием name; с task_id — только эта задача профиля в любом состоянии.
+
+    Выполненные и проваленные задачи с тем же названием — история, и
+    правки открытой задачи их не касаются.
+    """
+    if task_id is not None:
+        query, params = "SELECT id FROM tasks WHERE id = ? AND profile_id = ?", (task_id, profile_id)
+    else:
+        query = f"SELECT id FROM tasks WHERE profile_id = ? AND name = ? AND status = {task_history.STATUS_OPEN}"
+        params = (profile_id, name)
+    return [row[0] for row in connection.execute(query, params)]
+
+
+def check_task_place(connection, profile_id, project_id, folder_id):
+    """Проверка, что проект и папка новой задачи принадлежат профилю, а папка — проекту"""
+    if project_id is not None and connection.execute(
+        "SELECT 1 FROM projects WHERE id = ? AND profile_id = ?", (project_id, profile_id)
+    ).fetchone() is None:
+        raise LookupError(f"Проект {project_id} не найден.")
+    if folder_id is not None and connection.execute(
+        "SELECT 1 FROM folders JOIN projects ON projects.id = folders.project_id "
+        "WHERE folders.id = ? AND projects.profile_id = ? AND (? IS NULL OR projects.id = ?)",
+        (folder_id, profile_id, project_id, project_id)
+    ).fetchone() is None:
+        raise LookupError(f"Папка {folder_id} не найдена.")
+
+
+def list_tasks(connection, profile_id, status=None, after_id=0, limit=None):
+    """Задачи профиля по возрастанию id, начиная после after_id; status=None — в любом состоянии"""
+    query = f"SELECT {_COLUMNS} FROM tasks WHERE profile_id = ? AND id > ?"
+    params = [profile_id, after_id]
+    if status is not None:
+        query += " AND status = ?"
+        params.append(status)
+    query += " ORDER BY id"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return connection.execute(query, params).fetchall()
+
+
+def search_tasks(connection, profile_id, text, limit=None):
+    """Открытые задачи по запросу: строки (id, name, deadline, description, snippet) по релевантности"""
+    return search_index.fetch_tasks_page(
+        connection, search_index.search_task_ids(connection, profile_id, text, limit), text
+    )
+
+
+def add_task(connection, profile_id, name, deadline, deadline_at, description,
+             picture=None, project_id=None, folder_id=None):
+    """Новая задача; тэги берутся из #слов названия и описания. Возвращает её строку"""
+    task_id = connection.execute(
+        "INSERT INTO tasks (profile_id, name, deadline, deadline_at, description, picture, project_id, folder_id) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (profile_id, name, deadline, deadline_at, description, picture, project_id, folder_id)
+    ).lastrowid
+    tags.sync_task_tags(connection, profile_id, task_id, tags.extract_tags(name, description))
+    step_id = task_journal.begin_step(connection, profile_id, f"добавление задачи '{name}'")
+    task_journal.record_insert(connection, step_id, task_id)
+    return select_tasks(connection, [task_id])[0]
+
+
+def update_task(connection, profile_id, name, deadline, deadline_at, description, picture, task_id=None):
+    """Изменение открытых задач профиля с названием name или задачи task_id; возвращает их новые строки.
+
+    Тэги и подпись шага отмены берутся из сохранённого названия задачи,
+    поэтому при task_id аргумент name может быть пустым.
+    """
+    rows = select_tasks(connection, task_ids_by_name(connection, profile_id, name, task_id))
+    if not rows:
+        return []
+
+    task_ids = [row[0] for row in rows]
+    step_id = task_journal.begin_step(connection, profile_id, f"изменение задачи '{rows[0][1]}'")
+    values = {"deadline": deadline, "deadline_at": deadline_at, "description": description, "picture": picture}
+    for task_id in task_ids:
+        task_journal.record_update(connection, step_id, task_id, values)
+    connection.executemany(
+        "UPDATE tasks SET deadline = ?, deadline_at = ?, description = ?, picture = ? WHERE id = ?",
+        [(deadline, deadline_at, description, picture, task_id) for task_id in task_ids]
+    )
+    for task_id, task_name, *_ in rows:
+        tags.sync_task_tags(connection, profile_id, task_id, tags.extract_tags(task_name, description))
+    return select_tasks(connection, task_ids)
+
+
+def set_task_status(connection, profile_id, name, status, task_id=None):
+    """Смена статуса открытых задач с названием name или задачи task_id; возвращает изменённые строки"""
+    rows = [
+        row for row in select_tasks(connection, task_ids_by_name(connection, profile_id, name, task_id))
+        if row[TASK_FIELDS.index("status")] != status
+    ]
+    if not rows:
+        return []
+
+    task_ids = [row[0] for row in rows]
+    step_id = task_journal.begin_step(connection, profile_id, f"смена статуса задачи '{rows[0][1]}'")
+    for task_id in task_ids:
+        task_journal.record_update(connection, step_id, task_id, {"status": status})
+    task_history.set_status(connection, task_ids, status)
+    return select_tasks(connection, task_ids)
+
+
+def delete_task(connection, profile_id, name, task_id=None):
+    """Удаление открытых задач с названием name или задачи task_id; возвращает их id"""
+    rows = select_tasks(connection, task_ids_by_name(connection, profile_id, name, task_id))
+    if not rows:
+        return []
+
+    task_ids = [row[0] for row in rows]
+    step_id = task_journal.begin_step(connection, profile_id, f"удаление задачи '{rows[0][1]}'")
+    for task_id in task_ids:
+        task_journal.record_delete(connection, step_id, task_id)
+    connection.executemany("DELETE FROM tasks WHERE id = ?", [(task_id,) for task_id in task_ids])
+    return task_ids
+
+
+def fail_overdue_tasks(connection, profile_id, task_ids, now):
+    """Отметка проваленными тех из task_ids, что всё ещё открыты и просрочены к now; возвращает их строки.
+
+    В журнал отмены не записывается: это не действие пользователя, и
+    отменённый провал повторился бы при следующей проверке. Событие
+    'failed' в task_events записывает триггер.
+    """
+    if not task_ids:
+        return []
+    placeholders = ", ".join("?" * len(task_ids))
+    failed_ids = [row[0] for row in connection.execute(
+        f"SELECT id FROM tasks WHERE id IN ({placeholders}) AND profile_id = ? AND status = ? AND deadline_at <= ?",
+        (*task_ids, profile_id, task_history.STATUS_OPEN, now)
+    )]
+    connection.executemany(
+        "UPDATE tasks SET status = ? WHERE id = ?",
+        [(task_history.STATUS_FAILED, task_id) for task_id in failed_ids]
+    )
+    return select_tasks(connection, failed_ids)
@@ -0,0 +1,130 @@
+import os
+import sqlite3
+
+import migrations
+
+
+# Папка рядом с основной базой, в которой лежат файлы профилей
+SHARDS_DIRNAME = "shards"
+# Новые профили сразу получают свой файл; режим включается переменной окружения
+SHARD_NEW_PROFILES = os.environ.get("TODO_SHARD_PROFILES") == "1"
+
+# Таблицы с данными профиля в порядке внешних ключей и условие отбора строк профиля
+_PROFILE_TABLES = (
+    ("projects", "profile_id = :profile_id"),
+    ("folders", "project_id IN (SELECT id FROM shared.projects WHERE profile_id = :profile_id)"),
+    ("tasks", "profile_id = :profile_id"),
+    ("tags", "profile_id = :profile_id"),
+    ("task_tags", "tag_id IN (SELECT id FROM shared.tags WHERE profile_id = :profile_id)"),
+    ("task_events", "profile_id = :profile_id"),
+    ("task_stats_daily", "profile_id = :profile_id"),
+    ("task_journal_steps", "profile_id = :profile_id"),
+    ("task_journal", "step_id IN (SELECT id FROM shared.task_journal_steps WHERE profile_id = :profile_id)"),
+    ("time_entries", "profile_id = :profile_id"),
+    ("time_blocks", "profile_id = :profile_id"),
+)
+
+
+def _database_path(connection):
+    """Путь к файлу основной базы соединения"""
+    return connection.execute("PRAGMA database_list").fetchone()[2]
+
+
+def shard_path(database, profile_id):
+    """Файл задач профиля: db/shards/profile_<id>.db рядом с основной базой database"""
+    return os.path.join(os.path.dirname(database), SHARDS_DIRNAME, f"profile_{profile_id}.db")
+
+
+def profile_shard(connection, profile_id):
+    """Файл задач профиля или None, если они хранятся в основной базе соединения"""
+    row = connection.execute("SELECT sharded FROM profiles WHERE id = ?", (profile_id,)).fetchone()
+    return shard_path(_database_path(connection), profile_id) if row and row[0] else None
+
+
+def _build_shard(connection, profile_id, name, copy):
+    """Создание файла профиля с полной схемой; при copy в него переносятся данные профиля.
+
+    Файл собирается под временным именем и переименовывается только
+    готовым. Данные копируются через ATTACH основной базы с отключёнными
+    триггерами: счётчики, журнал событий и тэги переносятся как есть, а
+    не пересчитываются заново; полнотекстовый индекс строится в конце.
+    """
+    path = shard_path(_database_path(connection), profile_id)
+    temporary = path + ".tmp"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(temporary):
+        os.remove(temporary)
+
+    shard = sqlite3.connect(temporary)
+    try:
+        # В файле профиля та же схема, что и в основной базе, включая таблицу profiles
+        migrations.migrate(shard, None, None)
+        if copy:
+            shard.execute("ATTACH DATABASE ? AS shared", (_database_path(connection),))
+        triggers = shard.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'").fetchall()
+
+        shard.execute("BEGIN IMMEDIATE")
+        try:
+            shard.execute("INSERT INTO profiles (id, name) VALUES (?, ?)", (profile_id, name))
+            if copy:
+                for trigger, _ in triggers:
+                    shard.execute(f"DROP TRIGGER {trigger}")
+                for table, condition in _PROFILE_TABLES:
+                    columns = ", ".join(row[1] for row in shard.execute(f"PRAGMA main.table_info({table})"))
+                    shard.execute(
+                        f"INSERT INTO main.{table} ({columns}) SELECT {columns} FROM shared.{table} WHERE {condition}",
+                        {"profile_id": profile_id}
+                    )
+                shard.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
+                for _, sql in triggers:
+                    shard.execute(sql)
+        except BaseException:
+            shard.rollback()
+            raise
+        shard.commit()
+        if copy:
+            shard.execute("DETACH DATABASE shared")
+    finally:
+        shard.close()
+    os.replace(temporary, path)
+    return path
+
+
+def create_profile(connection, name):
+    """Новый профиль в общих таблицах; выполняется в транзакции вызывающего.
+
+    Файл профиля здесь не создаётся: при откате транзакции он остался бы
+    без строки в profiles. В режиме SHARD_NEW_PROFILES вызывающий после
+    фиксации переносит профиль в его файл через move_profile().
+    """
+    return connection.execute("INSERT INTO profiles (name) VALUES (?)", (name,)).lastrowid
+
+
+def move_profile(connection, profile_id):
+    """Перенос задач профиля из общих таблиц в его файл.
+
+    После копирования профиль удаляется из основной базы вместе с данными
+    (каскадно) и сразу вставляется снова с тем же id и флагом sharded.
+    Если перенос прервётся до этого шага, профиль останется в общих
+    таблицах, а недоделанный файл будет перезаписан при следующей попытке.
+    """
+    name, sharded = connection.execute("SELECT name, sharded FROM profiles WHERE id = ?", (profile_id,)).fetchone()
+    if sharded:
+        return shard_path(_database_path(connection), profile_id)
+
+    path = _build_shard(connection, profile_id, name, copy=True)
+    with connection:
+        connection.execute("DELETE FROM profiles WHERE id = ?", (profile_id,))
+        connection.execute("INSERT INTO profiles (id, name, sharded) VALUES (?, ?, 1)", (profile_id, name))
+    return path
+
+
+def remove_shard(path, storage=None):
+    """Удаление файла профиля: закрытие его соединений и удаление файла за постоянное время"""
+    if storage is not None:
+        storage.close_database(path)
+    for suffix in ("", "-journal", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
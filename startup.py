@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+
+
+# Замер холодного запуска: TODO_STARTUP_PROFILE=1 python main.py
+ENABLED = os.environ.get("TODO_STARTUP_PROFILE") == "1"
+# Сборка без консоли (console=False в main.spec) пишет отчёт в файл
+REPORT_FILE = "startup.log"
+
+_started = time.perf_counter()
+_last = _started
+_phases = []
+
+
+def mark(phase):
+    """Конец этапа запуска: его длительность считается от предыдущей отметки"""
+    global _last
+    now = time.perf_counter()
+    _phases.append((phase, (now - _last) * 1000))
+    _last = now
+
+
+def report():
+    """Длительность этапов запуска в мс и общее время до первой отрисовки окна"""
+    if not ENABLED:
+        return
+    lines = [f"{phase:<24}{elapsed:9.1f} мс" for phase, elapsed in _phases]
+    lines.append(f"{'всего':<24}{(_last - _started) * 1000:9.1f} мс")
+    text = "\n".join(lines) + "\n"
+    if sys.stderr is not None:
+        sys.stderr.write(text)
+    else:
+        with open(REPORT_FILE, "a", encoding="utf-8") as report_file:
+            report_file.write(text)
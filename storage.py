@@ -0,0 +1,194 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import diagnostics
+
+
+DB_DIR = "db"
+# Единая база профилей и задач
+TODO_DB = os.path.join(DB_DIR, "todo.db")
+# Прежние отдельные базы; их данные переносит migrations.migrate()
+PROFILES_DB = os.path.join(DB_DIR, "profiles.db")
+TASKS_DB = os.path.join(DB_DIR, "tasks.db")
+
+# Размер кэша подготовленных выражений на одно соединение
+STATEMENT_CACHE_SIZE = 256
+
+# Настройки каждого соединения; другой набор передаётся в Storage(pragmas=...)
+PRAGMAS = {
+    # Журнал WAL: чтения не ждут записи и не блокируют её
+    "journal_mode": "WAL",
+    # С WAL режим NORMAL не повреждает базу при сбое, а fsync делается только в контрольной точке
+    "synchronous": "NORMAL",
+    # Чтение файла через отображение в память вместо копирования страниц
+    "mmap_size": 64 * 1024 * 1024,
+    # Отрицательное значение — размер кэша страниц в КиБ
+    "cache_size": -16 * 1024,
+    "temp_store": "MEMORY",
+}
+# Сколько записей самое большее объединяется в одну транзакцию (write_batch)
+WRITE_BATCH_SIZE = 64
+# Как часто MainWindow запускает maintain() для открытых баз
+MAINTENANCE_INTERVAL_MS = 5 * 60 * 1000
+
+
+def configure(connection, pragmas=PRAGMAS):
+    """Внешние ключи и настройки pragmas для нового соединения"""
+    # Внешние ключи в SQLite включаются отдельно для каждого соединения
+    connection.execute("PRAGMA foreign_keys = ON")
+    for name, value in pragmas.items():
+        connection.execute(f"PRAGMA {name} = {value}")
+    return connection
+
+
+def maintain(connection):
+    """Периодическое обслуживание: перенос WAL в основной файл и обновление статистики планировщика.
+
+    Контрольная точка PASSIVE не ждёт читателей и пишет столько, сколько
+    можно сейчас; PRAGMA optimize запускает ANALYZE только для таблиц, у
+    которых статистика устарела. Вызывается вне транзакции.
+    """
+    connection.execute("PRAGMA optimize")
+    return connection.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+
+
+class Storage:
+    """Слой хранения с долгоживущими соединениями к файлам SQLite.
+
+    Соединения открываются один раз на пару (поток, файл базы данных) и
+    переиспользуются всеми запросами этого потока, поэтому обработчики
+    интерфейса и рабочие потоки не платят за открытие файла, разбор схемы
+    и прогрев кэша страниц. Подготовленные выражения кэшируются модулем
+    sqlite3 по тексту запроса.
+    """
+
+    def __init__(self, cached_statements=STATEMENT_CACHE_SIZE, pragmas=PRAGMAS):
+        self.cached_statements = cached_statements
+        self.pragmas = pragmas
+        # Соединения потоков по threading.get_ident(): поток -> {файл: (поколение, соединение)}.
+        # threading.local здесь не годится: потоки QThreadPool не принадлежат Python, и
+        # PyQt создаёт для каждого их вызова новое состояние потока, а с ним пустой local
+        self._threads = {}
+        self._lock = threading.Lock()
+        # Пары (файл, соединение) всех потоков
+        self._connections = []
+        # Номер поколения файла; после close_database() потоки открывают файл заново
+        self._generations = {}
+
+    def connection(self, database):
+        """Соединение текущего потока с указанной базой данных"""
+        connections = self._threads.get(threading.get_ident())
+        if connections is None:
+            with self._lock:
+                # Номер завершившегося потока может достаться новому вместе с его соединениями:
+                # прежний владелец ими уже не пользуется
+                connections = self._threads.setdefault(threading.get_ident(), {})
+
+        generation = self._generations.get(database, 0)
+        entry = connections.get(database)
+        if entry is None or entry[0] != generation:
+            if entry is not None:
+                # Соединение уже закрыто в close_database()
+                entry[1].close()
+            entry = connections[database] = (generation, self._open(database))
+        return entry[1]
+
+    def _open(self, database):
+        """Открытие нового соединения и регистрация его в пуле"""
+        directory = os.path.dirname(database)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # check_same_thread=False нужен только для close_all() и close_database():
+        # запросы к соединению выполняет лишь поток-владелец.
+        # С включённой диагностикой каждый запрос замеряется (diagnostics.TimedConnection)
+        connection = sqlite3.connect(
+            database,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+            factory=diagnostics.connection_factory(),
+        )
+        configure(connection, self.pragmas)
+        with self._lock:
+            self._connections.append((database, connection))
+        return connection
+
+    def fetch_all(self, database, query, params=()):
+        """Выполнение запроса на чтение и возврат всех строк"""
+        return self.connection(database).execute(query, params).fetchall()
+
+    def fetch_one(self, database, query, params=()):
+        """Выполнение запроса на чтение и возврат первой строки"""
+        return self.connection(database).execute(query, params).fetchone()
+
+    def write(self, database, query, params=()):
+        """Выполнение изменяющего запроса в отдельной транзакции"""
+        with self.transaction(database) as connection:
+            return connection.execute(query, params)
+
+    @contextmanager
+    def transaction(self, database):
+        """Транзакция: фиксация при успехе, откат при исключении"""
+        connection = self.connection(database)
+        try:
+            yield connection
+        except BaseException:
+            connection.rollback()
+            raise
+        else:
+            connection.commit()
+
+    def write_batch(self, database, functions):
+        """Несколько записей в одну базу одной транзакцией (групповая фиксация).
+
+        Каждая функция выполняется над соединением в своей точке сохранения:
+        её исключение откатывает только её, остальные записи фиксируются.
+        Возвращает пары (результат, исключение) в порядке functions. Если
+        саму транзакцию не удалось начать или зафиксировать, исключение
+        sqlite3 пробрасывается, и не сохраняется ни одна запись.
+        """
+        connection = self.connection(database)
+        outcomes = []
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for function in functions:
+                connection.execute("SAVEPOINT batched_write")
+                try:
+                    result = function(connection)
+                except Exception as error:
+                    connection.execute("ROLLBACK TO batched_write")
+                    connection.execute("RELEASE batched_write")
+                    outcomes.append((None, error))
+                else:
+                    connection.execute("RELEASE batched_write")
+                    outcomes.append((result, None))
+            connection.commit()
+        except sqlite3.Error:
+            if connection.in_transaction:
+                connection.rollback()
+            raise
+        return outcomes
+
+    def close_database(self, database):
+        """Закрытие соединений всех потоков с файлом database, например перед его удалением"""
+        with self._lock:
+            self._generations[database] = self._generations.get(database, 0) + 1
+            closing = [connection for path, connection in self._connections if path == database]
+            self._connections = [entry for entry in self._connections if entry[0] != database]
+        for connection in closing:
+            connection.close()
+
+    def close_all(self):
+        """Закрытие всех открытых соединений всех потоков"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for _, connection in connections:
+            try:
+                # Рекомендуемый SQLite сбор статистики перед закрытием соединения
+                connection.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
+            connection.close()
+        self._threads = {}
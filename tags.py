@@ -0,0 +1,213 @@
+import re
+
+import task_history
+from search_index import fold_text
+
+
+# Сколько тэгов показывает облако на экране поиска тэгов
+CLOUD_TAGS = 3
+# Сколько задач возвращает одна страница поиска по тэгам
+SEARCH_PAGE_SIZE = 200
+# Тэг задачи — слово с решёткой в названии или описании: #дом, #работа-2024
+_HASHTAG_RE = re.compile(r"#([^\W_][\w-]*)")
+# Разделители вариантов в запросе "дом | работа" и "дом или работа"
+_OR_RE = re.compile(r"\s*\|\s*|\s+или\s+", re.IGNORECASE)
+
+
+def create_tags(connection):
+    """Шаг миграции: тэги профиля и связь многие-ко-многим task_tags.
+
+    Первичный ключ task_tags (tag_id, task_id) — готовый отсортированный
+    список задач каждого тэга, индекс task_tags_task (task_id, tag_id) —
+    тэги каждой задачи. Число задач тэга (tags.task_count) поддерживают
+    триггеры на task_tags, тэг без задач удаляется.
+    """
+    connection.execute('''
+        CREATE TABLE tags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+            name TEXT NOT NULL,
+            task_count INTEGER NOT NULL DEFAULT 0,
+            UNIQUE (profile_id, name)
+        )
+    ''')
+    connection.execute("CREATE INDEX tags_cloud ON tags (profile_id, task_count DESC)")
+    connection.execute('''
+        CREATE TABLE task_tags (
+            tag_id INTEGER NOT NULL REFERENCES tags(id) ON DELETE CASCADE,
+            task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+            PRIMARY KEY (tag_id, task_id)
+        ) WITHOUT ROWID
+    ''')
+    connection.execute("CREATE INDEX task_tags_task ON task_tags (task_id, tag_id)")
+
+    connection.execute('''
+        CREATE TRIGGER task_tags_count_insert AFTER INSERT ON task_tags BEGIN
+            UPDATE tags SET task_count = task_count + 1 WHERE id = NEW.tag_id;
+        END
+    ''')
+    connection.execute('''
+        CREATE TRIGGER task_tags_count_delete AFTER DELETE ON task_tags BEGIN
+            UPDATE tags SET task_count = task_count - 1 WHERE id = OLD.tag_id;
+            DELETE FROM tags WHERE id = OLD.tag_id AND task_count = 0;
+        END
+    ''')
+
+
+def add_open_counts(connection):
+    """Шаг миграции: число открытых задач тэга (tags.open_count) для облака.
+
+    task_count по-прежнему считает все связи и решает, когда удалить тэг;
+    open_count меняют триггеры на task_tags и на смену статуса задачи.
+    Удаляемая задача списывается до каскадного удаления её связей, пока
+    они ещё видны, поэтому триггер на task_tags её уже не находит.
+    """
+    open_task = f"SELECT 1 FROM tasks WHERE id = {{}}.task_id AND status = {task_history.STATUS_OPEN}"
+    connection.execute("ALTER TABLE tags ADD COLUMN open_count INTEGER NOT NULL DEFAULT 0")
+    connection.execute(f'''
+        UPDATE tags SET open_count = (
+            SELECT COUNT(*) FROM task_tags JOIN tasks ON tasks.id = task_tags.task_id
+            WHERE task_tags.tag_id = tags.id AND tasks.status = {task_history.STATUS_OPEN}
+        )
+    ''')
+    connection.execute("DROP INDEX IF EXISTS tags_cloud")
+    connection.execute("CREATE INDEX tags_open_cloud ON tags (profile_id, open_count DESC)")
+
+    connection.execute(f'''
+        CREATE TRIGGER task_tags_open_insert AFTER INSERT ON task_tags
+        WHEN EXISTS ({open_task.format("NEW")})
+        BEGIN
+            UPDATE tags SET open_count = open_count + 1 WHERE id = NEW.tag_id;
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER task_tags_open_delete AFTER DELETE ON task_tags
+        WHEN EXISTS ({open_task.format("OLD")})
+        BEGIN
+            UPDATE tags SET open_count = open_count - 1 WHERE id = OLD.tag_id;
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER tags_open_task_delete BEFORE DELETE ON tasks
+        WHEN OLD.status = {task_history.STATUS_OPEN}
+        BEGIN
+            UPDATE tags SET open_count = open_count - 1
+            WHERE id IN (SELECT tag_id FROM task_tags WHERE task_id = OLD.id);
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER tags_open_task_status AFTER UPDATE OF status ON tasks
+        WHEN (OLD.status = {task_history.STATUS_OPEN}) IS NOT (NEW.status = {task_history.STATUS_OPEN})
+        BEGIN
+            UPDATE tags SET open_count = open_count + CASE NEW.status WHEN {task_history.STATUS_OPEN} THEN 1 ELSE -1 END
+            WHERE id IN (SELECT tag_id FROM task_tags WHERE task_id = NEW.id);
+        END
+    ''')
+
+
+def normalize_tag(name):
+    return fold_text(name.strip().lstrip("#")).lower()
+
+
+def extract_tags(*texts):
+    """Тэги из текстов задачи: слова с # в нормализованном виде, без повторов"""
+    found = {}
+    for text in texts:
+        for name in _HASHTAG_RE.findall(text or ""):
+            found.setdefault(normalize_tag(name), None)
+    return list(found)
+
+
+def sync_task_tags(connection, profile_id, task_id, names):
+    """Приведение тэгов задачи к списку names: добавляются только новые связи, удаляются только лишние"""
+    tag_ids = set()
+    for name in names:
+        connection.execute("INSERT OR IGNORE INTO tags (profile_id, name) VALUES (?, ?)", (profile_id, name))
+        tag_ids.add(connection.execute(
+            "SELECT id FROM tags WHERE profile_id = ? AND name = ?", (profile_id, name)
+        ).fetchone()[0])
+
+    current = {row[0] for row in connection.execute("SELECT tag_id FROM task_tags WHERE task_id = ?", (task_id,))}
+    connection.executemany(
+        "DELETE FROM task_tags WHERE tag_id = ? AND task_id = ?",
+        [(tag_id, task_id) for tag_id in current - tag_ids]
+    )
+    connection.executemany(
+        "INSERT INTO task_tags (tag_id, task_id) VALUES (?, ?)",
+        [(tag_id, task_id) for tag_id in tag_ids - current]
+    )
+
+
+def tag_cloud(connection, profile_id, limit=CLOUD_TAGS):
+    """Самые частые тэги открытых задач профиля: (name, open_count) по индексу tags_open_cloud"""
+    return connection.execute('''
+        SELECT name, open_count FROM tags
+        WHERE profile_id = ? AND open_count > 0
+        ORDER BY open_count DESC
+        LIMIT ?
+    ''', (profile_id, limit)).fetchall()
+
+
+def parse_tag_query(text):
+    """Запрос к тэгам -> (тэги, match_all).
+
+    "дом работа" — задачи со всеми тэгами (И), "дом | работа" или
+    "дом или работа" — хотя бы с одним (ИЛИ). Смешивать И и ИЛИ нельзя.
+    """
+    text = text.strip()
+    if _OR_RE.search(text):
+        parts, match_all = _OR_RE.split(text), False
+    else:
+        parts, match_all = text.split(), True
+    names = list(dict.fromkeys(normalize_tag(part) for part in parts if normalize_tag(part)))
+    return names, match_all
+
+
+def search_by_tags(connection, profile_id, names, match_all=True, before_id=None, limit=SEARCH_PAGE_SIZE):
+    """Открытые задачи профиля с тэгами names: список (id, name, project_id), новые первыми.
+
+    Возвращает не больше limit задач (None — все); следующая страница —
+    before_id, равный id последней задачи предыдущей. Для И задачи самого редкого тэга перебираются по первичному ключу
+    task_tags и проверяются по ключам остальных тэгов (пересечение
+    индексов); для ИЛИ объединяются диапазоны ключей всех тэгов. Текст
+    задач при этом не просматривается.
+    """
+    if not names:
+        return []
+    placeholders = ", ".join("?" * len(names))
+    tags = connection.execute(
+        f"SELECT id, task_count FROM tags WHERE profile_id = ? AND name IN ({placeholders})",
+        (profile_id, *names)
+    ).fetchall()
+
+    if match_all:
+        if len(tags) < len(names):
+            # Одного из тэгов нет ни у одной задачи
+            return []
+        tag_ids = [tag_id for tag_id, _ in sorted(tags, key=lambda tag: tag[1])]
+        # CROSS JOIN фиксирует порядок: сначала самый редкий тэг
+        joins = "".join(
+            f" CROSS JOIN task_tags AS t{i} ON t{i}.tag_id = ? AND t{i}.task_id = t0.task_id"
+            for i in range(1, len(tag_ids))
+        )
+        matched = f"SELECT t0.task_id FROM task_tags AS t0{joins} WHERE t0.tag_id = ? AND t0.task_id < ?"
+        params = (*tag_ids[1:], tag_ids[0])
+    else:
+        if not tags:
+            return []
+        tag_ids = [tag_id for tag_id, _ in tags]
+        matched = (
+            f"SELECT DISTINCT task_id FROM task_tags WHERE tag_id IN ({', '.join('?' * len(tag_ids))}) AND task_id < ?"
+        )
+        params = tuple(tag_ids)
+
+    # Ключ страницы идёт в диапазон первичного ключа task_tags; без него — все id до наибольшего rowid
+    before_id = (1 << 63) - 1 if before_id is None else before_id
+    return connection.execute(f'''
+        SELECT tasks.id, tasks.name, tasks.project_id
+        FROM ({matched}) AS matched
+        CROSS JOIN tasks ON tasks.id = matched.task_id
+        WHERE tasks.status = {task_history.STATUS_OPEN}
+        ORDER BY matched.task_id DESC
+        LIMIT ?
+    ''', (*params, before_id, -1 if limit is None else limit)).fetchall()
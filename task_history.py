@@ -0,0 +1,104 @@
+# Состояние задачи в tasks.status
+STATUS_OPEN = 0
+STATUS_COMPLETED = 1
+STATUS_FAILED = 2
+
+# Текущее местное время в секундах, как у deadlines.to_timestamp()
+_NOW = "CAST(strftime('%s', 'now', 'localtime') AS INTEGER)"
+
+
+def create_task_history(connection):
+    """Шаг миграции: статус задачи, журнал событий и частичные индексы открытых задач.
+
+    task_events только дополняется: триггеры на tasks записывают создание,
+    выполнение, провал, возврат в работу и удаление задачи, а изменять или
+    удалять события запрещено. События исчезают только вместе с профилем.
+    Индексы с условием status = 0 содержат лишь открытые задачи, поэтому
+    выборки главного списка и панелей дедлайнов не растут вместе с историей.
+    """
+    connection.execute(f"ALTER TABLE tasks ADD COLUMN status INTEGER NOT NULL DEFAULT {STATUS_OPEN}")
+    connection.execute('''
+        CREATE TABLE task_events (
+            id INTEGER PRIMARY KEY,
+            profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+            task_id INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            at INTEGER NOT NULL,
+            name TEXT
+        )
+    ''')
+    connection.execute("CREATE INDEX task_events_profile_kind ON task_events (profile_id, kind, at)")
+
+    connection.execute('''
+        CREATE TRIGGER task_events_no_update BEFORE UPDATE ON task_events BEGIN
+            SELECT RAISE(ABORT, 'task_events is append-only');
+        END
+    ''')
+    connection.execute('''
+        CREATE TRIGGER task_events_no_delete BEFORE DELETE ON task_events
+        WHEN EXISTS (SELECT 1 FROM profiles WHERE id = OLD.profile_id)
+        BEGIN
+            SELECT RAISE(ABORT, 'task_events is append-only');
+        END
+    ''')
+
+    connection.execute(f'''
+        CREATE TRIGGER task_events_insert AFTER INSERT ON tasks BEGIN
+            INSERT INTO task_events (profile_id, task_id, kind, at, name)
+            VALUES (NEW.profile_id, NEW.id, 'created', {_NOW}, NEW.name);
+        END
+    ''')
+    connection.execute(f'''
+        CREATE TRIGGER task_events_status AFTER UPDATE OF status ON tasks
+        WHEN OLD.status IS NOT NEW.status
+        BEGIN
+            INSERT INTO task_events (profile_id, task_id, kind, at, name)
+            VALUES (
+                NEW.profile_id, NEW.id,
+                CASE NEW.status
+                    WHEN {STATUS_COMPLETED} THEN 'completed'
+                    WHEN {STATUS_FAILED} THEN 'failed'
+                    ELSE 'reopened'
+                END,
+                {_NOW}, NEW.name
+            );
+        END
+    ''')
+    # При удалении профиля его задачи удаляются каскадно, и записывать их историю некуда
+    connection.execute(f'''
+        CREATE TRIGGER task_events_delete AFTER DELETE ON tasks
+        WHEN EXISTS (SELECT 1 FROM profiles WHERE id = OLD.profile_id)
+        BEGIN
+            INSERT INTO task_events (profile_id, task_id, kind, at, name)
+            VALUES (OLD.profile_id, OLD.id, 'deleted', {_NOW}, OLD.name);
+        END
+    ''')
+
+    # Индексы только по открытым задачам; условие запросов должно содержать status = 0
+    connection.execute(f"CREATE INDEX tasks_open_name ON tasks (profile_id, name) WHERE status = {STATUS_OPEN}")
+    connection.execute(
+        f"CREATE INDEX tasks_open_deadline ON tasks (profile_id, deadline_at) WHERE status = {STATUS_OPEN}"
+    )
+    connection.execute("DROP INDEX IF EXISTS tasks_profile_deadline_at")
+
+
+def set_status(connection, task_ids, status):
+    """Смена статуса задач task_ids; возвращает число изменённых задач"""
+    return connection.executemany(
+        "UPDATE tasks SET status = ? WHERE id = ? AND status != ?",
+        [(status, task_id, status) for task_id in task_ids]
+    ).rowcount
+
+
+def last_task_with_event(connection, profile_id, kind, since):
+    """id задачи с последним событием kind не раньше since, если задача ещё в этом состоянии"""
+    status = {"completed": STATUS_COMPLETED, "failed": STATUS_FAILED}[kind]
+    row = connection.execute('''
+        SELECT task_events.task_id
+        FROM task_events
+        JOIN tasks ON tasks.id = task_events.task_id AND tasks.status = ?
+        WHERE task_events.profile_id = ? AND task_events.kind = ? AND task_events.at >= ?
+        ORDER BY task_events.at DESC, task_events.id DESC
+        LIMIT 1
+    ''', (status, profile_id, kind, since)).fetchone()
+    return row[0] if row else None
@@ -0,0 +1,174 @@
+import json
+
+import tags
+
+
+# Сколько последних операций профиля можно отменить; более старые забываются
+JOURNAL_STEPS = 1000
+
+# Столбцы задачи, которые восстанавливает журнал; id и profile_id не меняются
+_FIELDS = ("name", "deadline", "description", "deadline_at", "picture", "status", "project_id", "folder_id")
+
+
+def create_task_journal(connection):
+    """Шаг миграции: журнал операций над задачами для отмены и повтора.
+
+    Операция (task_journal_steps) — одно действие пользователя, например
+    правка всех задач с одним названием. Её записи (task_journal) хранят
+    не копии строк, а обратные изменения: для правки — прежние значения
+    только изменённых столбцов, для добавления — лишь id задачи, и только
+    удалённая задача хранится целиком. При отмене или повторе запись
+    применяется и тут же заменяется обратной ей, поэтому undone = 0 —
+    стек отмены, undone = 1 — стек повтора.
+    """
+    connection.execute('''
+        CREATE TABLE task_journal_steps (
+            id INTEGER PRIMARY KEY,
+            profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+            label TEXT NOT NULL,
+            undone INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    connection.execute("CREATE INDEX task_journal_steps_profile ON task_journal_steps (profile_id, undone, id)")
+    connection.execute('''
+        CREATE TABLE task_journal (
+            id INTEGER PRIMARY KEY,
+            step_id INTEGER NOT NULL REFERENCES task_journal_steps(id) ON DELETE CASCADE,
+            task_id INTEGER NOT NULL,
+            action TEXT NOT NULL,
+            data TEXT
+        )
+    ''')
+    connection.execute("CREATE INDEX task_journal_step ON task_journal (step_id)")
+
+
+def begin_step(connection, profile_id, label):
+    """Новая операция профиля; отменённые операции после неё повторить уже нельзя"""
+    connection.execute("DELETE FROM task_journal_steps WHERE profile_id = ? AND undone = 1", (profile_id,))
+    step_id = connection.execute(
+        "INSERT INTO task_journal_steps (profile_id, label) VALUES (?, ?)", (profile_id, label)
+    ).lastrowid
+    connection.execute('''
+        DELETE FROM task_journal_steps
+        WHERE profile_id = ? AND id <= (
+            SELECT id FROM task_journal_steps WHERE profile_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+        )
+    ''', (profile_id, profile_id, JOURNAL_STEPS))
+    return step_id
+
+
+def record_insert(connection, step_id, task_id):
+    """Задача добавлена: отмена её удалит"""
+    _add_entry(connection, step_id, task_id, "delete", None)
+
+
+def record_update(connection, step_id, task_id, values):
+    """Перед изменением задачи: запоминаются прежние значения только тех столбцов values, что меняются"""
+    columns = list(values)
+    row = connection.execute(f"SELECT {', '.join(columns)} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    if row is None:
+        return
+    changed = {column: old for column, old in zip(columns, row) if old != values[column]}
+    if changed:
+        _add_entry(connection, step_id, task_id, "update", changed)
+
+
+def record_delete(connection, step_id, task_id):
+    """Перед удалением задачи: запоминается её строка без пустых столбцов"""
+    row = _task_row(connection, task_id)
+    if row is not None:
+        _add_entry(connection, step_id, task_id, "insert", row)
+
+
+def undo(connection, profile_id):
+    """Отмена последней операции профиля: (название операции, id затронутых задач) или None"""
+    return _replay(connection, profile_id, undone=0, order="DESC")
+
+
+def redo(connection, profile_id):
+    """Повтор последней отменённой операции профиля: (название операции, id затронутых задач) или None"""
+    return _replay(connection, profile_id, undone=1, order="ASC")
+
+
+def _replay(connection, profile_id, undone, order):
+    step = connection.execute(f'''
+        SELECT id, label FROM task_journal_steps
+        WHERE profile_id = ? AND undone = ?
+        ORDER BY id {order}
+        LIMIT 1
+    ''', (profile_id, undone)).fetchone()
+    if step is None:
+        return None
+
+    step_id, label = step
+    task_ids = []
+    # Записи операции отменяются в обратном порядке и повторяются в прямом
+    for entry_id, task_id, action, data in connection.execute(
+        f"SELECT id, task_id, action, data FROM task_journal WHERE step_id = ? ORDER BY id {order}", (step_id,)
+    ).fetchall():
+        action, data = _apply(connection, profile_id, task_id, action, json.loads(data) if data else None)
+        connection.execute(
+            "UPDATE task_journal SET action = ?, data = ? WHERE id = ?",
+            (action, _dump(data), entry_id)
+        )
+        task_ids.append(task_id)
+    connection.execute("UPDATE task_journal_steps SET undone = ? WHERE id = ?", (1 - undone, step_id))
+    return label, task_ids
+
+
+def _apply(connection, profile_id, task_id, action, data):
+    """Применение записи журнала; возвращается обратная ей запись"""
+    if action == "delete":
+        row = _task_row(connection, task_id)
+        if row is None:
+            return action, data
+        connection.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+        return "insert", row
+
+    if action == "insert":
+        # Проект или папка могли быть удалены: тогда задача возвращается без них
+        values = {field: data.get(field) for field in _FIELDS}
+        connection.execute('''
+            INSERT INTO tasks (id, profile_id, name, deadline, description, deadline_at, picture, status, project_id, folder_id)
+            VALUES (
+                :id, :profile_id, :name, :deadline, :description, :deadline_at, :picture, COALESCE(:status, 0),
+                (SELECT id FROM projects WHERE id = :project_id), (SELECT id FROM folders WHERE id = :folder_id)
+            )
+        ''', {**values, "id": task_id, "profile_id": profile_id})
+        _sync_tags(connection, profile_id, task_id)
+        return "delete", None
+
+    columns = list(data)
+    current = connection.execute(f"SELECT {', '.join(columns)} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    if current is None:
+        return action, data
+    connection.execute(
+        f"UPDATE tasks SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?",
+        (*data.values(), task_id)
+    )
+    if "name" in data or "description" in data:
+        _sync_tags(connection, profile_id, task_id)
+    return "update", dict(zip(columns, current))
+
+
+def _sync_tags(connection, profile_id, task_id):
+    name, description = connection.execute("SELECT name, description FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    tags.sync_task_tags(connection, profile_id, task_id, tags.extract_tags(name, description))
+
+
+def _task_row(connection, task_id):
+    row = connection.execute(f"SELECT {', '.join(_FIELDS)} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+    if row is None:
+        return None
+    return {field: value for field, value in zip(_FIELDS, row) if value is not None}
+
+
+def _add_entry(connection, step_id, task_id, action, data):
+    connection.execute(
+        "INSERT INTO task_journal (step_id, task_id, action, data) VALUES (?, ?, ?, ?)",
+        (step_id, task_id, action, _dump(data))
+    )
+
+
+def _dump(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")) if data is not None else None
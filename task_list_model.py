@@ -0,0 +1,197 @@
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize
+from PyQt6.QtGui import QFont
+from PyQt6.QtWidgets import QStyle, QStyledItemDelegate
+
+import search_index
+
+
+# Сколько строк задач читается из базы за один fetchMore()
+PAGE_SIZE = 100
+
+TaskIdRole = Qt.ItemDataRole.UserRole + 1
+DeadlineRole = Qt.ItemDataRole.UserRole + 2
+SnippetRole = Qt.ItemDataRole.UserRole + 3
+
+
+class TaskListModel(QAbstractListModel):
+    """Модель результатов поиска задач с постраничной подгрузкой.
+
+    Модель получает только упорядоченный список id найденных задач, а сами
+    строки читает страницами по PAGE_SIZE, когда представление прокручено
+    до конца уже загруженных (canFetchMore/fetchMore). Поэтому затраты
+    памяти и времени отрисовки не зависят от числа совпадений.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._fetch_page = None
+        self._task_ids = []
+        self._rows = []
+
+    def set_results(self, task_ids, fetch_page):
+        """Новый набор результатов: id задач и функция чтения страницы строк"""
+        self.beginResetModel()
+        self._task_ids = task_ids
+        self._fetch_page = fetch_page
+        self._rows = []
+        self.endResetModel()
+
+    def clear(self):
+        self.set_results([], None)
+
+    def refresh_task(self, task_id):
+        """Перечитывание строки изменённой задачи, если она уже показана"""
+        row = self._row_of(task_id)
+        if row is None or self._fetch_page is None:
+            return
+        rows = self._fetch_page([task_id])
+        if not rows:
+            self.remove_task(task_id)
+            return
+        self._rows[row] = rows[0]
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+    def remove_task(self, task_id):
+        """Удаление задачи из результатов без сброса модели"""
+        if task_id not in self._task_ids:
+            return
+        row = self._row_of(task_id)
+        if row is not None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self._rows[row]
+        self._task_ids = [other for other in self._task_ids if other != task_id]
+        if row is not None:
+            self.endRemoveRows()
+
+    def _row_of(self, task_id):
+        for row, values in enumerate(self._rows):
+            if values[0] == task_id:
+                return row
+        return None
+
+    def total_count(self):
+        """Общее число найденных задач, включая ещё не загруженные"""
+        return len(self._task_ids)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return len(self._rows) < len(self._task_ids)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._fetch_page is None:
+            return
+
+        start = len(self._rows)
+        page_ids = self._task_ids[start:start + PAGE_SIZE]
+        rows = self._fetch_page(page_ids)
+        if not rows:
+            # Задачи страницы удалены после поиска: дальше читать нечего
+            self._task_ids = self._task_ids[:start]
+            return
+
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        task_id, name, deadline, description, snippet = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return name
+        if role == TaskIdRole:
+            return task_id
+        if role == DeadlineRole:
+            return deadline or ""
+        if role == SnippetRole:
+            return snippet or ""
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return search_index.snippet_to_html(snippet)
+        return None
+
+
+class TaskItemDelegate(QStyledItemDelegate):
+    """Отрисовка строки задачи без отдельного виджета на каждую строку.
+
+    Первая строка — название задачи и дедлайн справа, вторая — фрагмент
+    описания с выделенными совпадениями поиска.
+    """
+
+    ROW_HEIGHT = 44
+    PADDING = 6
+
+    def sizeHint(self, option, index):
+        # Ширина берётся у представления, чтобы строки не вызывали горизонтальную прокрутку
+        return QSize(0, self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        style = option.widget.style() if option.widget else None
+        if style is not None:
+            style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, option, painter, option.widget)
+
+        selected = option.state & QStyle.StateFlag.State_Selected
+        palette = option.palette
+        text_color = palette.highlightedText().color() if selected else palette.text().color()
+        painter.setPen(text_color)
+
+        rect = option.rect.adjusted(self.PADDING, 2, -self.PADDING, -2)
+        line_height = rect.height() // 2
+
+        # Название и дедлайн
+        title_font = QFont(option.font)
+        title_font.setBold(True)
+        painter.setFont(title_font)
+        deadline = index.data(DeadlineRole)
+        deadline_width = painter.fontMetrics().horizontalAdvance(deadline) + self.PADDING if deadline else 0
+        title_rect = QRect(rect.left(), rect.top(), rect.width() - deadline_width, line_height)
+        title = painter.fontMetrics().elidedText(
+            index.data(Qt.ItemDataRole.DisplayRole), Qt.TextElideMode.ElideRight, title_rect.width()
+        )
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, title)
+        if deadline:
+            painter.setFont(option.font)
+            painter.drawText(
+                QRect(rect.left(), rect.top(), rect.width(), line_height),
+                Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignRight,
+                deadline
+            )
+
+        # Фрагмент описания: совпадения выделяются жирным шрифтом
+        self._paint_snippet(
+            painter, option.font,
+            QRect(rect.left(), rect.top() + line_height, rect.width(), rect.height() - line_height),
+            index.data(SnippetRole)
+        )
+        painter.restore()
+
+    def _paint_snippet(self, painter, font, rect, snippet):
+        """Отрисовка фрагмента по частям, обрезая его по ширине строки"""
+        bold_font = QFont(font)
+        bold_font.setBold(True)
+        x = rect.left()
+        right = rect.right()
+        highlighted = False
+
+        for part in snippet.replace("\n", " ").replace(search_index.MATCH_END, search_index.MATCH_START).split(
+                search_index.MATCH_START):
+            painter.setFont(bold_font if highlighted else font)
+            metrics = painter.fontMetrics()
+            text = metrics.elidedText(part, Qt.TextElideMode.ElideRight, right - x)
+            painter.drawText(
+                QRect(x, rect.top(), right - x, rect.height()),
+                Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft,
+                text
+            )
+            x += metrics.horizontalAdvance(text)
+            if text != part or x >= right:
+                break
+            highlighted = not highlighted
@@ -0,0 +1,298 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+
+import search_index
+import services
+import task_journal
+
+
+# Как часто проверяется, не изменили ли задачи другие процессы (api_server, todo_cli), с
+DATA_VERSION_POLL_SECONDS = 2
+
+
+def _data_version(connection):
+    """PRAGMA data_version соединения: меняется, когда базу фиксирует другое соединение"""
+    return connection.execute("PRAGMA data_version").fetchone()[0]
+
+
+class TaskRecord:
+    """Задача профиля в памяти: одна строка tasks (services.TASK_FIELDS)"""
+
+    __slots__ = services.TASK_FIELDS
+
+    def __init__(self, *values):
+        for slot, value in zip(self.__slots__, values):
+            setattr(self, slot, value)
+
+
+class TaskRepository(QObject):
+    """Задачи текущего профиля в памяти с записью в базу (write-through).
+
+    Все задачи профиля читаются один раз при входе в профиль и хранятся
+    записями TaskRecord с индексами по id и по названию. Изменения идут
+    через методы репозитория: запись выполняется в потоке записи
+    QueryRunner, там же перечитываются изменённые строки, и только после
+    фиксации транзакции обновляется память и испускаются сигналы
+    task_added, task_changed и task_removed. Экраны обновляют свои строки
+    по сигналам вместо повторных запросов. Каждое изменение записывается в
+    task_journal в той же транзакции и может быть отменено (undo/redo).
+
+    Записи других процессов замечаются по PRAGMA data_version соединения
+    потока записи: собственные записи его не меняют, чужие фиксации —
+    меняют. Версия проверяется по таймеру планировщика; если она
+    изменилась, задачи профиля перечитываются, и отличия от памяти
+    приходят теми же сигналами, а external_change сообщает файл базы.
+    """
+
+    loaded = pyqtSignal(int)
+    task_added = pyqtSignal(object)
+    task_changed = pyqtSignal(object)
+    task_removed = pyqtSignal(int)
+    external_change = pyqtSignal(str)
+
+    def __init__(self, queries, scheduler, parent=None):
+        super().__init__(parent)
+        self.queries = queries
+        self.scheduler = scheduler
+        self.database = None
+        self.profile_id = None
+        self.is_loaded = False
+        self._by_id = {}
+        self._by_name = {}
+        # Версия данных, с которой согласована память, и следующая проверка
+        self._data_version = None
+        self._poll_call = None
+        # Число записей репозитория, применённых к памяти; по нему отбрасывается устаревший снимок
+        self._writes_applied = 0
+
+    def load(self, database, profile_id):
+        """Чтение всех задач профиля в фоне; прежние записи сразу забываются"""
+        self.queries.cancel("repository")
+        self.scheduler.cancel(self._poll_call)
+        self._poll_call = None
+        self.database, self.profile_id = database, profile_id
+        self.is_loaded = False
+        self._by_id, self._by_name = {}, {}
+        self._data_version = None
+        if profile_id is None:
+            return
+
+        def on_version(version):
+            # Версия читается до снимка: фиксация между ними вызовет лишнее перечитывание, но не потеряется
+            if self.is_current(database, profile_id) and not self.is_loaded:
+                self._data_version = version
+                self.queries.read(
+                    database,
+                    lambda connection: services.list_tasks(connection, profile_id),
+                    self._on_loaded,
+                    channel="repository"
+                )
+
+        self.queries.maintain(database, _data_version, on_version)
+
+    def is_current(self, database, profile_id):
+        return self.database == database and self.profile_id == profile_id
+
+    def get(self, task_id):
+        return self._by_id.get(task_id)
+
+    def find(self, name):
+        """Задачи профиля с таким названием"""
+        return [self._by_id[task_id] for task_id in self._by_name.get(name, ())]
+
+    def records(self):
+        return self._by_id.values()
+
+    def page_rows(self, task_ids, text):
+        """Строки страницы результатов поиска, как у search_index.fetch_tasks_page(), но из памяти"""
+        tokens = search_index.query_tokens(text)
+        return [
+            (record.id, record.name, record.deadline, record.description,
+             search_index.make_snippet(record.description, tokens))
+            for record in map(self._by_id.get, task_ids) if record is not None
+        ]
+
+    def add(self, name, deadline, deadline_at, description, picture=None, project_id=None, folder_id=None,
+            on_added=None, on_error=None):
+        """Новая задача (services.add_task); on_added получает TaskRecord"""
+        profile_id = self.profile_id
+        return self._write(
+            lambda connection: [services.add_task(
+                connection, profile_id, name, deadline, deadline_at, description, picture, project_id, folder_id
+            )],
+            lambda records: on_added and on_added(records[0]),
+            on_error
+        )
+
+    def update(self, name, deadline, deadline_at, description, picture, on_updated=None, on_error=None, task_id=None):
+        """Изменение открытых задач с названием name или задачи task_id; on_updated получает список TaskRecord"""
+        profile_id = self.profile_id
+        return self._write(
+            lambda connection: services.update_task(
+                connection, profile_id, name, deadline, deadline_at, description, picture, task_id
+            ),
+            on_updated,
+            on_error
+        )
+
+    def set_status(self, name, status, on_changed=None, on_error=None, task_id=None):
+        """Смена статуса открытых задач с названием name или задачи task_id; on_changed получает изменённые записи"""
+        profile_id = self.profile_id
+        return self._write(
+            lambda connection: services.set_task_status(connection, profile_id, name, status, task_id),
+            on_changed,
+            on_error
+        )
+
+    def delete(self, name, on_deleted=None, on_error=None, task_id=None):
+        """Удаление открытых задач с названием name или задачи task_id; on_deleted получает их число"""
+        database, profile_id = self.database, self.profile_id
+
+        def on_result(task_ids):
+            if self.is_current(database, profile_id):
+                for task_id in task_ids:
+                    self._forget(task_id)
+            if on_deleted is not None:
+                on_deleted(len(task_ids))
+
+        return self.queries.write(
+            database,
+            lambda connection: services.delete_task(connection, profile_id, name, task_id),
+            lambda task_ids: self._after_write(on_result, task_ids),
+            on_error
+        )
+
+    def undo(self, on_done=None, on_error=None):
+        """Отмена последней операции профиля; on_done получает её название или None, если отменять нечего"""
+        return self._replay(task_journal.undo, on_done, on_error)
+
+    def redo(self, on_done=None, on_error=None):
+        """Повтор последней отменённой операции; on_done получает её название или None"""
+        return self._replay(task_journal.redo, on_done, on_error)
+
+    def apply_rows(self, rows):
+        """Внесение в память строк tasks, изменённых в обход репозитория (например, фоновой службой)"""
+        records = []
+        for row in rows:
+            record = TaskRecord(*row)
+            previous = self._by_id.get(record.id)
+            if previous is not None:
+                self._unindex(previous)
+            self._index(record)
+            records.append(record)
+            if previous is None:
+                self.task_added.emit(record)
+            else:
+                self.task_changed.emit(record)
+        return records
+
+    def _write(self, function, on_records, on_error):
+        database, profile_id = self.database, self.profile_id
+
+        def on_result(rows):
+            # Результат записи в уже закрытый профиль память не меняет
+            records = self.apply_rows(rows) if self.is_current(database, profile_id) else []
+            if on_records is not None:
+                on_records(records)
+
+        return self.queries.write(database, function, lambda rows: self._after_write(on_result, rows), on_error)
+
+    def _replay(self, function, on_done, on_error):
+        database, profile_id = self.database, self.profile_id
+
+        def replay(connection):
+            result = function(connection, profile_id)
+            if result is None:
+                return None
+            label, task_ids = result
+            return label, task_ids, services.select_tasks(connection, list(dict.fromkeys(task_ids)))
+
+        def on_result(result):
+            if result is not None and self.is_current(database, profile_id):
+                _, task_ids, rows = result
+                present = {row[0] for row in rows}
+                for task_id in task_ids:
+                    if task_id not in present:
+                        self._forget(task_id)
+                self.apply_rows(rows)
+            if on_done is not None:
+                on_done(result[0] if result is not None else None)
+
+        return self.queries.write(database, replay, lambda result: self._after_write(on_result, result), on_error)
+
+    def _after_write(self, on_result, result):
+        on_result(result)
+        self._writes_applied += 1
+        if not self.is_loaded and self.profile_id is not None:
+            # Снимок, который ещё читается, мог не застать эту запись
+            self.load(self.database, self.profile_id)
+
+    def _on_loaded(self, rows):
+        self._by_id, self._by_name = {}, {}
+        for row in rows:
+            self._index(TaskRecord(*row))
+        self.is_loaded = True
+        self.loaded.emit(self.profile_id)
+        self._schedule_poll()
+
+    def _schedule_poll(self):
+        self._poll_call = self.scheduler.call_later(DATA_VERSION_POLL_SECONDS, self._poll)
+
+    def _poll(self):
+        """Проверка data_version; при изменении — перечитывание задач профиля"""
+        database, profile_id = self.database, self.profile_id
+
+        def on_version(version):
+            if not self.is_current(database, profile_id) or not self.is_loaded:
+                return
+            if version == self._data_version:
+                self._schedule_poll()
+                return
+            self._data_version = version
+            writes_applied = self._writes_applied
+            self.queries.read(
+                database,
+                lambda connection: services.list_tasks(connection, profile_id),
+                lambda rows: self._on_reloaded(rows, writes_applied),
+                channel="repository"
+            )
+
+        self.queries.maintain(database, _data_version, on_version)
+
+    def _on_reloaded(self, rows, writes_applied):
+        """Внесение в память отличий перечитанного снимка от неё"""
+        if writes_applied != self._writes_applied:
+            # Своя запись, применённая за время чтения, могла не попасть в снимок: читаем заново
+            self._data_version = None
+            self._poll()
+            return
+
+        present = {row[0] for row in rows}
+        removed = [task_id for task_id in self._by_id if task_id not in present]
+        for task_id in removed:
+            self._forget(task_id)
+        changed = [
+            row for row in rows
+            if (record := self._by_id.get(row[0])) is None
+            or tuple(getattr(record, field) for field in services.TASK_FIELDS) != tuple(row)
+        ]
+        self.apply_rows(changed)
+        if removed or changed:
+            self.external_change.emit(self.database)
+        self._schedule_poll()
+
+    def _index(self, record):
+        self._by_id[record.id] = record
+        self._by_name.setdefault(record.name, []).append(record.id)
+
+    def _unindex(self, record):
+        ids = self._by_name.get(record.name)
+        if ids is not None:
+            ids.remove(record.id)
+            if not ids:
+                del self._by_name[record.name]
+
+    def _forget(self, task_id):
+        record = self._by_id.pop(task_id, None)
+        if record is not None:
+            self._unindex(record)
+            self.task_removed.emit(task_id)
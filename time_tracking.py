@@ -0,0 +1,73 @@
+# Виды отрезков учёта времени
+KIND_FOCUS = "focus"
+KIND_BREAK = "break"
+
+
+def create_time_tracking(connection):
+    """Шаг миграции: учёт времени по задачам и запланированные блоки времени.
+
+    time_entries — завершённые отрезки работы над задачей или перерывы
+    (помидоры), time_blocks — время, заранее отведённое задаче в
+    календаре. task_id не ссылается на tasks внешним ключом, как и в
+    task_events: учтённое время остаётся после удаления задачи.
+    """
+    connection.execute('''
+        CREATE TABLE time_entries (
+            id INTEGER PRIMARY KEY,
+            profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+            task_id INTEGER,
+            kind TEXT NOT NULL,
+            started_at INTEGER NOT NULL,
+            ended_at INTEGER NOT NULL
+        )
+    ''')
+    connection.execute("CREATE INDEX time_entries_task ON time_entries (task_id, kind)")
+    connection.execute("CREATE INDEX time_entries_profile_started ON time_entries (profile_id, started_at)")
+    connection.execute('''
+        CREATE TABLE time_blocks (
+            id INTEGER PRIMARY KEY,
+            profile_id INTEGER NOT NULL REFERENCES profiles(id) ON DELETE CASCADE,
+            task_id INTEGER NOT NULL,
+            starts_at INTEGER NOT NULL,
+            ends_at INTEGER NOT NULL
+        )
+    ''')
+    connection.execute("CREATE INDEX time_blocks_profile_ends ON time_blocks (profile_id, ends_at)")
+
+
+def add_entries(connection, entries):
+    """Запись пачки отрезков (profile_id, task_id, kind, started_at, ended_at) одним executemany"""
+    connection.executemany(
+        "INSERT INTO time_entries (profile_id, task_id, kind, started_at, ended_at) VALUES (?, ?, ?, ?, ?)",
+        entries
+    )
+
+
+def task_focus_seconds(connection, task_id):
+    """Сколько секунд учтено работы над задачей"""
+    return connection.execute(
+        "SELECT COALESCE(SUM(ended_at - started_at), 0) FROM time_entries WHERE task_id = ? AND kind = ?",
+        (task_id, KIND_FOCUS)
+    ).fetchone()[0]
+
+
+def add_block(connection, profile_id, task_id, starts_at, ends_at):
+    """Новый блок времени задачи; возвращает его id"""
+    if ends_at <= starts_at:
+        raise ValueError("Блок времени должен заканчиваться позже, чем начинается.")
+    return connection.execute(
+        "INSERT INTO time_blocks (profile_id, task_id, starts_at, ends_at) VALUES (?, ?, ?, ?)",
+        (profile_id, task_id, starts_at, ends_at)
+    ).lastrowid
+
+
+def upcoming_blocks(connection, profile_id, since):
+    """Блоки профиля, которые не закончились к since: (id, task_id, название задачи, starts_at, ends_at)"""
+    # Блоки удалённых задач не напоминают о себе, но остаются в истории
+    return connection.execute('''
+        SELECT time_blocks.id, time_blocks.task_id, tasks.name, time_blocks.starts_at, time_blocks.ends_at
+        FROM time_blocks
+        JOIN tasks ON tasks.id = time_blocks.task_id
+        WHERE time_blocks.profile_id = ? AND time_blocks.ends_at > ?
+        ORDER BY time_blocks.starts_at
+    ''', (profile_id, since)).fetchall()
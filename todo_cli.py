@@ -0,0 +1,124 @@
+"""Импорт и экспорт задач без графического интерфейса.
+
+    python todo_cli.py import tasks.jsonl --profile "Работа" --create-profile
+    python todo_cli.py export - --profile "Работа" --format csv > tasks.csv
+    python todo_cli.py shard --profile "Работа"
+"""
+import argparse
+import sqlite3
+import sys
+
+import migrations
+import shards
+import transfer
+import storage
+from storage import TODO_DB
+
+
+def open_database(path, legacy=True):
+    connection = storage.configure(sqlite3.connect(path))
+    if legacy:
+        migrations.migrate(connection)
+    else:
+        migrations.migrate(connection, None, None)
+    return connection
+
+
+def open_profile_database(connection, profile_id):
+    """Соединение с файлом задач профиля: отдельным (shards) или той же основной базой"""
+    path = shards.profile_shard(connection, profile_id)
+    return connection if path is None else open_database(path, legacy=False)
+
+
+def run_import(connection, args):
+    profile_id = transfer.find_profile(connection, args.profile, create=args.create_profile)
+    file_format = args.format or transfer.detect_format(args.file)
+
+    def report(imported, skipped):
+        print(f"\rимпортировано: {imported}, пропущено: {skipped}", end="", file=sys.stderr, flush=True)
+
+    if args.file == "-":
+        file = sys.stdin
+    else:
+        file = open(args.file, encoding="utf-8-sig", newline="")
+    tasks_connection = open_profile_database(connection, profile_id)
+    try:
+        with file:
+            imported, skipped = transfer.import_tasks(
+                tasks_connection, profile_id, transfer.READERS[file_format](file), args.batch_size, report
+            )
+    finally:
+        if tasks_connection is not connection:
+            tasks_connection.close()
+    print(file=sys.stderr)
+    print(f"Импорт завершён: {imported} задач, пропущено без названия или с неверными полями: {skipped}", file=sys.stderr)
+
+
+def run_export(connection, args):
+    profile_id = transfer.find_profile(connection, args.profile)
+    file_format = args.format or transfer.detect_format(args.file)
+
+    if args.file == "-":
+        file = sys.stdout
+    else:
+        file = open(args.file, "w", encoding="utf-8", newline="")
+    tasks_connection = open_profile_database(connection, profile_id)
+    try:
+        with file:
+            count = transfer.export_tasks(tasks_connection, profile_id, file, file_format)
+    finally:
+        if tasks_connection is not connection:
+            tasks_connection.close()
+    print(f"Экспортировано задач: {count}", file=sys.stderr)
+
+
+def run_shard(connection, args):
+    """Перенос задач профилей из общих таблиц в отдельные файлы"""
+    if args.profile:
+        profile_ids = [transfer.find_profile(connection, args.profile)]
+    else:
+        profile_ids = [row[0] for row in connection.execute("SELECT id FROM profiles WHERE sharded = 0 ORDER BY id")]
+    for profile_id in profile_ids:
+        path = shards.move_profile(connection, profile_id)
+        print(f"Профиль {profile_id}: {path}", file=sys.stderr)
+    print(f"Перенесено профилей: {len(profile_ids)}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Импорт и экспорт задач To Do List")
+    parser.add_argument("--database", default=TODO_DB, help="файл базы данных (по умолчанию %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="добавить задачи из JSONL или CSV")
+    import_parser.add_argument("file", help="путь к файлу или - для stdin")
+    import_parser.add_argument("--profile", required=True)
+    import_parser.add_argument("--create-profile", action="store_true", help="создать профиль, если его нет")
+    import_parser.add_argument("--batch-size", type=int, default=transfer.IMPORT_BATCH_SIZE)
+    import_parser.add_argument("--format", choices=transfer.FORMATS)
+    import_parser.set_defaults(run=run_import)
+
+    export_parser = commands.add_parser("export", help="выгрузить задачи профиля в JSONL или CSV")
+    export_parser.add_argument("file", help="путь к файлу или - для stdout")
+    export_parser.add_argument("--profile", required=True)
+    export_parser.add_argument("--format", choices=transfer.FORMATS)
+    export_parser.set_defaults(run=run_export)
+
+    shard_parser = commands.add_parser("shard", help="перенести задачи профилей в отдельные файлы db/shards")
+    shard_parser.add_argument("--profile", help="только этот профиль (по умолчанию все)")
+    shard_parser.set_defaults(run=run_shard, file=None)
+
+    args = parser.parse_args(argv)
+    if args.file == "-" and args.format is None:
+        parser.error("для stdin/stdout укажите --format")
+
+    connection = open_database(args.database)
+    try:
+        args.run(connection, args)
+    except (LookupError, ValueError, OSError) as error:
+        parser.exit(1, f"Ошибка: {error}\n")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import csv
+import json
+import os
+from itertools import islice
+
+import deadlines
+import shards
+import tags
+import task_history
+
+
+# Сколько задач вставляется одной транзакцией
+IMPORT_BATCH_SIZE = 1000
+EXPORT_FETCH_SIZE = 500
+# Поля задачи в файлах обмена
+FIELDS = ("name", "deadline", "deadline_at", "description", "status")
+FORMATS = ("jsonl", "csv")
+# Состояние задачи в файлах обмена; пустое или отсутствующее — открытая
+STATUSES = {
+    "open": task_history.STATUS_OPEN,
+    "completed": task_history.STATUS_COMPLETED,
+    "failed": task_history.STATUS_FAILED,
+}
+_STATUS_NAMES = {status: name for name, status in STATUSES.items()}
+
+_INSERT_TASK = (
+    "INSERT INTO tasks (profile_id, name, deadline, deadline_at, description, status) VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+
+def detect_format(path):
+    """Формат файла по расширению: .jsonl/.ndjson или .csv"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    raise ValueError(f"Неизвестный формат файла '{path}': ожидается .jsonl или .csv")
+
+
+def read_jsonl(file):
+    """Задачи из JSON Lines по одной: объект на строку, пустые строки пропускаются"""
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            raise ValueError(f"Строка {line_number}: некорректный JSON ({error.msg})") from None
+        if not isinstance(record, dict):
+            raise ValueError(f"Строка {line_number}: ожидается объект JSON")
+        yield record
+
+
+def read_csv(file):
+    """Задачи из CSV с заголовком; лишние столбцы игнорируются"""
+    yield from csv.DictReader(file)
+
+
+def write_jsonl(file, records):
+    for record in records:
+        file.write(json.dumps(record, ensure_ascii=False))
+        file.write("\n")
+
+
+def write_csv(file, records):
+    writer = csv.DictWriter(file, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(records)
+
+
+READERS = {"jsonl": read_jsonl, "csv": read_csv}
+WRITERS = {"jsonl": write_jsonl, "csv": write_csv}
+
+
+def _text(record, field):
+    """Строковое поле записи без пробелов по краям; отсутствующее — пустая строка"""
+    value = record.get(field)
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        raise ValueError(f"поле {field}: ожидается строка")
+    return value.strip()
+
+
+def _task_row(profile_id, record):
+    """Строка для INSERT; ValueError, если запись не объект, у неё нет названия или поле неверного типа"""
+    if not isinstance(record, dict):
+        raise ValueError("ожидается объект с полями задачи")
+    name = _text(record, "name")
+    if not name:
+        raise ValueError("нет названия")
+    status = STATUSES.get(_text(record, "status") or "open")
+    if status is None:
+        raise ValueError(f"поле status: одно из {', '.join(STATUSES)}")
+
+    deadline = _text(record, "deadline")
+    try:
+        # Текст дедлайна важнее; ISO-значение deadline_at — на случай, если текста нет
+        deadline_at = deadlines.parse_deadline(deadline or _text(record, "deadline_at"))
+    except ValueError:
+        # Нераспознанный текст сохраняется как есть, как у перенесённых старых задач
+        deadline_at = None
+    return profile_id, name, deadline, deadline_at, _text(record, "description"), status
+
+
+def import_tasks(connection, profile_id, records, batch_size=IMPORT_BATCH_SIZE, progress=None):
+    """Потоковая вставка задач профиля пачками по batch_size в отдельных транзакциях.
+
+    records — любой итератор словарей, например read_jsonl(file); в памяти
+    одновременно находится только одна пачка. После каждой пачки вызывается
+    progress(imported, skipped). Возвращает (imported, skipped); записи без
+    названия или с полями неверного типа пропускаются. Задачи с #тэгами
+    вставляются по одной, чтобы связать их с тэгами, идущие подряд
+    остальные — одним executemany; id задач следуют порядку файла.
+    """
+    records = iter(records)
+    imported = skipped = 0
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        rows = []
+        for record in batch:
+            try:
+                rows.append(_task_row(profile_id, record))
+            except ValueError:
+                pass
+        plain_rows = []
+        with connection:
+            for row in rows:
+                task_tags = tags.extract_tags(row[1], row[4])
+                if not task_tags:
+                    plain_rows.append(row)
+                    continue
+                # Задачи без тэгов, стоящие в файле раньше, получают меньшие id
+                connection.executemany(_INSERT_TASK, plain_rows)
+                plain_rows = []
+                task_id = connection.execute(_INSERT_TASK, row).lastrowid
+                tags.sync_task_tags(connection, profile_id, task_id, task_tags)
+            connection.executemany(_INSERT_TASK, plain_rows)
+        imported += len(rows)
+        skipped += len(batch) - len(rows)
+        if progress is not None:
+            progress(imported, skipped)
+    return imported, skipped
+
+
+def iter_tasks(connection, profile_id, fetch_size=EXPORT_FETCH_SIZE):
+    """Задачи профиля словарями по мере чтения из базы, в порядке добавления"""
+    cursor = connection.execute(
+        "SELECT name, deadline, deadline_at, description, status FROM tasks WHERE profile_id = ? ORDER BY id",
+        (profile_id,)
+    )
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        for name, deadline, deadline_at, description, status in rows:
+            yield {
+                "name": name,
+                "deadline": deadline or "",
+                "deadline_at": deadlines.from_timestamp(deadline_at).isoformat() if deadline_at is not None else "",
+                "description": description or "",
+                "status": _STATUS_NAMES[status],
+            }
+
+
+def export_tasks(connection, profile_id, file, file_format):
+    """Запись задач профиля в открытый текстовый файл; возвращает их число"""
+    count = 0
+
+    def counted(records):
+        nonlocal count
+        for record in records:
+            count += 1
+            yield record
+
+    WRITERS[file_format](file, counted(iter_tasks(connection, profile_id)))
+    return count
+
+
+def find_profile(connection, profile_name, create=False):
+    """id профиля по имени; при create=True отсутствующий профиль создаётся"""
+    row = connection.execute("SELECT id FROM profiles WHERE name = ?", (profile_name,)).fetchone()
+    if row is not None:
+        return row[0]
+    if not create:
+        raise LookupError(f"Профиль '{profile_name}' не найден")
+    with connection:
+        profile_id = shards.create_profile(connection, profile_name)
+    if shards.SHARD_NEW_PROFILES:
+        shards.move_profile(connection, profile_id)
+    return profile_id
@@ -0,0 +1,256 @@
+import itertools
+import sqlite3
+import time
+import traceback
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+import diagnostics
+from storage import WRITE_BATCH_SIZE
+
+
+# Через сколько инструкций виртуальной машины SQLite проверять отмену запроса
+CANCEL_CHECK_INSTRUCTIONS = 1000
+READ_THREADS = 2
+# Ожидаемые ошибки запросов: пользователь видит только их текст
+EXPECTED_ERRORS = (sqlite3.Error, ValueError, LookupError)
+
+
+def error_text(error):
+    """Текст ошибки фонового запроса; у непредвиденной — вместе с трассировкой стека"""
+    if isinstance(error, EXPECTED_ERRORS):
+        return str(error)
+    return "".join(traceback.format_exception(error))
+
+
+class _QueryTask(QRunnable):
+    """Выполнение одной функции над соединением потока из пула"""
+
+    def __init__(self, runner, ticket, channel, database, function):
+        super().__init__()
+        self.runner = runner
+        self.ticket = ticket
+        self.channel = channel
+        self.database = database
+        self.function = function
+
+    def run(self):
+        if self.runner.is_superseded(self.channel, self.ticket):
+            return
+
+        connection = self.runner.storage.connection(self.database)
+        # Обработчик прогресса прерывает запрос, как только его вытеснил более новый
+        connection.set_progress_handler(
+            lambda: self.runner.is_superseded(self.channel, self.ticket), CANCEL_CHECK_INSTRUCTIONS
+        )
+        started = time.perf_counter()
+        try:
+            result = self.function(connection)
+        except sqlite3.Error as error:
+            if self.runner.is_superseded(self.channel, self.ticket):
+                return
+            self.runner._failed.emit(self.ticket, error)
+        except Exception as error:
+            # Трассировка остаётся в error.__traceback__: её показывает error_text()
+            self.runner._failed.emit(self.ticket, error)
+        else:
+            self.runner._finished.emit(self.ticket, result)
+        finally:
+            connection.set_progress_handler(None, 0)
+            if diagnostics.ENABLED:
+                diagnostics.record(
+                    "query." + (self.channel or diagnostics.operation_name(self.function)),
+                    (time.perf_counter() - started) * 1000
+                )
+
+
+class _WriteBatchTask(QRunnable):
+    """Несколько записей в одну базу одной транзакцией (Storage.write_batch).
+
+    Результаты передаются после фиксации, так что обратный вызов видит уже
+    сохранённые данные.
+    """
+
+    def __init__(self, runner, database, writes):
+        super().__init__()
+        self.runner = runner
+        self.database = database
+        self.writes = writes
+
+    def run(self):
+        functions = [function for _, function in self.writes]
+        if diagnostics.ENABLED:
+            diagnostics.count("write.batches")
+            diagnostics.count("write.writes", len(functions))
+            functions = [
+                diagnostics.timed_function("write." + diagnostics.operation_name(function))(function)
+                for function in functions
+            ]
+        try:
+            outcomes = self.runner.storage.write_batch(self.database, functions)
+        except sqlite3.Error as error:
+            # Транзакция не зафиксирована: не сохранилась ни одна запись пачки
+            for ticket, _ in self.writes:
+                self.runner._failed.emit(ticket, error)
+        else:
+            for (ticket, _), (result, error) in zip(self.writes, outcomes):
+                if error is None:
+                    self.runner._finished.emit(ticket, result)
+                else:
+                    self.runner._failed.emit(ticket, error)
+        finally:
+            self.runner._batch_done.emit()
+
+
+class QueryRunner(QObject):
+    """Выполнение запросов к базе данных вне потока интерфейса.
+
+    Чтения идут в пул из нескольких потоков, записи — в отдельный пул из
+    одного потока, поэтому порядок изменений сохраняется. У каждого потока
+    своё соединение из Storage. Результат доставляется в поток интерфейса
+    сигналом и передаётся в обратный вызов on_result, исключение — в
+    on_error. Запросы одного канала (channel)
+    вытесняют друг друга: устаревший запрос прерывается, а его результат
+    отбрасывается.
+
+    Записи копятся в очереди, пока выполняется предыдущая пачка, и затем
+    фиксируются вместе одной транзакцией (групповая фиксация): серия
+    быстрых правок стоит одной синхронизации с диском, а одиночная запись
+    не ждёт дольше, чем раньше.
+    """
+
+    _finished = pyqtSignal(int, object)
+    _failed = pyqtSignal(int, object)
+    _batch_done = pyqtSignal()
+
+    # Ошибка запроса без собственного обработчика: (канал, текст ошибки с трассировкой, см. error_text)
+    query_failed = pyqtSignal(str, str)
+    # Успешная запись в базу данных: путь к файлу базы
+    written = pyqtSignal(str)
+
+    def __init__(self, storage, parent=None):
+        super().__init__(parent)
+        self.storage = storage
+        self._tickets = itertools.count(1)
+        self._current = {}
+        self._callbacks = {}
+        # Записи, ждущие следующей пачки: (ticket, database, function)
+        self._pending_writes = []
+        self._batch_running = False
+        # Время отправки запросов, пока включена диагностика: ticket -> perf_counter()
+        self._submitted = {}
+
+        self._read_pool = QThreadPool(self)
+        self._read_pool.setMaxThreadCount(READ_THREADS)
+        self._write_pool = QThreadPool(self)
+        self._write_pool.setMaxThreadCount(1)
+        # Потоки не завершаются по простою: их соединения живут до shutdown()
+        for pool in (self._read_pool, self._write_pool):
+            pool.setExpiryTimeout(-1)
+
+        self._finished.connect(self._deliver_result)
+        self._failed.connect(self._deliver_error)
+        self._batch_done.connect(self._on_batch_done)
+
+    def read(self, database, function, on_result, channel=None, on_error=None):
+        """Чтение в фоне; новый запрос того же канала вытесняет предыдущий"""
+        return self._submit(self._read_pool, database, function, on_result, channel, on_error)
+
+    def write(self, database, function, on_result=None, on_error=None):
+        """Запись в фоне; записи выполняются строго по очереди, подряд идущие — одной транзакцией"""
+        ticket = next(self._tickets)
+        self._callbacks[ticket] = (None, on_result, on_error, database)
+        self._pending_writes.append((ticket, database, function))
+        if diagnostics.ENABLED:
+            self._submitted[ticket] = time.perf_counter()
+        if not self._batch_running and len(self._pending_writes) == 1:
+            # Записи, добавленные в этом же проходе цикла событий, попадут в ту же пачку
+            QTimer.singleShot(0, self._start_batch)
+        return ticket
+
+    def maintain(self, database, function, on_result=None):
+        """Обслуживание базы (контрольная точка, optimize) в потоке записи вне транзакции"""
+        return self._submit(self._write_pool, database, function, on_result, None, None)
+
+    def cancel(self, channel):
+        """Отмена текущего запроса канала"""
+        self._callbacks.pop(self._current.get(channel), None)
+        self._submitted.pop(self._current.get(channel), None)
+        self._current[channel] = next(self._tickets)
+
+    def is_superseded(self, channel, ticket):
+        return channel is not None and self._current.get(channel) != ticket
+
+    def shutdown(self):
+        """Ожидание завершения всех фоновых запросов, включая ещё не начатые записи"""
+        for channel in list(self._current):
+            self.cancel(channel)
+        while self._pending_writes:
+            self._start_batch(force=True)
+            self._write_pool.waitForDone()
+        self._read_pool.waitForDone()
+        self._write_pool.waitForDone()
+        self._callbacks.clear()
+        self._submitted.clear()
+
+    def _start_batch(self, force=False):
+        """Отправка накопившихся записей в одну базу одной пачкой"""
+        if (self._batch_running and not force) or not self._pending_writes:
+            return
+        database = self._pending_writes[0][1]
+        batch = []
+        for ticket, write_database, function in self._pending_writes:
+            if write_database != database or len(batch) == WRITE_BATCH_SIZE:
+                break
+            batch.append((ticket, function))
+        del self._pending_writes[:len(batch)]
+        self._batch_running = True
+        self._write_pool.start(_WriteBatchTask(self, database, batch))
+
+    def _on_batch_done(self):
+        self._batch_running = False
+        self._start_batch()
+
+    def _submit(self, pool, database, function, on_result, channel, on_error):
+        ticket = next(self._tickets)
+        if channel is not None:
+            # Обратные вызовы вытесненного запроса больше не понадобятся
+            self._callbacks.pop(self._current.get(channel), None)
+            self._submitted.pop(self._current.get(channel), None)
+            self._current[channel] = ticket
+        self._callbacks[ticket] = (channel, on_result, on_error, None)
+        if diagnostics.ENABLED:
+            self._submitted[ticket] = time.perf_counter()
+        pool.start(_QueryTask(self, ticket, channel, database, function))
+        return ticket
+
+    def _measure_delivery(self, ticket, channel):
+        """Диагностика: время от отправки запроса до доставки результата, включая очередь пула"""
+        submitted = self._submitted.pop(ticket, None)
+        if submitted is not None:
+            diagnostics.record("query.latency", (time.perf_counter() - submitted) * 1000)
+        if self.is_superseded(channel, ticket):
+            diagnostics.count("query.superseded")
+
+    def _deliver_result(self, ticket, result):
+        channel, on_result, _, written_database = self._callbacks.pop(ticket, (None, None, None, None))
+        if diagnostics.ENABLED:
+            self._measure_delivery(ticket, channel)
+        if written_database is not None:
+            self.written.emit(written_database)
+        if self.is_superseded(channel, ticket):
+            return
+        if on_result is not None:
+            on_result(result)
+
+    def _deliver_error(self, ticket, error):
+        channel, _, on_error, _ = self._callbacks.pop(ticket, (None, None, None, None))
+        if diagnostics.ENABLED:
+            self._measure_delivery(ticket, channel)
+            diagnostics.count("query.failed")
+        if self.is_superseded(channel, ticket):
+            return
+        if on_error is not None:
+            on_error(error)
+        else:
+            self.query_failed.emit(channel or "", error_text(error))